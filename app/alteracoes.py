@@ -0,0 +1,82 @@
+# app/alteracoes.py
+
+from sqlalchemy import delete, func, insert, literal, select
+from sqlalchemy.orm import Session
+from .models import Alteracao, Avaliacao, Cronometragem, Inscricao, Prova, Resultado
+
+CRIADA, ATUALIZADA, REMOVIDA = "create", "update", "delete"
+COLUNAS = ["id_competicao", "entidade", "chave", "acao"]
+# Espaço das advisory locks do PostgreSQL (segundo argumento: id_competicao)
+TRAVA = 2025
+
+# Chave de cada entidade do feed e as junções até Prova.id_competicao
+_ESCOPO = {
+    "prova": (Prova.id_prova, ()),
+    "inscricao": (Inscricao.id_inscricao, ((Prova, Prova.id_prova == Inscricao.id_prova),)),
+    "cronometro": (Cronometragem.id_cronometro, (
+        (Inscricao, Inscricao.id_inscricao == Cronometragem.id_inscricao),
+        (Prova, Prova.id_prova == Inscricao.id_prova),
+    )),
+    "resultado": (Resultado.id_resultado, (
+        (Inscricao, Inscricao.id_inscricao == Resultado.id_inscricao),
+        (Prova, Prova.id_prova == Inscricao.id_prova),
+    )),
+    "avaliacao": (Avaliacao.id_avaliacao, ((Prova, Prova.id_prova == Avaliacao.id_prova),)),
+}
+# Registros que entram ou saem da competição junto com o pai (FK zerada na remoção, pai movido)
+DEPENDENTES = {
+    "prova": ("inscricao", "avaliacao", "cronometro", "resultado"),
+    "inscricao": ("cronometro", "resultado"),
+}
+
+
+def _junto_da_prova(consulta, entidade: str):
+    for alvo, condicao in _ESCOPO[entidade][1]:
+        consulta = consulta.join(alvo, condicao)
+    return consulta
+
+
+def _consulta(entidade: str, acao: str, criterio):
+    chave = _ESCOPO[entidade][0]
+    consulta = select(Prova.id_competicao, literal(entidade), chave, literal(acao)).select_from(chave.class_)
+    return _junto_da_prova(consulta, entidade).where(criterio, Prova.id_competicao.is_not(None))
+
+
+def registrar(db: Session, entidade: str, criterio, acao: str, dependentes: bool = False):
+    """Log one change per row of `entidade` matching `criterio` (and of its dependents), scoped by competition."""
+    db.flush()
+    for nome in (entidade, *DEPENDENTES.get(entidade, ())) if dependentes else (entidade,):
+        consulta = _consulta(nome, acao, criterio)
+        if db.get_bind().dialect.name != "postgresql":
+            # SQLite tem um único escritor por vez: a ordem do id_alteracao já é a ordem de commit
+            db.execute(insert(Alteracao).from_select(COLUNAS, consulta))
+            continue
+        # PostgreSQL: o id sai da sequence antes do commit. Sem a trava, uma transação que pegou o id 10 e
+        # confirma depois de outra com o 11 faria o cliente que já leu o 11 pular o 10
+        linhas = db.execute(consulta).all()
+        for id_competicao in sorted({linha[0] for linha in linhas}):
+            db.execute(select(func.pg_advisory_xact_lock(TRAVA, id_competicao)))
+        if linhas:
+            db.execute(insert(Alteracao), [dict(zip(COLUNAS, linha)) for linha in linhas])
+
+
+def listar(db: Session, id_competicao: int, since: int, limit: int) -> list:
+    # Índice (id_competicao, id_alteracao): leitura direta a partir do cursor
+    return (
+        db.query(Alteracao)
+        .filter(Alteracao.id_competicao == id_competicao, Alteracao.id_alteracao > since)
+        .order_by(Alteracao.id_alteracao)
+        .limit(limit)
+        .all()
+    )
+
+
+def estados(db: Session, entidade: str, chaves: list, id_competicao: int) -> list:
+    # Só as linhas que ainda pertencem à competição: a que saiu tem a sua remoção mais adiante no feed
+    chave = _ESCOPO[entidade][0]
+    consulta = _junto_da_prova(select(chave.class_), entidade)
+    return db.scalars(consulta.where(chave.in_(chaves), Prova.id_competicao == id_competicao)).all()
+
+
+def descartar(db: Session, id_competicao: int):
+    db.execute(delete(Alteracao).where(Alteracao.id_competicao == id_competicao))
@@ -0,0 +1,155 @@
+# app/cache.py
+
+import functools
+import threading
+import time
+from collections import OrderedDict
+from pydantic import ValidationError
+from . import config
+
+try:
+    import redis
+except ImportError:  # backend compartilhado é opcional
+    redis = None
+
+
+class MemoryBackend:
+    """Bounded LRU with per-entry TTL, local to the process."""
+
+    name = "memory"
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._itens = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, schema):
+        with self._lock:
+            item = self._itens.get(key)
+            if item is None:
+                return None
+            expira, valor = item
+            if expira < time.monotonic():
+                del self._itens[key]
+                return None
+            self._itens.move_to_end(key)
+            return valor
+
+    def set(self, key, valor):
+        with self._lock:
+            self._itens[key] = (time.monotonic() + self.ttl, valor)
+            self._itens.move_to_end(key)
+            while len(self._itens) > self.maxsize:
+                self._itens.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._itens.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._itens.clear()
+
+    def size(self):
+        return len(self._itens)
+
+
+class RedisBackend:
+    """Shared backend so every worker sees the same invalidations."""
+
+    name = "redis"
+
+    def __init__(self, url: str, ttl: float, client=None):
+        if client is None:
+            if redis is None:
+                raise RuntimeError("CACHE_BACKEND=redis requer o pacote 'redis' (pip install redis)")
+            client = redis.Redis.from_url(url)
+        self.ttl = ttl
+        self._client = client
+
+    @staticmethod
+    def _key(key):
+        return "agility:" + ":".join(map(str, key))
+
+    def get(self, key, schema):
+        valor = self._client.get(self._key(key))
+        if valor is None:
+            return None
+        try:
+            return schema.model_validate_json(valor)
+        except ValidationError:
+            # Gravado por uma versão anterior do schema (ex.: sem `versao`): conta como ausente
+            return None
+
+    def set(self, key, valor):
+        self._client.set(self._key(key), valor.model_dump_json(), px=int(self.ttl * 1000))
+
+    def delete(self, key):
+        self._client.delete(self._key(key))
+
+    def clear(self):
+        for chave in self._client.scan_iter("agility:*"):
+            self._client.delete(chave)
+
+    def size(self):
+        return None
+
+
+def _criar_backend():
+    if config.CACHE_BACKEND.startswith(("redis://", "rediss://", "unix://")):
+        return RedisBackend(config.CACHE_BACKEND, config.CACHE_TTL)
+    return MemoryBackend(config.CACHE_MAXSIZE, config.CACHE_TTL)
+
+
+backend = _criar_backend()
+_contadores = {"hits": 0, "misses": 0, "invalidations": 0}
+_contadores_lock = threading.Lock()
+
+
+def _contar(nome: str):
+    with _contadores_lock:
+        _contadores[nome] += 1
+
+
+def read_through(entidade: str, schema):
+    # Envolve um crud.get_* e devolve o schema de resposta já validado (nunca o objeto ORM,
+    # que pertence a uma sessão); ausências não são guardadas
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(db, chave):
+            if not config.CACHE_ENABLED:
+                obj = func(db, chave)
+                return None if obj is None else schema.model_validate(obj)
+            valor = backend.get((entidade, chave), schema)
+            if valor is not None:
+                _contar("hits")
+                return valor
+            _contar("misses")
+            obj = func(db, chave)
+            if obj is None:
+                return None
+            valor = schema.model_validate(obj)
+            backend.set((entidade, chave), valor)
+            return valor
+        return wrapper
+    return decorator
+
+
+def invalidate(entidade: str, chave):
+    if config.CACHE_ENABLED:
+        _contar("invalidations")
+        backend.delete((entidade, chave))
+
+
+def stats() -> dict:
+    with _contadores_lock:
+        contadores = dict(_contadores)
+    total = contadores["hits"] + contadores["misses"]
+    return {
+        "backend": backend.name,
+        "enabled": config.CACHE_ENABLED,
+        "size": backend.size(),
+        "hit_ratio": contadores["hits"] / total if total else None,
+        **contadores,
+    }
@@ -1,296 +1,985 @@
 # app/crud.py
 
-from datetime import datetime
-from sqlalchemy.orm import Session
-from .models import Avaliacao, Cao, Competidor, Cronometragem, Juiz, User, Competicao, Prova, Inscricao, Resultado
-from .schemas import AvaliacaoCreate, AvaliacaoUpdate, CaoCreate, CaoUpdate, CompetidorCreate, CompetidorUpdate, CronometragemCreate, CronometragemUpdate, InscricaoCreate, InscricaoUpdate, JuizCreate, JuizUpdate, ProvaCreate, ProvaUpdate, ResultadoCreate, ResultadoUpdate, UserCreate, CompeticaoCreate, CompeticaoUpdate
+import logging
+from datetime import datetime, timezone
+from typing import Optional
+from pydantic import ValidationError
+from sqlalchemy import bindparam, func, insert, inspect, null, select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session, joinedload, selectinload
+from . import alteracoes, cache, pubsub, ranking, repository, scheduler, scoring, serialize, stats, temporada, timing
+from .models import Avaliacao, Cao, Competidor, Cronometragem, Juiz, User, Competicao, Prova, Inscricao, Resultado, SyncOperacao
+from .schemas import AvaliacaoResponse, CaoResponse, CompeticaoResponse, CompetidorResponse, CronometragemResponse, InscricaoResponse, JuizResponse, ProvaResponse, ResultadoResponse
+from .schemas import AvaliacaoCreate, AvaliacaoUpdate, CaoCreate, CaoUpdate, CompetidorCreate, CronogramaRequest, SyncBatchRequest, CompetidorUpdate, CronometragemCreate, CronometragemUpdate, InscricaoCreate, InscricaoUpdate, JuizCreate, JuizUpdate, ProvaCreate, ProvaUpdate, ResultadoCreate, ResultadoUpdate, UserCreate, CompeticaoCreate, CompeticaoUpdate
+
+PAGE_SIZE = 100
+
+logger = logging.getLogger(__name__)
+
+def _paginar(query, pk, after, limit: int, filtros: dict = None, marca: bool = False):
+    # Paginação por cursor (keyset): WHERE pk > after ORDER BY pk LIMIT n
+    # As listas selecionam só as colunas do schema de resposta e devolvem tuplas (ver serialize.linhas_json)
+    for coluna, valor in (filtros or {}).items():
+        if valor is not None:
+            query = query.filter(coluna == valor)
+    if after is not None:
+        query = query.filter(pk > after)
+    query = query.order_by(pk).limit(limit)
+    if marca:
+        return _marca_da_pagina(query, pk)
+    return query.all()
+
+def _marca_da_pagina(query, pk):
+    # Marca d'água da página para GET condicional: linhas, soma das versões, primeira/última chave e
+    # última alteração, lidas pelo mesmo índice da lista sem trazer as colunas do schema
+    model = pk.class_
+    colunas = [pk.label("chave"), model.versao.label("versao")]
+    if hasattr(model, "atualizado_em"):
+        colunas.append(func.coalesce(model.atualizado_em, model.criado_em).label("modificado"))
+    pagina = query.with_entities(*colunas).subquery()
+    return query.session.execute(select(
+        func.count(),
+        func.coalesce(func.sum(pagina.c.versao), 0),
+        func.min(pagina.c.chave),
+        func.max(pagina.c.chave),
+        func.max(pagina.c.modificado) if "modificado" in pagina.c else null(),
+    )).one()
+
+def get_validadores(db: Session, repositorio: repository.Repository, chave):
+    return repositorio.validadores(db, chave)
+
+def _validar_lote(itens: list, schema):
+    # Valida linha a linha para devolver erros por índice em vez de rejeitar o lote inteiro
+    validos, erros = [], []
+    for indice, item in enumerate(itens):
+        try:
+            validos.append((indice, schema.model_validate(item).model_dump()))
+        except ValidationError as exc:
+            erros.append({"indice": indice, "erro": _mensagem_validacao(exc)})
+    return validos, erros
+
+def _mensagem_validacao(exc: ValidationError) -> str:
+    return "; ".join(f"{'.'.join(map(str, e['loc']))}: {e['msg']}" for e in exc.errors())
+
+def _inserir_lote(db: Session, model, validos, erros, antes_do_commit=None):
+    # Um único executemany e um único commit para todo o lote
+    if validos:
+        linhas = [data for _, data in validos]
+        if antes_do_commit is None:
+            db.execute(insert(model), linhas)
+        else:
+            # O callback recebe as chaves geradas (RETURNING em lote)
+            antes_do_commit(db.scalars(insert(model).returning(*model.__mapper__.primary_key), linhas).all())
+        db.commit()
+    return {"inseridos": len(validos), "erros": sorted(erros, key=lambda erro: erro["indice"])}
+
+# Leituras expandidas: caminhos aceitos em ?expand=
+EXPAND_PROVA = {
+    "inscricoes", "inscricoes.cao", "inscricoes.competidor", "inscricoes.cronometros", "inscricoes.resultados",
+    "avaliacoes",
+}
+EXPAND_INSCRICAO = {"cao", "competidor", "cronometros", "resultados"}
+
+def _opcoes_expand(model, caminhos):
+    # Coleções: um SELECT ... IN por nível (selectinload); muitos-para-um: JOIN na mesma consulta (joinedload)
+    opcoes = []
+    for caminho in caminhos:
+        atual, opcao = model, None
+        for nome in caminho.split("."):
+            relacao = inspect(atual).relationships[nome]
+            carregar = selectinload if relacao.uselist else joinedload
+            atributo = getattr(atual, nome)
+            opcao = carregar(atributo) if opcao is None else getattr(opcao, carregar.__name__)(atributo)
+            atual = relacao.mapper.class_
+        opcoes.append(opcao)
+    return opcoes
+
+def _insert_returning(db: Session, model, data: dict):
+    # INSERT ... RETURNING: a linha criada, com os defaults do servidor, volta no mesmo statement
+    return db.scalar(insert(model).values(**data).returning(model))
 
 # User 
 def get_user(db: Session, user_id: int):
-    return db.query(User).filter(User.id == user_id).first()
+    return repository.users.get(db, user_id)
 
 def get_user_by_email(db: Session, email: str):
     return db.query(User).filter(User.email == email).first()
 
 def create_user(db: Session, user: UserCreate):
-    db_user = User(name=user.name, email=user.email)
-    db.add(db_user)
+    db_user = _insert_returning(db, User, {"name": user.name, "email": user.email})
+    db.commit()
+    return db_user
+
+def update_user(db: Session, user_id: int, user: UserCreate):
+    db_user = repository.users.update(db, user_id, user.model_dump())
     db.commit()
-    db.refresh(db_user)
     return db_user
 
 def delete_user(db: Session, user_id: int):
-    user = db.query(User).filter(User.id == user_id).first()
-    db.delete(user)
+    # As competições do usuário perdem o responsável (repository.desvincular): a cópia em cache fica velha
+    competicoes = db.scalars(select(Competicao.id_competicao).where(Competicao.responsavel_id == user_id)).all()
+    removido = repository.users.delete(db, user_id)
     db.commit()
+    for competition_id in competicoes:
+        cache.invalidate("competicao", competition_id)
+    return removido
 
 # Competitions
 
 def get_competition(db: Session, competition_id: int):
-    return db.query(Competicao).filter(Competicao.id_competicao == competition_id).first()
+    return repository.competicoes.get(db, competition_id)
+
+get_competition_cached = cache.read_through("competicao", CompeticaoResponse)(get_competition)
 
 def create_competition(db: Session, competition: CompeticaoCreate):
-    db_competition = Competicao(
-        nome=competition.nome,
-        data=datetime.fromisoformat(competition.data),
-        localizacao=competition.localizacao,
-        nomes_arbitros_convidados=competition.nomes_arbitros_convidados,
-        nome_diretor_evento=competition.nome_diretor_evento,
-        nome_responsavel_secretaria=competition.nome_responsavel_secretaria,
-        nome_veterinario=competition.nome_veterinario,
-        responsavel_id=competition.responsavel_id
-    )
-    db.add(db_competition)
+    db_competition = _insert_returning(db, Competicao, competition.model_dump())
     db.commit()
-    db.refresh(db_competition)
     return db_competition
 
+def get_competition_stats(db: Session, competition_id: int):
+    if get_competition(db, competition_id) is None:
+        return None
+    return stats.da_competicao(db, competition_id)
+
+def planejar_competition(db: Session, competition_id: int, parametros: CronogramaRequest):
+    # Ordem de largada de todas as provas; todos os hora_inicio num único UPDATE em lote
+    cronograma = scheduler.planejar(db, competition_id, **parametros.model_dump())
+    if cronograma is not None:
+        if cronograma["agendadas"]:
+            alteracoes.registrar(db, "inscricao", (Prova.id_competicao == competition_id) & scheduler.A_AGENDAR, alteracoes.ATUALIZADA)
+        db.commit()
+    return cronograma
+
 def delete_competition(db: Session, competition_id: int):
-    competition = db.query(Competicao).filter(Competicao.id_competicao == competition_id).first()
-    db.delete(competition)
+    temporada.subtrair(db, Prova.id_competicao == competition_id)
+    alteracoes.descartar(db, competition_id)
+    # As provas ficam, sem competição (o PostgreSQL recusaria o DELETE com a FK apontando para ela)
+    provas = db.scalars(select(Prova.id_prova).where(Prova.id_competicao == competition_id)).all()
+    removido = repository.competicoes.delete(db, competition_id)
     db.commit()
-    return {"message": "Competition deleted successfully"}
-
-def update_competition(db: Session, competition_id: int, competition: CompeticaoUpdate):
-    db_competition = db.query(Competicao).filter(Competicao.id_competicao == competition_id).first()
-    if db_competition:
-        for key, value in competition.model_dump(exclude_unset=True).items():
-            setattr(db_competition, key, value)
-        db.commit()
-        db.refresh(db_competition)
-        return db_competition
-    return None
+    cache.invalidate("competicao", competition_id)
+    for prova_id in provas:
+        cache.invalidate("prova", prova_id)
+    return removido
+
+def update_competition(db: Session, competition_id: int, competition: CompeticaoUpdate, versao: Optional[int] = None):
+    update_data = competition.model_dump(exclude_unset=True)
+    mudou_temporada = temporada.CAMPOS_DA_COMPETICAO & update_data.keys()
+    if mudou_temporada:
+        temporada.subtrair(db, Prova.id_competicao == competition_id)
+    db_competition = repository.competicoes.update(db, competition_id, update_data, versao)
+    if mudou_temporada:
+        temporada.somar(db, Prova.id_competicao == competition_id)
+    db.commit()
+    cache.invalidate("competicao", competition_id)
+    return db_competition
 
 # Prova (Competition Event)
 
 def create_prova(db: Session, prova: ProvaCreate):
-    db_prova = Prova(**prova.model_dump())
-    db.add(db_prova)
+    db_prova = _insert_returning(db, Prova, prova.model_dump())
+    alteracoes.registrar(db, "prova", Prova.id_prova == db_prova.id_prova, alteracoes.CRIADA)
     db.commit()
-    db.refresh(db_prova)
     return db_prova
 
 def get_prova(db: Session, prova_id: int):
-    return db.query(Prova).filter(Prova.id_prova == prova_id).first()
-
-def get_provas(db: Session):
-    return db.query(Prova).all()
+    return repository.provas.get(db, prova_id)
+
+get_prova_cached = cache.read_through("prova", ProvaResponse)(get_prova)
+
+def get_prova_expandida(db: Session, prova_id: int, expand: list[str]):
+    return repository.provas.get(db, prova_id, _opcoes_expand(Prova, expand))
+
+def get_provas(
+    db: Session, after: Optional[int] = None, limit: int = PAGE_SIZE, id_competicao: Optional[int] = None, marca: bool = False,
+):
+    return _paginar(db.query(*serialize.colunas(Prova, ProvaResponse)), Prova.id_prova, after, limit, {Prova.id_competicao: id_competicao}, marca)
+
+def update_prova(db: Session, prova_id: int, prova_update: ProvaUpdate, versao: Optional[int] = None):
+    update_data = prova_update.model_dump(exclude_unset=True)
+    mudou_temporada = temporada.CAMPOS_DA_PROVA & update_data.keys()
+    if mudou_temporada:
+        temporada.subtrair(db, Inscricao.id_prova == prova_id)
+    db_prova = repository.provas.update(db, prova_id, update_data, versao)
+    if mudou_temporada:
+        temporada.somar(db, Inscricao.id_prova == prova_id)
+    if db_prova is not None and update_data:
+        alteracoes.registrar(db, "prova", Prova.id_prova == prova_id, alteracoes.ATUALIZADA)
+    if db_prova is not None and scoring.CAMPOS_DA_PROVA & update_data.keys():
+        # Juiz corrigiu TSP/TMP/pista depois da prova: repontua tudo na mesma transação
+        _reavaliar_prova(db, db_prova)
+    _commit_classificacao(db, prova_id)
+    cache.invalidate("prova", prova_id)
+    return db_prova
 
-def update_prova(db: Session, prova_id: int, prova_update: ProvaUpdate):
+def rescore_prova(db: Session, prova_id: int):
     db_prova = get_prova(db, prova_id)
-    for key, value in prova_update.model_dump(exclude_unset=True).items():
-        setattr(db_prova, key, value)
-    db.commit()
-    db.refresh(db_prova)
-    return db_prova
+    if db_prova is None:
+        return None
+    reavaliadas = _reavaliar_prova(db, db_prova)
+    _commit_classificacao(db, prova_id)
+    return {"id_prova": prova_id, "reavaliadas": reavaliadas}
+
+def _reavaliar_prova(db: Session, db_prova: Prova):
+    inscricoes = db.query(
+        Inscricao.id_inscricao, Inscricao.tempo_prova, Inscricao.faltas_prova, Inscricao.recusas_prova,
+        Inscricao.status, Inscricao.status_juiz, Inscricao.vel_media, Inscricao.pontuacao,
+    ).filter(Inscricao.id_prova == db_prova.id_prova).all()
+    alteradas = scoring.pontuar_lote(inscricoes, db_prova.tsp, db_prova.tmp, db_prova.comprimento_pista)
+    if alteradas:
+        tabela = Inscricao.__table__
+        db.execute(
+            tabela.update().where(tabela.c.id_inscricao == bindparam("b_id_inscricao")).values(versao=tabela.c.versao + 1),
+            alteradas,
+        )
+        alteracoes.registrar(
+            db, "inscricao", Inscricao.id_inscricao.in_([linha["b_id_inscricao"] for linha in alteradas]), alteracoes.ATUALIZADA,
+        )
+        stats.recalcular(db, db_prova.id_prova)
+    # A classificação é reconstruída (em todos os workers) e grava só as posições que mudaram
+    ranking.invalidar(db, db_prova.id_prova)
+    classificacao = ranking.obter(db, db_prova.id_prova)
+    if classificacao is not None and pubsub.tem_assinantes(db_prova.id_prova):
+        pubsub.publicar(db_prova.id_prova, "classificacao", [
+            {"id_inscricao": id_inscricao, "posicao": posicao} for id_inscricao, posicao in classificacao.posicoes()
+        ])
+    return len(alteradas)
+
+def get_prova_stats(db: Session, prova_id: int):
+    if get_prova(db, prova_id) is None:
+        return None
+    return stats.da_prova(db, prova_id)
+
+def get_classificacao(db: Session, prova_id: int):
+    classificacao = ranking.obter(db, prova_id)
+    if classificacao is None:
+        return None
+    # A primeira carga pode corrigir posições gravadas à mão
+    _commit_classificacao(db, prova_id)
+    return classificacao.classificacao()
 
 def delete_prova(db: Session, prova_id: int):
-    db_prova = get_prova(db, prova_id)
-    db.delete(db_prova)
-    db.commit()
+    stats.descartar(db, prova_id)
+    temporada.subtrair(db, Inscricao.id_prova == prova_id)
+    # Inscrições e avaliações ficam sem prova: saem do feed da competição junto com ela
+    alteracoes.registrar(db, "prova", Prova.id_prova == prova_id, alteracoes.REMOVIDA, dependentes=True)
+    removido = repository.provas.delete(db, prova_id)
+    _commit_classificacao(db, prova_id)
+    ranking.descartar(prova_id)
+    cache.invalidate("prova", prova_id)
+    return removido
+
+# Ranking da temporada
+def get_rankings(db: Session, season: int, categoria: Optional[str] = None, por: str = "cao", limit: int = PAGE_SIZE):
+    return temporada.classificar(db, season, categoria, por, limit)
 
 # Inscricao (Registration)
 
 def create_inscricao(db: Session, inscricao: InscricaoCreate):
-    data = inscricao.model_dump()
-    if data.get("hora_inicio"):
-        data["hora_inicio"] = datetime.fromisoformat(data["hora_inicio"])
-    db_inscricao = Inscricao(**data)
-    db.add(db_inscricao)
-    db.commit()
-    db.refresh(db_inscricao)
+    db_inscricao = _criar_inscricao(db, inscricao.model_dump())
+    _commit_classificacao(db, db_inscricao.id_prova)
     return db_inscricao
 
-def get_inscricao(db: Session, inscricao_id: int):
-    return db.query(Inscricao).filter(Inscricao.id_inscricao == inscricao_id).first()
+def _criar_inscricao(db: Session, data: dict):
+    db_inscricao = _insert_returning(db, Inscricao, data)
+    alteracoes.registrar(db, "inscricao", Inscricao.id_inscricao == db_inscricao.id_inscricao, alteracoes.CRIADA)
+    stats.registrar(db, None, stats.retrato(db, db_inscricao))
+    if db_inscricao.tempo_prova is not None:
+        _aplicar_inscricao(db, db_inscricao, {"tempo_prova": db_inscricao.tempo_prova})
+    return db_inscricao
+
+def create_inscricoes_bulk(db: Session, itens: list):
+    candidatos, erros = _validar_lote(itens, InscricaoCreate)
+    provas_ids = {data["id_prova"] for _, data in candidatos}
+    competidores_ids = {data["id_competidor"] for _, data in candidatos}
+    microchips = {data["microchip_cao"] for _, data in candidatos}
+    # TSP/TMP/pista vêm na mesma consulta: os percursos já cronometrados entram pontuados, como em create_inscricao
+    provas = {
+        row.id_prova: row
+        for row in db.query(Prova.id_prova, Prova.tsp, Prova.tmp, Prova.comprimento_pista).filter(Prova.id_prova.in_(provas_ids))
+    }
+    competidores = {
+        row[0] for row in db.query(Competidor.id_competidor).filter(Competidor.id_competidor.in_(competidores_ids))
+    }
+    caes = {row[0] for row in db.query(Cao.microchip).filter(Cao.microchip.in_(microchips))}
+
+    validos = []
+    for indice, data in candidatos:
+        if data["id_prova"] not in provas:
+            erros.append({"indice": indice, "erro": f"Prova {data['id_prova']} não encontrada"})
+        elif data["id_competidor"] not in competidores:
+            erros.append({"indice": indice, "erro": f"Competidor {data['id_competidor']} não encontrado"})
+        elif data["microchip_cao"] not in caes:
+            erros.append({"indice": indice, "erro": f"Cão {data['microchip_cao']} não encontrado"})
+        else:
+            if data["tempo_prova"] is not None:
+                prova = provas[data["id_prova"]]
+                pontuacao = scoring.pontuar(
+                    data["tempo_prova"], data["faltas_prova"], data["recusas_prova"], data["status"],
+                    prova.tsp, prova.tmp, prova.comprimento_pista,
+                )
+                data.update(scoring.campos_pontuados(pontuacao, data["status"]))
+            validos.append((indice, data))
+
+    def atualizar_estatisticas(chaves):
+        alteracoes.registrar(db, "inscricao", Inscricao.id_inscricao.in_(chaves), alteracoes.CRIADA)
+        for prova_id in {data["id_prova"] for _, data in validos}:
+            stats.recalcular(db, prova_id)
+        for prova_id in {data["id_prova"] for _, data in validos if data.get("tempo_prova") is not None}:
+            ranking.invalidar(db, prova_id)
+
+    resposta = _inserir_lote(db, Inscricao, validos, erros, atualizar_estatisticas)
+    for prova_id in {data["id_prova"] for _, data in validos if data.get("tempo_prova") is not None}:
+        ranking.descartar(prova_id)
+    return resposta
 
-def get_inscricoes(db: Session):
-    return db.query(Inscricao).all()
+def get_inscricao(db: Session, inscricao_id: int):
+    return repository.inscricoes.get(db, inscricao_id)
+
+def get_inscricao_expandida(db: Session, inscricao_id: int, expand: list[str]):
+    return repository.inscricoes.get(db, inscricao_id, _opcoes_expand(Inscricao, expand))
+
+def get_inscricoes(
+    db: Session,
+    after: Optional[int] = None,
+    limit: int = PAGE_SIZE,
+    id_prova: Optional[int] = None,
+    id_competicao: Optional[int] = None,
+    id_competidor: Optional[int] = None,
+    microchip_cao: Optional[str] = None,
+    status: Optional[str] = None,
+    marca: bool = False,
+):
+    query = db.query(*serialize.colunas(Inscricao, InscricaoResponse))
+    if id_competicao is not None:
+        query = query.join(Prova, Inscricao.id_prova == Prova.id_prova)
+    return _paginar(query, Inscricao.id_inscricao, after, limit, {
+        Inscricao.id_prova: id_prova,
+        Prova.id_competicao: id_competicao,
+        Inscricao.id_competidor: id_competidor,
+        Inscricao.microchip_cao: microchip_cao,
+        Inscricao.status: status,
+    }, marca)
+
+def update_inscricao(db: Session, inscricao_id: int, inscricao_update: InscricaoUpdate, versao: Optional[int] = None):
+    atualizada = _atualizar_inscricao(db, inscricao_id, inscricao_update.model_dump(exclude_unset=True), versao)
+    if atualizada is None:
+        db.rollback()
+        return None
+    db_inscricao, posicoes, id_prova_anterior = atualizada
+    _commit_classificacao(db, db_inscricao.id_prova, id_prova_anterior)
+    _publicar_inscricao(db_inscricao, posicoes)
+    return db_inscricao
 
-def update_inscricao(db: Session, inscricao_id: int, inscricao_update: InscricaoUpdate):
+def _atualizar_inscricao(db: Session, inscricao_id: int, update_data: dict, versao: Optional[int] = None):
+    # Sem commit: devolve (inscrição, posições alteradas, id_prova anterior) ou None se não existe
+    # Inscrição mudou de prova/cão/competidor: os pontos dos seus resultados mudam de dono na temporada
+    mudou_temporada = temporada.CAMPOS_DA_INSCRICAO & update_data.keys()
+    if mudou_temporada:
+        temporada.subtrair(db, Resultado.id_inscricao == inscricao_id)
+    mudou_prova = "id_prova" in update_data
+    if mudou_prova:
+        alteracoes.registrar(db, "inscricao", Inscricao.id_inscricao == inscricao_id, alteracoes.REMOVIDA, dependentes=True)
+    if not (scoring.CAMPOS_DE_PONTUACAO | ranking.CAMPOS_DE_PERCURSO | stats.CAMPOS) & update_data.keys():
+        # Sem efeito em pontuação/classificação/estatísticas (ex.: colete, hora_inicio): um único UPDATE ... RETURNING
+        db_inscricao = repository.inscricoes.update(db, inscricao_id, update_data, versao)
+        if db_inscricao is None:
+            return None
+        if mudou_temporada:
+            temporada.somar(db, Resultado.id_inscricao == inscricao_id)
+        if update_data:
+            alteracoes.registrar(db, "inscricao", Inscricao.id_inscricao == inscricao_id, alteracoes.ATUALIZADA, dependentes=mudou_prova)
+        return db_inscricao, [], db_inscricao.id_prova
+    # A pontuação depende do estado atual da linha: lê, aplica e grava na mesma transação
     db_inscricao = get_inscricao(db, inscricao_id)
-    update_data = inscricao_update.model_dump(exclude_unset=True)
-    if update_data.get("hora_inicio"):
-        update_data["hora_inicio"] = datetime.fromisoformat(update_data["hora_inicio"])
+    if db_inscricao is None:
+        return None
+    repository.conferir_versao(db_inscricao, versao)
+    id_prova_anterior = db_inscricao.id_prova
+    posicoes = _aplicar_inscricao(db, db_inscricao, update_data)
+    if mudou_temporada:
+        temporada.somar(db, Resultado.id_inscricao == inscricao_id)
+    alteracoes.registrar(db, "inscricao", Inscricao.id_inscricao == inscricao_id, alteracoes.ATUALIZADA, dependentes=mudou_prova)
+    return db_inscricao, posicoes, id_prova_anterior
+
+def _aplicar_inscricao(db: Session, db_inscricao: Inscricao, update_data: dict):
+    # Aplica os campos e atualiza classificação e estatísticas na transação corrente, sem commit
+    id_prova_anterior = db_inscricao.id_prova
+    antes = stats.retrato(db, db_inscricao)
     for key, value in update_data.items():
         setattr(db_inscricao, key, value)
-    db.commit()
-    db.refresh(db_inscricao)
-    return db_inscricao
+    if "status" in update_data:
+        # Status enviado é decisão do juiz: substitui o anterior, inclusive o guardado sob uma eliminação do percurso
+        db_inscricao.status_juiz = None
+    if scoring.CAMPOS_DE_PONTUACAO & update_data.keys():
+        # db.get e não db_inscricao.prova: trocando id_prova, o relacionamento carregado ainda aponta para a antiga
+        prova = db.get(Prova, db_inscricao.id_prova) if db_inscricao.id_prova is not None else None
+        # Inscrição sem prova (prova removida): sem TSP/TMP não há como pontuar, os valores ficam como estão
+        if prova is not None:
+            status_juiz = scoring.status_do_juiz(db_inscricao)
+            pontuacao = scoring.pontuar(
+                db_inscricao.tempo_prova, db_inscricao.faltas_prova, db_inscricao.recusas_prova, status_juiz,
+                prova.tsp, prova.tmp, prova.comprimento_pista,
+            )
+            for key, value in scoring.campos_pontuados(pontuacao, status_juiz).items():
+                setattr(db_inscricao, key, value)
+    # Grava já (UPDATE ... WHERE versao = <lida>): uma escrita concorrente falha aqui, antes de mexer na classificação em memória
+    db.flush()
+    stats.registrar(db, antes, stats.retrato(db, db_inscricao, antes))
+    if not ranking.CAMPOS_DE_PERCURSO & update_data.keys():
+        return []
+    com_resultado = False
+    if db_inscricao.id_prova != id_prova_anterior:
+        com_resultado = ranking.remover_inscricao(db, id_prova_anterior, db_inscricao.id_inscricao)
+    return ranking.registrar_percurso(db, db_inscricao, com_resultado)
+
+def _publicar_inscricao(db_inscricao: Inscricao, posicoes):
+    _publicar(db_inscricao.id_prova, "inscricao", db_inscricao, InscricaoResponse)
+    if posicoes:
+        pubsub.publicar(db_inscricao.id_prova, "classificacao", [
+            {"id_inscricao": id_inscricao, "posicao": posicao} for id_inscricao, posicao in posicoes
+        ])
 
 def delete_inscricao(db: Session, inscricao_id: int):
-    db_inscricao = get_inscricao(db, inscricao_id)
-    db.delete(db_inscricao)
-    db.commit()
+    removida = _remover_inscricao(db, inscricao_id)
+    if removida is None:
+        return False
+    _commit_classificacao(db, removida.id_prova)
+    return True
+
+def _remover_inscricao(db: Session, inscricao_id: int):
+    id_prova = db.query(Inscricao.id_prova).filter(Inscricao.id_inscricao == inscricao_id).first()
+    if id_prova is None:
+        return None
+    temporada.subtrair(db, Resultado.id_inscricao == inscricao_id)
+    # Antes do DELETE: depois dele o Resultado fica sem id_inscricao e não é mais achado para perder a posição
+    ranking.remover_inscricao(db, id_prova[0], inscricao_id)
+    alteracoes.registrar(db, "inscricao", Inscricao.id_inscricao == inscricao_id, alteracoes.REMOVIDA, dependentes=True)
+    removida = repository.inscricoes.delete(
+        db, inscricao_id, Inscricao.id_prova, Inscricao.microchip_cao, Inscricao.tempo_prova,
+        Inscricao.status, Inscricao.pontuacao, Inscricao.vel_media,
+    )
+    if removida is None:
+        return None
+    stats.registrar(db, stats.retrato(db, removida), None)
+    return removida
+
+def _registrar_mudanca_de_pai(db: Session, entidade: str, criterio, fk: str, update_data: dict):
+    # Troca de prova/inscrição pode mudar a competição: remoção no feed atual antes do UPDATE (o registrar
+    # depois dele põe o registro no feed da competição nova)
+    if fk in update_data:
+        alteracoes.registrar(db, entidade, criterio, alteracoes.REMOVIDA)
+
+def _estado(schema, obj) -> Optional[dict]:
+    # Uma linha que não valida no schema de resposta não derruba a resposta inteira (feed, sync)
+    try:
+        return schema.model_validate(obj).model_dump(mode="json")
+    except ValidationError as exc:
+        logger.warning("%s fora do schema %s: %s", obj, schema.__name__, _mensagem_validacao(exc))
+        return None
+
+def _publicar(id_prova, tipo: str, obj, schema):
+    # Só serializa quando há telão/cliente inscrito na prova
+    if id_prova is not None and pubsub.tem_assinantes(id_prova):
+        pubsub.publicar(id_prova, tipo, schema.model_validate(obj).model_dump(mode="json"))
+
+def _prova_para_publicar(db: Session, inscricao_id):
+    if not pubsub.tem_assinantes():
+        return None
+    return db.query(Inscricao.id_prova).filter(Inscricao.id_inscricao == inscricao_id).scalar()
+
+def _commit_classificacao(db: Session, *provas_ids: int):
+    # Se o commit falhar a classificação em memória deixa de refletir o banco
+    try:
+        db.commit()
+    except Exception:
+        for prova_id in provas_ids:
+            ranking.descartar(prova_id)
+        raise
 
     # Competidor
 def create_competidor(db: Session, competidor: CompetidorCreate):
-    db_competidor = Competidor(**competidor.model_dump())
-    db.add(db_competidor)
+    db_competidor = _insert_returning(db, Competidor, competidor.model_dump())
     db.commit()
-    db.refresh(db_competidor)
     return db_competidor
 
+def create_competidores_bulk(db: Session, itens: list):
+    validos, erros = _validar_lote(itens, CompetidorCreate)
+    return _inserir_lote(db, Competidor, validos, erros)
+
 def get_competidor(db: Session, competidor_id: int):
-    return db.query(Competidor).filter(Competidor.id_competidor == competidor_id).first()
+    return repository.competidores.get(db, competidor_id)
 
-def get_competidores(db: Session):
-    return db.query(Competidor).all()
+def get_competidores(db: Session, after: Optional[int] = None, limit: int = PAGE_SIZE, marca: bool = False):
+    return _paginar(db.query(*serialize.colunas(Competidor, CompetidorResponse)), Competidor.id_competidor, after, limit, marca=marca)
 
-def update_competidor(db: Session, competidor_id: int, competidor_update: CompetidorUpdate):
-    db_competidor = get_competidor(db, competidor_id)
-    for key, value in competidor_update.model_dump(exclude_unset=True).items():
-        setattr(db_competidor, key, value)
+def update_competidor(db: Session, competidor_id: int, competidor_update: CompetidorUpdate, versao: Optional[int] = None):
+    update_data = competidor_update.model_dump(exclude_unset=True)
+    db_competidor = repository.competidores.update(db, competidor_id, update_data, versao)
     db.commit()
-    db.refresh(db_competidor)
     return db_competidor
 
 def delete_competidor(db: Session, competidor_id: int):
-    db_competidor = get_competidor(db, competidor_id)
-    db.delete(db_competidor)
+    temporada.subtrair_competidor(db, competidor_id)
+    # As inscrições do competidor ficam sem competidor
+    alteracoes.registrar(db, "inscricao", Inscricao.id_competidor == competidor_id, alteracoes.ATUALIZADA)
+    removido = repository.competidores.delete(db, competidor_id)
     db.commit()
+    return removido
 
 # Cao
 def create_cao(db: Session, cao: CaoCreate):
-    db_cao = Cao(**cao.model_dump())
-    db.add(db_cao)
+    db_cao = _insert_returning(db, Cao, cao.model_dump())
     db.commit()
-    db.refresh(db_cao)
     return db_cao
 
+def create_caes_bulk(db: Session, itens: list):
+    candidatos, erros = _validar_lote(itens, CaoCreate)
+    microchips = {data["microchip"] for _, data in candidatos}
+    existentes = {row[0] for row in db.query(Cao.microchip).filter(Cao.microchip.in_(microchips))}
+    validos = []
+    for indice, data in candidatos:
+        if data["microchip"] in existentes:
+            erros.append({"indice": indice, "erro": f"Microchip {data['microchip']} já cadastrado"})
+        else:
+            existentes.add(data["microchip"])
+            validos.append((indice, data))
+    return _inserir_lote(db, Cao, validos, erros)
+
 def get_cao(db: Session, microchip: str):
-    return db.query(Cao).filter(Cao.microchip == microchip).first()
+    return repository.caes.get(db, microchip)
 
-def get_caes(db: Session):
-    return db.query(Cao).all()
+get_cao_cached = cache.read_through("cao", CaoResponse)(get_cao)
 
-def update_cao(db: Session, microchip: str, cao_update: CaoUpdate):
-    db_cao = get_cao(db, microchip)
-    for key, value in cao_update.model_dump(exclude_unset=True).items():
-        setattr(db_cao, key, value)
+def get_caes(
+    db: Session, after: Optional[str] = None, limit: int = PAGE_SIZE, categoria_salto: Optional[str] = None, marca: bool = False,
+):
+    return _paginar(db.query(*serialize.colunas(Cao, CaoResponse)), Cao.microchip, after, limit, {Cao.categoria_salto: categoria_salto}, marca)
+
+def update_cao(db: Session, microchip: str, cao_update: CaoUpdate, versao: Optional[int] = None):
+    update_data = cao_update.model_dump(exclude_unset=True)
+    db_cao = repository.caes.update(db, microchip, update_data, versao)
+    if db_cao is not None and "categoria_salto" in update_data:
+        stats.recalcular_cao(db, microchip)
     db.commit()
-    db.refresh(db_cao)
+    cache.invalidate("cao", microchip)
     return db_cao
 
 def delete_cao(db: Session, microchip: str):
-    db_cao = get_cao(db, microchip)
-    db.delete(db_cao)
+    removido = repository.caes.delete(db, microchip)
     db.commit()
+    cache.invalidate("cao", microchip)
+    return removido
 
 # Juiz
 def create_juiz(db: Session, juiz: JuizCreate):
-    db_juiz = Juiz(**juiz.model_dump())
-    db.add(db_juiz)
+    db_juiz = _insert_returning(db, Juiz, juiz.model_dump())
     db.commit()
-    db.refresh(db_juiz)
     return db_juiz
 
 def get_juiz(db: Session, juiz_id: int):
-    return db.query(Juiz).filter(Juiz.id_juiz == juiz_id).first()
+    return repository.juizes.get(db, juiz_id)
+
+get_juiz_cached = cache.read_through("juiz", JuizResponse)(get_juiz)
 
-def get_juizes(db: Session):
-    return db.query(Juiz).all()
+def get_juizes(db: Session, after: Optional[int] = None, limit: int = PAGE_SIZE, marca: bool = False):
+    return _paginar(db.query(*serialize.colunas(Juiz, JuizResponse)), Juiz.id_juiz, after, limit, marca=marca)
 
-def update_juiz(db: Session, juiz_id: int, juiz_update: JuizUpdate):
-    db_juiz = get_juiz(db, juiz_id)
-    for key, value in juiz_update.model_dump(exclude_unset=True).items():
-        setattr(db_juiz, key, value)
+def update_juiz(db: Session, juiz_id: int, juiz_update: JuizUpdate, versao: Optional[int] = None):
+    db_juiz = repository.juizes.update(db, juiz_id, juiz_update.model_dump(exclude_unset=True), versao)
     db.commit()
-    db.refresh(db_juiz)
+    cache.invalidate("juiz", juiz_id)
     return db_juiz
 
 def delete_juiz(db: Session, juiz_id: int):
-    db_juiz = get_juiz(db, juiz_id)
-    db.delete(db_juiz)
+    alteracoes.registrar(db, "avaliacao", Avaliacao.id_juiz == juiz_id, alteracoes.ATUALIZADA)
+    removido = repository.juizes.delete(db, juiz_id)
     db.commit()
+    cache.invalidate("juiz", juiz_id)
+    return removido
 
 # Resultado
 def create_resultado(db: Session, resultado: ResultadoCreate):
-    db_resultado = Resultado(**resultado.model_dump())
-    db.add(db_resultado)
+    db_resultado = _criar_resultado(db, resultado.model_dump())
     db.commit()
-    db.refresh(db_resultado)
     return db_resultado
 
-def get_resultado(db: Session, resultado_id: int):
-    return db.query(Resultado).filter(Resultado.id_resultado == resultado_id).first()
-
-def get_resultados(db: Session):
-    return db.query(Resultado).all()
+def _criar_resultado(db: Session, data: dict):
+    db_resultado = _insert_returning(db, Resultado, data)
+    temporada.somar(db, Resultado.id_resultado == db_resultado.id_resultado)
+    alteracoes.registrar(db, "resultado", Resultado.id_resultado == db_resultado.id_resultado, alteracoes.CRIADA)
+    return db_resultado
 
-def update_resultado(db: Session, resultado_id: int, resultado_update: ResultadoUpdate):
-    db_resultado = get_resultado(db, resultado_id)
-    for key, value in resultado_update.model_dump(exclude_unset=True).items():
-        setattr(db_resultado, key, value)
+def get_resultado(db: Session, resultado_id: int):
+    return repository.resultados.get(db, resultado_id)
+
+def get_resultados(
+    db: Session,
+    after: Optional[int] = None,
+    limit: int = PAGE_SIZE,
+    id_inscricao: Optional[int] = None,
+    id_prova: Optional[int] = None,
+    marca: bool = False,
+):
+    query = db.query(*serialize.colunas(Resultado, ResultadoResponse))
+    if id_prova is not None:
+        query = query.join(Inscricao, Resultado.id_inscricao == Inscricao.id_inscricao)
+    return _paginar(query, Resultado.id_resultado, after, limit, {
+        Resultado.id_inscricao: id_inscricao,
+        Inscricao.id_prova: id_prova,
+    }, marca)
+
+def update_resultado(db: Session, resultado_id: int, resultado_update: ResultadoUpdate, versao: Optional[int] = None):
+    db_resultado = _atualizar_resultado(db, resultado_id, resultado_update.model_dump(exclude_unset=True), versao)
     db.commit()
-    db.refresh(db_resultado)
+    if db_resultado is None:
+        return None
+    _publicar_resultado(db, db_resultado)
+    return db_resultado
+
+def _atualizar_resultado(db: Session, resultado_id: int, update_data: dict, versao: Optional[int] = None):
+    mudou_temporada = temporada.CAMPOS_DO_RESULTADO & update_data.keys()
+    if mudou_temporada:
+        temporada.subtrair(db, Resultado.id_resultado == resultado_id)
+    _registrar_mudanca_de_pai(db, "resultado", Resultado.id_resultado == resultado_id, "id_inscricao", update_data)
+    db_resultado = repository.resultados.update(db, resultado_id, update_data, versao)
+    if mudou_temporada:
+        temporada.somar(db, Resultado.id_resultado == resultado_id)
+    if db_resultado is not None and update_data:
+        alteracoes.registrar(db, "resultado", Resultado.id_resultado == resultado_id, alteracoes.ATUALIZADA)
     return db_resultado
 
+def _publicar_resultado(db: Session, db_resultado: Resultado):
+    _publicar(_prova_para_publicar(db, db_resultado.id_inscricao), "resultado", db_resultado, ResultadoResponse)
+
 def delete_resultado(db: Session, resultado_id: int):
-    db_resultado = get_resultado(db, resultado_id)
-    db.delete(db_resultado)
+    removido = _remover_resultado(db, resultado_id)
     db.commit()
+    return removido
+
+def _remover_resultado(db: Session, resultado_id: int):
+    temporada.subtrair(db, Resultado.id_resultado == resultado_id)
+    alteracoes.registrar(db, "resultado", Resultado.id_resultado == resultado_id, alteracoes.REMOVIDA)
+    return repository.resultados.delete(db, resultado_id)
 
 # Avaliacao
 def create_avaliacao(db: Session, avaliacao: AvaliacaoCreate):
-    db_avaliacao = Avaliacao(**avaliacao.model_dump())
-    db.add(db_avaliacao)
+    db_avaliacao = _insert_returning(db, Avaliacao, avaliacao.model_dump())
+    alteracoes.registrar(db, "avaliacao", Avaliacao.id_avaliacao == db_avaliacao.id_avaliacao, alteracoes.CRIADA)
     db.commit()
-    db.refresh(db_avaliacao)
     return db_avaliacao
 
 def get_avaliacao(db: Session, avaliacao_id: int):
-    return db.query(Avaliacao).filter(Avaliacao.id_avaliacao == avaliacao_id).first()
-
-def get_avaliacoes(db: Session):
-    return db.query(Avaliacao).all()
-
-def update_avaliacao(db: Session, avaliacao_id: int, avaliacao_update: AvaliacaoUpdate):
-    db_avaliacao = get_avaliacao(db, avaliacao_id)
-    for key, value in avaliacao_update.model_dump(exclude_unset=True).items():
-        setattr(db_avaliacao, key, value)
+    return repository.avaliacoes.get(db, avaliacao_id)
+
+def get_avaliacoes(
+    db: Session,
+    after: Optional[int] = None,
+    limit: int = PAGE_SIZE,
+    id_prova: Optional[int] = None,
+    id_juiz: Optional[int] = None,
+    marca: bool = False,
+):
+    return _paginar(db.query(*serialize.colunas(Avaliacao, AvaliacaoResponse)), Avaliacao.id_avaliacao, after, limit, {
+        Avaliacao.id_prova: id_prova,
+        Avaliacao.id_juiz: id_juiz,
+    }, marca)
+
+def update_avaliacao(db: Session, avaliacao_id: int, avaliacao_update: AvaliacaoUpdate, versao: Optional[int] = None):
+    update_data = avaliacao_update.model_dump(exclude_unset=True)
+    _registrar_mudanca_de_pai(db, "avaliacao", Avaliacao.id_avaliacao == avaliacao_id, "id_prova", update_data)
+    db_avaliacao = repository.avaliacoes.update(db, avaliacao_id, update_data, versao)
+    if db_avaliacao is not None and update_data:
+        alteracoes.registrar(db, "avaliacao", Avaliacao.id_avaliacao == avaliacao_id, alteracoes.ATUALIZADA)
     db.commit()
-    db.refresh(db_avaliacao)
     return db_avaliacao
 
 def delete_avaliacao(db: Session, avaliacao_id: int):
-    db_avaliacao = get_avaliacao(db, avaliacao_id)
-    db.delete(db_avaliacao)
+    alteracoes.registrar(db, "avaliacao", Avaliacao.id_avaliacao == avaliacao_id, alteracoes.REMOVIDA)
+    removido = repository.avaliacoes.delete(db, avaliacao_id)
     db.commit()
+    return removido
 
 # Cronometragem
 def create_cronometro(db: Session, cronometro: CronometragemCreate):
-    data = cronometro.model_dump()
-    if data.get("tempo_inicial"):
-        data["tempo_inicial"] = datetime.fromisoformat(data["tempo_inicial"])
-    if data.get("tempo_final"):
-        data["tempo_final"] = datetime.fromisoformat(data["tempo_final"])
-    db_cronometro = Cronometragem(**data)
-    db.add(db_cronometro)
+    db_cronometro = _criar_cronometro(db, cronometro.model_dump())
     db.commit()
-    db.refresh(db_cronometro)
+    return db_cronometro
+
+def _criar_cronometro(db: Session, data: dict):
+    db_cronometro = _insert_returning(db, Cronometragem, data)
+    alteracoes.registrar(db, "cronometro", Cronometragem.id_cronometro == db_cronometro.id_cronometro, alteracoes.CRIADA)
     return db_cronometro
 
 def get_cronometro(db: Session, cronometro_id: int):
-    return db.query(Cronometragem).filter(Cronometragem.id_cronometro == cronometro_id).first()
+    return repository.cronometros.get(db, cronometro_id)
+
+def get_cronometros(
+    db: Session,
+    after: Optional[int] = None,
+    limit: int = PAGE_SIZE,
+    id_inscricao: Optional[int] = None,
+    status: Optional[str] = None,
+    marca: bool = False,
+):
+    return _paginar(db.query(*serialize.colunas(Cronometragem, CronometragemResponse)), Cronometragem.id_cronometro, after, limit, {
+        Cronometragem.id_inscricao: id_inscricao,
+        Cronometragem.status: status,
+    }, marca)
+
+def update_cronometro(db: Session, cronometro_id: int, cronometro_update: CronometragemUpdate, versao: Optional[int] = None):
+    db_cronometro = _atualizar_cronometro(db, cronometro_id, cronometro_update.model_dump(exclude_unset=True), versao)
+    db.commit()
+    if db_cronometro is None:
+        return None
+    _publicar_cronometro(db, db_cronometro)
+    return db_cronometro
 
-def get_cronometros(db: Session):
-    return db.query(Cronometragem).all()
+def _atualizar_cronometro(db: Session, cronometro_id: int, update_data: dict, versao: Optional[int] = None):
+    _registrar_mudanca_de_pai(db, "cronometro", Cronometragem.id_cronometro == cronometro_id, "id_inscricao", update_data)
+    db_cronometro = repository.cronometros.update(db, cronometro_id, update_data, versao)
+    if db_cronometro is not None and update_data:
+        alteracoes.registrar(db, "cronometro", Cronometragem.id_cronometro == cronometro_id, alteracoes.ATUALIZADA)
+    return db_cronometro
+
+def delete_cronometro(db: Session, cronometro_id: int):
+    removido = _remover_cronometro(db, cronometro_id)
+    db.commit()
+    return removido
 
-def update_cronometro(db: Session, cronometro_id: int, cronometro_update: CronometragemUpdate):
+def _remover_cronometro(db: Session, cronometro_id: int):
+    alteracoes.registrar(db, "cronometro", Cronometragem.id_cronometro == cronometro_id, alteracoes.REMOVIDA)
+    return repository.cronometros.delete(db, cronometro_id)
+
+# Cronometragem no servidor: start/pause/stop com relógio monotônico
+
+def _agora(db: Session) -> datetime:
+    # O SQLite grava o datetime sem o fuso e o devolve ingênuo (UTC): a resposta do start/stop sai igual à releitura
+    agora = datetime.now(timezone.utc)
+    return agora.replace(tzinfo=None) if db.get_bind().dialect.name == "sqlite" else agora
+
+def start_cronometro(db: Session, cronometro_id: int):
     db_cronometro = get_cronometro(db, cronometro_id)
-    update_data = cronometro_update.model_dump(exclude_unset=True)
-    if update_data.get("tempo_inicial"):
-        update_data["tempo_inicial"] = datetime.fromisoformat(update_data["tempo_inicial"])
-    if update_data.get("tempo_final"):
-        update_data["tempo_final"] = datetime.fromisoformat(update_data["tempo_final"])
-    for key, value in update_data.items():
-        setattr(db_cronometro, key, value)
+    if db_cronometro is None:
+        return None
+    if db_cronometro.status == timing.RODANDO:
+        return db_cronometro
+    if db_cronometro.status == timing.FINALIZADO:
+        raise timing.EstadoInvalido("Cronômetro já finalizado")
+    if db_cronometro.status != timing.PAUSADO:
+        db_cronometro.tempo_inicial = _agora(db)
+        db_cronometro.tempo_final = None
+        db_cronometro.tempo_oficial = None
+    db_cronometro.status = timing.RODANDO
+    timing.iniciar(cronometro_id)
+    alteracoes.registrar(db, "cronometro", Cronometragem.id_cronometro == cronometro_id, alteracoes.ATUALIZADA)
     db.commit()
-    db.refresh(db_cronometro)
+    _publicar_cronometro(db, db_cronometro)
     return db_cronometro
 
-def delete_cronometro(db: Session, cronometro_id: int):
+def pause_cronometro(db: Session, cronometro_id: int):
     db_cronometro = get_cronometro(db, cronometro_id)
-    db.delete(db_cronometro)
-    db.commit()
\ No newline at end of file
+    if db_cronometro is None:
+        return None
+    if db_cronometro.status != timing.RODANDO:
+        raise timing.EstadoInvalido("Cronômetro não está rodando")
+    db_cronometro.tempo_oficial = timing.acumular(db_cronometro)
+    db_cronometro.status = timing.PAUSADO
+    alteracoes.registrar(db, "cronometro", Cronometragem.id_cronometro == cronometro_id, alteracoes.ATUALIZADA)
+    db.commit()
+    _publicar_cronometro(db, db_cronometro)
+    return db_cronometro
+
+def stop_cronometro(db: Session, cronometro_id: int):
+    db_cronometro = get_cronometro(db, cronometro_id)
+    if db_cronometro is None:
+        return None
+    if db_cronometro.status not in (timing.RODANDO, timing.PAUSADO):
+        raise timing.EstadoInvalido("Cronômetro não foi iniciado")
+    if db_cronometro.status == timing.RODANDO:
+        db_cronometro.tempo_oficial = timing.acumular(db_cronometro)
+    db_cronometro.tempo_final = _agora(db)
+    db_cronometro.status = timing.FINALIZADO
+
+    # Tempo oficial vai para a inscrição na mesma transação
+    db_inscricao = db_cronometro.inscricao
+    posicoes = []
+    if db_inscricao is not None:
+        posicoes = _aplicar_inscricao(db, db_inscricao, {"tempo_prova": db_cronometro.tempo_oficial})
+        alteracoes.registrar(db, "inscricao", Inscricao.id_inscricao == db_inscricao.id_inscricao, alteracoes.ATUALIZADA)
+    alteracoes.registrar(db, "cronometro", Cronometragem.id_cronometro == cronometro_id, alteracoes.ATUALIZADA)
+    _commit_classificacao(db, db_inscricao.id_prova if db_inscricao is not None else None)
+    _publicar_cronometro(db, db_cronometro)
+    if db_inscricao is not None:
+        _publicar_inscricao(db_inscricao, posicoes)
+    return db_cronometro
+
+def _publicar_cronometro(db: Session, db_cronometro: Cronometragem):
+    _publicar(_prova_para_publicar(db, db_cronometro.id_inscricao), "cronometragem", db_cronometro, CronometragemResponse)
+
+
+
+# Sincronização em lote: operações enfileiradas offline pelos computadores de pista
+
+SYNC_ENTIDADES = {
+    "cronometro": (Cronometragem, CronometragemCreate, CronometragemUpdate, CronometragemResponse, "Cronômetro {} não encontrado"),
+    "inscricao": (Inscricao, InscricaoCreate, InscricaoUpdate, InscricaoResponse, "Inscrição {} não encontrada"),
+    "resultado": (Resultado, ResultadoCreate, ResultadoUpdate, ResultadoResponse, "Resultado {} não encontrado"),
+}
+
+class _OperacaoInvalida(Exception):
+    pass
+
+def _sync_aplicar(db: Session, operacao, publicar: list):
+    # Aplica uma operação sem commit; devolve a chave do registro e as provas cuja classificação mudou
+    model, schema_create, schema_update, _, nao_existe = SYNC_ENTIDADES[operacao.entidade]
+    try:
+        if operacao.acao == "create":
+            data = schema_create.model_validate(operacao.dados).model_dump()
+        elif operacao.acao == "update":
+            data = schema_update.model_validate(operacao.dados).model_dump(exclude_unset=True)
+    except ValidationError as exc:
+        raise _OperacaoInvalida(_mensagem_validacao(exc))
+    if operacao.acao != "create" and operacao.id is None:
+        raise _OperacaoInvalida("id obrigatório em update/delete")
+    nao_encontrado = _OperacaoInvalida(nao_existe.format(operacao.id))
+
+    if operacao.entidade == "inscricao":
+        if operacao.acao == "create":
+            db_inscricao = _criar_inscricao(db, data)
+            return db_inscricao.id_inscricao, {db_inscricao.id_prova}
+        if operacao.acao == "update":
+            atualizada = _atualizar_inscricao(db, operacao.id, data, operacao.versao)
+            if atualizada is None:
+                raise nao_encontrado
+            db_inscricao, posicoes, id_prova_anterior = atualizada
+            publicar.append(lambda: _publicar_inscricao(db_inscricao, posicoes))
+            return operacao.id, {db_inscricao.id_prova, id_prova_anterior}
+        removida = _remover_inscricao(db, operacao.id)
+        if removida is None:
+            raise nao_encontrado
+        return operacao.id, {removida.id_prova}
+
+    if operacao.entidade == "resultado":
+        if operacao.acao == "create":
+            return _criar_resultado(db, data).id_resultado, set()
+        if operacao.acao == "update":
+            db_resultado = _atualizar_resultado(db, operacao.id, data, operacao.versao)
+            if db_resultado is None:
+                raise nao_encontrado
+            publicar.append(lambda: _publicar_resultado(db, db_resultado))
+            return operacao.id, set()
+        if not _remover_resultado(db, operacao.id):
+            raise nao_encontrado
+        return operacao.id, set()
+
+    if operacao.acao == "create":
+        return _criar_cronometro(db, data).id_cronometro, set()
+    if operacao.acao == "update":
+        db_cronometro = _atualizar_cronometro(db, operacao.id, data, operacao.versao)
+        if db_cronometro is None:
+            raise nao_encontrado
+        publicar.append(lambda: _publicar_cronometro(db, db_cronometro))
+        return operacao.id, set()
+    if not _remover_cronometro(db, operacao.id):
+        raise nao_encontrado
+    return operacao.id, set()
+
+def sync_batch(db: Session, lote: SyncBatchRequest):
+    """Apply an ordered batch of client-stamped operations in one transaction, skipping op ids already applied."""
+    ids = [operacao.id_operacao for operacao in lote.operacoes]
+    aplicadas = {
+        registro.id_operacao: registro
+        for registro in db.query(SyncOperacao).filter(
+            SyncOperacao.dispositivo == lote.dispositivo, SyncOperacao.id_operacao.in_(ids),
+        )
+    }
+    respostas, tocados, provas, publicar = [], [], set(), []
+    for operacao in lote.operacoes:
+        anterior = aplicadas.get(operacao.id_operacao)
+        if anterior is not None:
+            respostas.append({"id_operacao": operacao.id_operacao, "status": "duplicada", "id": anterior.chave})
+            tocados.append((anterior.entidade, anterior.chave))
+            continue
+        # Cada operação num SAVEPOINT: a que falha é desfeita sozinha e volta como erro, sem derrubar o lote
+        savepoint = db.begin_nested()
+        afetadas = set()
+        try:
+            chave, afetadas = _sync_aplicar(db, operacao, publicar)
+            registro = SyncOperacao(
+                dispositivo=lote.dispositivo, id_operacao=operacao.id_operacao, entidade=operacao.entidade,
+                acao=operacao.acao, chave=chave, carimbo=operacao.carimbo,
+            )
+            db.add(registro)
+            savepoint.commit()
+        except (_OperacaoInvalida, repository.VersaoDivergente, SQLAlchemyError) as exc:
+            savepoint.rollback()
+            # A classificação em memória pode ter recebido o percurso desfeito
+            for prova_id in afetadas:
+                ranking.descartar(prova_id)
+            erro = str(getattr(exc, "orig", None) or exc)
+            respostas.append({"id_operacao": operacao.id_operacao, "status": "erro", "id": operacao.id, "erro": erro})
+            tocados.append(None)
+            continue
+        aplicadas[operacao.id_operacao] = registro
+        provas |= afetadas
+        respostas.append({"id_operacao": operacao.id_operacao, "status": "aplicada", "id": chave})
+        tocados.append((operacao.entidade, chave))
+    _commit_classificacao(db, *(prova_id for prova_id in provas if prova_id is not None))
+
+    # Estado final de cada registro tocado (inclusive nas duplicadas), relido do banco uma vez por chave
+    estados = {}
+    for resposta, tocado in zip(respostas, tocados):
+        if tocado is None or tocado[1] is None:
+            continue
+        if tocado not in estados:
+            model, _, _, schema_response, _ = SYNC_ENTIDADES[tocado[0]]
+            obj = db.get(model, tocado[1], populate_existing=True)
+            estados[tocado] = _estado(schema_response, obj) if obj is not None else None
+        resposta["dados"] = estados[tocado]
+    for publicacao in publicar:
+        publicacao()
+    return {"resultados": respostas}
+
+# Feed de alterações por competição: o que mudou desde o cursor do cliente
+
+FEED_ENTIDADES = {
+    "prova": (Prova, ProvaResponse),
+    "inscricao": (Inscricao, InscricaoResponse),
+    "cronometro": (Cronometragem, CronometragemResponse),
+    "resultado": (Resultado, ResultadoResponse),
+    "avaliacao": (Avaliacao, AvaliacaoResponse),
+}
+
+def get_alteracoes(db: Session, competition_id: int, since: int = 0, limit: int = PAGE_SIZE):
+    if get_competition(db, competition_id) is None:
+        return None
+    linhas = alteracoes.listar(db, competition_id, since, limit + 1)
+    mais = len(linhas) > limit
+    linhas = linhas[:limit]
+    # Uma entrada por registro, na posição da sua última alteração da página
+    ultimas = {}
+    for linha in linhas:
+        ultimas.pop((linha.entidade, linha.chave), None)
+        ultimas[(linha.entidade, linha.chave)] = linha
+    # Estado atual: uma leitura por entidade para todas as chaves da página
+    estados = {}
+    for entidade, (model, schema) in FEED_ENTIDADES.items():
+        chaves = [chave for (nome, chave), linha in ultimas.items() if nome == entidade and linha.acao != alteracoes.REMOVIDA]
+        if chaves:
+            pk = model.__mapper__.primary_key[0]
+            for obj in alteracoes.estados(db, entidade, chaves, competition_id):
+                estado = _estado(schema, obj)
+                if estado is not None:
+                    estados[(entidade, getattr(obj, pk.key))] = estado
+    saida = []
+    for chave, linha in ultimas.items():
+        if linha.acao != alteracoes.REMOVIDA and chave not in estados:
+            # Removido ou fora da competição depois desta página (a remoção vem numa página seguinte), ou linha
+            # inválida para o schema: fica fora da página, mas o cursor avança
+            continue
+        saida.append({
+            "seq": linha.id_alteracao, "entidade": linha.entidade, "id": linha.chave,
+            "acao": linha.acao, "dados": estados.get(chave),
+        })
+    return {"alteracoes": saida, "cursor": linhas[-1].id_alteracao if linhas else since, "mais": mais}
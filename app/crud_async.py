@@ -0,0 +1,130 @@
+# app/crud_async.py
+
+import functools
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
+from . import crud
+from .database import SQLITE_TUNED
+from .writer import writer_queue
+
+
+def _async(func):
+    # Com AsyncSession a função de crud roda via run_sync (I/O no driver assíncrono, sem thread);
+    # com Session síncrona cai no threadpool, como as rotas `def` faziam antes
+    @functools.wraps(func)
+    async def wrapper(db, *args, **kwargs):
+        if isinstance(db, AsyncSession):
+            return await db.run_sync(func, *args, **kwargs)
+        return await run_in_threadpool(func, db, *args, **kwargs)
+    return wrapper
+
+
+def _async_write(func):
+    # No perfil SQLite a operação inteira (leituras, DML e commit) roda na fila única de escrita:
+    # nunca há dois escritores disputando o lock do banco, e os leitores seguem livres no WAL
+    if not SQLITE_TUNED:
+        return _async(func)
+
+    @functools.wraps(func)
+    async def wrapper(db, *args, **kwargs):
+        if isinstance(db, AsyncSession):
+            return await db.run_sync(func, *args, **kwargs)
+        return await run_in_threadpool(writer_queue.run, func, db, *args, **kwargs)
+    return wrapper
+
+get_validadores = _async(crud.get_validadores)
+
+# User
+get_user = _async(crud.get_user)
+get_user_by_email = _async(crud.get_user_by_email)
+create_user = _async_write(crud.create_user)
+update_user = _async_write(crud.update_user)
+delete_user = _async_write(crud.delete_user)
+
+# Competitions
+get_competition = _async(crud.get_competition)
+get_competition_cached = _async(crud.get_competition_cached)
+get_competition_stats = _async(crud.get_competition_stats)
+planejar_competition = _async_write(crud.planejar_competition)
+create_competition = _async_write(crud.create_competition)
+delete_competition = _async_write(crud.delete_competition)
+update_competition = _async_write(crud.update_competition)
+
+# Prova (Competition Event)
+create_prova = _async_write(crud.create_prova)
+get_prova = _async(crud.get_prova)
+get_prova_cached = _async(crud.get_prova_cached)
+get_prova_expandida = _async(crud.get_prova_expandida)
+get_provas = _async(crud.get_provas)
+update_prova = _async_write(crud.update_prova)
+get_prova_stats = _async(crud.get_prova_stats)
+get_classificacao = _async_write(crud.get_classificacao)
+rescore_prova = _async_write(crud.rescore_prova)
+delete_prova = _async_write(crud.delete_prova)
+
+# Ranking da temporada
+get_rankings = _async(crud.get_rankings)
+
+# Inscricao (Registration)
+create_inscricao = _async_write(crud.create_inscricao)
+create_inscricoes_bulk = _async_write(crud.create_inscricoes_bulk)
+get_inscricao = _async(crud.get_inscricao)
+get_inscricao_expandida = _async(crud.get_inscricao_expandida)
+get_inscricoes = _async(crud.get_inscricoes)
+update_inscricao = _async_write(crud.update_inscricao)
+delete_inscricao = _async_write(crud.delete_inscricao)
+
+# Competidor
+create_competidor = _async_write(crud.create_competidor)
+create_competidores_bulk = _async_write(crud.create_competidores_bulk)
+get_competidor = _async(crud.get_competidor)
+get_competidores = _async(crud.get_competidores)
+update_competidor = _async_write(crud.update_competidor)
+delete_competidor = _async_write(crud.delete_competidor)
+
+# Cao
+create_cao = _async_write(crud.create_cao)
+create_caes_bulk = _async_write(crud.create_caes_bulk)
+get_cao = _async(crud.get_cao)
+get_cao_cached = _async(crud.get_cao_cached)
+get_caes = _async(crud.get_caes)
+update_cao = _async_write(crud.update_cao)
+delete_cao = _async_write(crud.delete_cao)
+
+# Juiz
+create_juiz = _async_write(crud.create_juiz)
+get_juiz = _async(crud.get_juiz)
+get_juiz_cached = _async(crud.get_juiz_cached)
+get_juizes = _async(crud.get_juizes)
+update_juiz = _async_write(crud.update_juiz)
+delete_juiz = _async_write(crud.delete_juiz)
+
+# Resultado
+create_resultado = _async_write(crud.create_resultado)
+get_resultado = _async(crud.get_resultado)
+get_resultados = _async(crud.get_resultados)
+update_resultado = _async_write(crud.update_resultado)
+delete_resultado = _async_write(crud.delete_resultado)
+
+# Avaliacao
+create_avaliacao = _async_write(crud.create_avaliacao)
+get_avaliacao = _async(crud.get_avaliacao)
+get_avaliacoes = _async(crud.get_avaliacoes)
+update_avaliacao = _async_write(crud.update_avaliacao)
+delete_avaliacao = _async_write(crud.delete_avaliacao)
+
+# Sincronização em lote
+sync_batch = _async_write(crud.sync_batch)
+
+# Feed de alterações
+get_alteracoes = _async(crud.get_alteracoes)
+
+# Cronometragem
+create_cronometro = _async_write(crud.create_cronometro)
+get_cronometro = _async(crud.get_cronometro)
+get_cronometros = _async(crud.get_cronometros)
+update_cronometro = _async_write(crud.update_cronometro)
+delete_cronometro = _async_write(crud.delete_cronometro)
+start_cronometro = _async_write(crud.start_cronometro)
+pause_cronometro = _async_write(crud.pause_cronometro)
+stop_cronometro = _async_write(crud.stop_cronometro)
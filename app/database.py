@@ -1,13 +1,117 @@
-from sqlalchemy import create_engine
+from contextlib import contextmanager
+from sqlalchemy import create_engine, event, func, inspect, select
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
-DATABASE_URL = "sqlite:///./agility.db"
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+from sqlalchemy.schema import CreateColumn, CreateIndex
+from . import config
+DATABASE_URL = config.DATABASE_URL
+
+def engine_options(url: str) -> dict:
+    url = make_url(url)
+    options = {}
+    if url.get_backend_name() == "sqlite":
+        if url.get_driver_name() == "pysqlite":
+            options["connect_args"] = {"check_same_thread": False}
+        if url.database in (None, "", ":memory:"):
+            # SQLite em memória usa um pool próprio, sem tamanho configurável
+            return options
+    options.update(
+        pool_size=config.DB_POOL_SIZE,
+        max_overflow=config.DB_MAX_OVERFLOW,
+        pool_timeout=config.DB_POOL_TIMEOUT,
+        pool_recycle=config.DB_POOL_RECYCLE,
+        pool_pre_ping=config.DB_POOL_PRE_PING,
+    )
+    return options
+
+def is_sqlite(url: str) -> bool:
+    return make_url(url).get_backend_name() == "sqlite"
+
+def apply_sqlite_tuning(sync_engine):
+    @event.listens_for(sync_engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute(f"PRAGMA busy_timeout={config.SQLITE_BUSY_TIMEOUT_MS}")
+        cursor.execute(f"PRAGMA cache_size=-{config.SQLITE_CACHE_SIZE_KB}")
+        cursor.execute(f"PRAGMA mmap_size={config.SQLITE_MMAP_SIZE}")
+        cursor.close()
+
+# Advisory lock do PostgreSQL (chave única, fora dos espaços de dois argumentos) da preparação do schema
+TRAVA_SCHEMA = 2000
+
+@contextmanager
+def preparar_schema(sync_engine):
+    # Cada worker do uvicorn prepara o schema ao importar app.main: no PostgreSQL um de cada vez (create_all,
+    # colunas, índices e preenchimentos), e os seguintes já encontram tudo pronto em vez de repetir o DDL
+    if sync_engine.dialect.name != "postgresql":
+        yield
+        return
+    with sync_engine.connect() as conn:
+        conn.execute(select(func.pg_advisory_lock(TRAVA_SCHEMA)))
+        try:
+            yield
+        finally:
+            conn.execute(select(func.pg_advisory_unlock(TRAVA_SCHEMA)))
+
+def adicionar_colunas(sync_engine, metadata):
+    # create_all não altera tabelas existentes: colunas novas do modelo (ex.: versao) entram via ALTER TABLE
+    inspector = inspect(sync_engine)
+    with sync_engine.begin() as conn:
+        for tabela in metadata.sorted_tables:
+            if not inspector.has_table(tabela.name):
+                continue
+            existentes = {coluna["name"] for coluna in inspector.get_columns(tabela.name)}
+            for coluna in tabela.columns:
+                if coluna.name not in existentes:
+                    ddl = CreateColumn(coluna).compile(dialect=sync_engine.dialect)
+                    nome = sync_engine.dialect.identifier_preparer.format_table(tabela)
+                    # IF NOT EXISTS (PostgreSQL): um worker fora de preparar_schema não falha com a coluna já criada
+                    se_nao_existe = "IF NOT EXISTS " if sync_engine.dialect.name == "postgresql" else ""
+                    conn.exec_driver_sql(f"ALTER TABLE {nome} ADD COLUMN {se_nao_existe}{ddl}")
+
+def criar_indices(sync_engine, metadata):
+    # create_all também não cria índices novos (__table_args__) em tabelas que já existiam
+    inspector = inspect(sync_engine)
+    with sync_engine.begin() as conn:
+        for tabela in metadata.sorted_tables:
+            if not inspector.has_table(tabela.name):
+                continue
+            existentes = {indice["name"] for indice in inspector.get_indexes(tabela.name)}
+            for indice in tabela.indexes:
+                if indice.name not in existentes:
+                    conn.execute(CreateIndex(indice, if_not_exists=True))
+
+SQLITE_TUNED = config.SQLITE_TUNING and is_sqlite(DATABASE_URL)
+
+engine = create_engine(DATABASE_URL, **engine_options(DATABASE_URL))
+if SQLITE_TUNED:
+    apply_sqlite_tuning(engine)
+# expire_on_commit=False: o objeto devolvido pelo RETURNING continua válido após o commit, sem refresh
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
 Base = declarative_base()
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+# Modo assíncrono: só importa o driver (aiosqlite/asyncpg) quando habilitado
+async_engine = None
+AsyncSessionLocal = None
+if config.ASYNC_DB:
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+    async_engine = create_async_engine(config.ASYNC_DATABASE_URL, **engine_options(config.ASYNC_DATABASE_URL))
+    if config.SQLITE_TUNING and is_sqlite(config.ASYNC_DATABASE_URL):
+        # A fila de escrita atende threads; no modo assíncrono valem os pragmas (busy_timeout cobre a disputa)
+        apply_sqlite_tuning(async_engine.sync_engine)
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+get_session = get_async_db if config.ASYNC_DB else get_db
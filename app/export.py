@@ -0,0 +1,105 @@
+# app/export.py
+
+import csv
+import io
+import json
+from datetime import date, datetime
+from sqlalchemy import select
+from .database import SessionLocal
+from .models import Competicao, Cronometragem, Inscricao, Prova, Resultado
+
+# Linhas buscadas por ida ao cursor do banco; a memória fica limitada a esse lote
+BATCH_SIZE = 500
+
+CSV_COLUMNS = [
+    Prova.id_prova, Prova.categoria, Prova.classe, Prova.tsp, Prova.tmp,
+    Inscricao.id_inscricao, Inscricao.id_competidor, Inscricao.microchip_cao, Inscricao.colete_competidor,
+    Inscricao.hora_inicio, Inscricao.status, Inscricao.tempo_prova, Inscricao.faltas_prova,
+    Inscricao.recusas_prova, Inscricao.vel_media, Inscricao.pontuacao,
+    Cronometragem.id_cronometro, Cronometragem.tempo_inicial, Cronometragem.tempo_final,
+    Cronometragem.status.label("status_cronometro"), Cronometragem.tempo_oficial,
+    Resultado.id_resultado, Resultado.posicao, Resultado.total_pontos_t, Resultado.total_pontos_tp,
+]
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} não serializável")
+
+
+def _csv_value(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def _stream(db, stmt):
+    return db.execute(stmt.execution_options(yield_per=BATCH_SIZE))
+
+
+def _ndjson_queries(competition_id: int):
+    por_prova = Prova.id_competicao == competition_id
+    yield "competicao", select(*Competicao.__table__.c).where(Competicao.id_competicao == competition_id)
+    yield "prova", select(*Prova.__table__.c).where(por_prova).order_by(Prova.id_prova)
+    yield "inscricao", (
+        select(*Inscricao.__table__.c)
+        .join(Prova, Inscricao.id_prova == Prova.id_prova)
+        .where(por_prova)
+        .order_by(Inscricao.id_inscricao)
+    )
+    yield "cronometragem", (
+        select(*Cronometragem.__table__.c)
+        .join(Inscricao, Cronometragem.id_inscricao == Inscricao.id_inscricao)
+        .join(Prova, Inscricao.id_prova == Prova.id_prova)
+        .where(por_prova)
+        .order_by(Cronometragem.id_cronometro)
+    )
+    yield "resultado", (
+        select(*Resultado.__table__.c)
+        .join(Inscricao, Resultado.id_inscricao == Inscricao.id_inscricao)
+        .join(Prova, Inscricao.id_prova == Prova.id_prova)
+        .where(por_prova)
+        .order_by(Resultado.id_resultado)
+    )
+
+
+def competicao_ndjson(competition_id: int):
+    # Uma linha JSON por registro, com "tipo" indicando a tabela de origem
+    db = SessionLocal()
+    try:
+        for tipo, stmt in _ndjson_queries(competition_id):
+            for partition in _stream(db, stmt).mappings().partitions():
+                yield "".join(
+                    json.dumps({"tipo": tipo, **row}, default=_json_default, ensure_ascii=False) + "\n"
+                    for row in partition
+                ).encode()
+    finally:
+        db.close()
+
+
+def competicao_csv(competition_id: int):
+    # Uma linha por percurso: prova + inscrição + cronometragem + resultado
+    stmt = (
+        select(*CSV_COLUMNS)
+        .join(Inscricao, Inscricao.id_prova == Prova.id_prova)
+        .outerjoin(Cronometragem, Cronometragem.id_inscricao == Inscricao.id_inscricao)
+        .outerjoin(Resultado, Resultado.id_inscricao == Inscricao.id_inscricao)
+        .where(Prova.id_competicao == competition_id)
+        .order_by(Prova.id_prova, Inscricao.id_inscricao, Cronometragem.id_cronometro)
+    )
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    db = SessionLocal()
+    try:
+        result = _stream(db, stmt)
+        writer.writerow(result.keys())
+        for partition in result.partitions():
+            writer.writerows([_csv_value(value) for value in row] for row in partition)
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue().encode()
+    finally:
+        db.close()
@@ -1,244 +1,694 @@
-from fastapi import FastAPI, Depends, HTTPException
+import asyncio
+import hashlib
+import json
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Optional
+from fastapi import Body, FastAPI, Depends, Header, HTTPException, Query, Request, Response, WebSocket, WebSocketDisconnect
+from fastapi.responses import JSONResponse, StreamingResponse
 from sqlalchemy.orm import Session
-from . import crud, models, schemas
-from .database import engine, get_db
-
-models.Base.metadata.create_all(bind=engine)
+from sqlalchemy.orm.exc import StaleDataError
+from . import cache, config, crud, crud_async, export, metrics, models, pubsub, repository, schemas, serialize, stats, temporada, timing
+from .database import SessionLocal, adicionar_colunas, async_engine, criar_indices, engine, get_session, preparar_schema
+
+with preparar_schema(engine):
+    models.Base.metadata.create_all(bind=engine)
+    adicionar_colunas(engine, models.Base.metadata)
+    criar_indices(engine, models.Base.metadata)
+    with SessionLocal() as _db:
+        stats.preencher(_db)
+        temporada.preencher(_db)
 
 app = FastAPI()
 
+if config.METRICS_ENABLED:
+    app.add_middleware(metrics.MetricsMiddleware)
+    metrics.instrumentar(engine)
+    if async_engine is not None:
+        metrics.instrumentar(async_engine.sync_engine)
+
+PAGE_LIMIT = Query(crud.PAGE_SIZE, ge=1, le=1000)
+
+def versao_esperada(if_match: Optional[str] = Header(None)) -> Optional[int]:
+    # If-Match: "3" (o ETag devolvido pela API) -> 3; ausente ou * -> atualiza sem conferir a versão
+    if if_match is None or if_match.strip() == "*":
+        return None
+    valor = if_match.strip().removeprefix("W/").strip('"')
+    if not valor.isdigit():
+        raise HTTPException(status_code=400, detail="If-Match inválido: envie o ETag devolvido pela API")
+    return int(valor)
+
+IF_MATCH = Depends(versao_esperada)
+
+def etag(versao: int) -> str:
+    return f'"{versao}"'
+
+def com_etag(response: Response, obj):
+    response.headers["ETag"] = etag(obj.versao)
+    return obj
+
+def data_http(momento: datetime) -> str:
+    # Sem fuso (SQLite guarda CURRENT_TIMESTAMP): é UTC
+    if momento.tzinfo is None:
+        momento = momento.replace(tzinfo=timezone.utc)
+    return format_datetime(momento.astimezone(timezone.utc), usegmt=True)
+
+def validadores(obj) -> dict:
+    # ETag da versão; Last-Modified da última alteração quando o modelo tem carimbos de tempo
+    cabecalhos = {"ETag": etag(obj.versao)}
+    momento = getattr(obj, "atualizado_em", None) or getattr(obj, "criado_em", None)
+    if momento is not None:
+        cabecalhos["Last-Modified"] = data_http(momento)
+    return cabecalhos
+
+def validadores_da_lista(schema, linhas: int, soma_versoes: int, primeira, ultima, modificado) -> dict:
+    # Marca d'água da página: muda com inserção/remoção (linhas, chaves) e com qualquer gravação (versões)
+    marca = hashlib.blake2b(f"{linhas}:{soma_versoes}:{primeira}:{ultima}".encode(), digest_size=8).hexdigest()
+    cabecalhos = {"ETag": f'W/"{marca}"'}
+    if modificado is not None and "atualizado_em" in schema.model_fields:
+        cabecalhos["Last-Modified"] = data_http(modificado)
+    return cabecalhos
+
+def marca_das_linhas(schema, rows, cursor: str) -> tuple:
+    # A mesma marca de crud._marca_da_pagina, calculada sobre as linhas já lidas
+    modificado = None
+    if "atualizado_em" in schema.model_fields:
+        modificado = max((row.atualizado_em or row.criado_em for row in rows if row.atualizado_em or row.criado_em), default=None)
+    primeira, ultima = (getattr(rows[0], cursor), getattr(rows[-1], cursor)) if rows else (None, None)
+    return len(rows), sum(row.versao for row in rows), primeira, ultima, modificado
+
+def pedido_condicional(request: Request) -> bool:
+    return "if-none-match" in request.headers or "if-modified-since" in request.headers
+
+def nao_modificado(request: Request, cabecalhos: dict, por_data: bool = True) -> bool:
+    # If-None-Match tem precedência sobre If-Modified-Since; comparação fraca (W/"3" casa com "3")
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return "*" in tags or cabecalhos["ETag"].removeprefix("W/") in tags
+    if_modified_since = request.headers.get("if-modified-since")
+    if not por_data or if_modified_since is None or "Last-Modified" not in cabecalhos:
+        return False
+    try:
+        desde = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if desde.tzinfo is None:
+        desde = desde.replace(tzinfo=timezone.utc)
+    return parsedate_to_datetime(cabecalhos["Last-Modified"]) <= desde
+
+async def detalhe(request: Request, response: Response, db, ler, chave, detail: str, sondar=None):
+    # GET condicional: com If-None-Match/If-Modified-Since, `sondar` (um Repository) lê só versao e datas
+    # pela PK e o 304 sai sem carregar nem serializar o registro. Rotas com cache passam sondar=None:
+    # a leitura do cache já é a verificação barata
+    if sondar is not None and pedido_condicional(request):
+        cabecalhos = validadores(encontrado(await crud_async.get_validadores(db, sondar, chave), detail))
+        if nao_modificado(request, cabecalhos):
+            return Response(status_code=304, headers=cabecalhos)
+    obj = encontrado(await ler(db, chave), detail)
+    cabecalhos = validadores(obj)
+    if nao_modificado(request, cabecalhos):
+        return Response(status_code=304, headers=cabecalhos)
+    response.headers.update(cabecalhos)
+    return obj
+
+@app.exception_handler(repository.VersaoDivergente)
+async def versao_divergente_handler(request: Request, exc: repository.VersaoDivergente):
+    return JSONResponse({"detail": str(exc)}, status_code=412, headers={"ETag": etag(exc.atual)})
+
+@app.exception_handler(repository.EmUso)
+async def em_uso_handler(request: Request, exc: repository.EmUso):
+    return JSONResponse({"detail": str(exc)}, status_code=409)
+
+@app.exception_handler(StaleDataError)
+async def stale_data_handler(request: Request, exc: StaleDataError):
+    # Outra requisição gravou o registro entre a leitura e o flush desta (UPDATE ... WHERE versao = <lida>)
+    return JSONResponse({"detail": "Registro alterado por outra requisição; releia e tente de novo"}, status_code=412)
+
+def encontrado(valor, detail: str):
+    # crud devolve None (get/update) ou False (delete) quando a chave não existe
+    if valor is None or valor is False:
+        raise HTTPException(status_code=404, detail=detail)
+    return valor
+
+def expansoes(expand: Optional[str], permitidas: set) -> list[str]:
+    # ?expand=inscricoes.cao,inscricoes.competidor -> ["inscricoes.cao", "inscricoes.competidor"]
+    caminhos = [caminho.strip() for caminho in (expand or "").split(",") if caminho.strip()]
+    invalidos = [caminho for caminho in caminhos if caminho not in permitidas]
+    if invalidos:
+        raise HTTPException(status_code=422, detail=f"expand inválido: {', '.join(invalidos)}")
+    return caminhos
+
+async def paginated(request: Request, listar, db, model, schema, cursor: str, limit: int, **filtros) -> Response:
+    # GET condicional: a marca d'água da página é conferida antes de ler as colunas; 304 sem serializar nada.
+    # Remoções não mudam a data, então nas listas só If-None-Match vale
+    if pedido_condicional(request):
+        cabecalhos = validadores_da_lista(schema, *await listar(db, limit=limit, marca=True, **filtros))
+        if nao_modificado(request, cabecalhos, por_data=False):
+            return Response(status_code=304, headers=cabecalhos)
+    rows = await listar(db, limit=limit, **filtros)
+    # Linhas (tuplas) codificadas direto em JSON, sem validar cada uma contra o response_model
+    response = Response(
+        serialize.linhas_json(model, schema, rows), media_type="application/json",
+        headers=validadores_da_lista(schema, *marca_das_linhas(schema, rows, cursor)),
+    )
+    # Página cheia: o cliente continua a partir de ?after=<X-Next-Cursor>
+    if len(rows) == limit:
+        response.headers["X-Next-Cursor"] = str(getattr(rows[-1], cursor))
+    return response
+
 #  Usuários
 
 @app.post("/users/", response_model=schemas.UserResponse)
-def create_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
-    db_user = crud.get_user_by_email(db, email=user.email)
+async def create_user(user: schemas.UserCreate, db: Session = Depends(get_session)):
+    db_user = await crud_async.get_user_by_email(db, email=user.email)
     if db_user:
         raise HTTPException(status_code=400, detail="Email já cadastrado")
-    return crud.create_user(db=db, user=user)
+    return await crud_async.create_user(db=db, user=user)
 
 @app.get("/users/{user_id}", response_model=schemas.UserResponse)
-def read_user(user_id: int, db: Session = Depends(get_db)):
-    db_user = crud.get_user(db, user_id=user_id)
+async def read_user(user_id: int, db: Session = Depends(get_session)):
+    db_user = await crud_async.get_user(db, user_id=user_id)
     if db_user is None:
         raise HTTPException(status_code=404, detail="Usuário não encontrado")
     return db_user
 
 @app.delete("/users/{user_id}")
-def delete_user(user_id: int, db: Session = Depends(get_db)):
-    db_user = crud.get_user(db, user_id=user_id)
-    if db_user is None:
-        raise HTTPException(status_code=404, detail="Usuário não encontrado")
-    crud.delete_user(db=db, user_id=user_id)
+async def delete_user(user_id: int, db: Session = Depends(get_session)):
+    encontrado(await crud_async.delete_user(db=db, user_id=user_id), "Usuário não encontrado")
     return {"message": "Usuário deletado com sucesso"}
 
 @app.put("/users/{user_id}", response_model=schemas.UserResponse)
-def update_user(user_id: int, user: schemas.UserCreate, db: Session = Depends(get_db)):
-    db_user = crud.get_user(db, user_id=user_id)
-    if db_user is None:
-        raise HTTPException(status_code=404, detail="Usuário não encontrado")
-    return crud.update_user(db=db, user_id=user_id, user=user)
+async def update_user(user_id: int, user: schemas.UserCreate, db: Session = Depends(get_session)):
+    return encontrado(await crud_async.update_user(db=db, user_id=user_id, user=user), "Usuário não encontrado")
 
 # Competições
 
 @app.post("/competicoes/", response_model=schemas.CompeticaoResponse)
-def create_competition(competition: schemas.CompeticaoCreate, db: Session = Depends(get_db)):
-    return crud.create_competition(db=db, competition=competition)
+async def create_competition(competition: schemas.CompeticaoCreate, db: Session = Depends(get_session)):
+    return await crud_async.create_competition(db=db, competition=competition)
 
 @app.get("/competicoes/{competition_id}", response_model=schemas.CompeticaoResponse)
-def read_competition(competition_id: int, db: Session = Depends(get_db)):
-    db_competition = crud.get_competition(db, competition_id=competition_id)
-    if db_competition is None:
-        raise HTTPException(status_code=404, detail="Competição não encontrada")
-    return db_competition
+async def read_competition(competition_id: int, request: Request, response: Response, db: Session = Depends(get_session)):
+    return await detalhe(request, response, db, crud_async.get_competition_cached, competition_id, "Competição não encontrada")
 
 @app.delete("/competicoes/{competition_id}")
-def delete_competition(competition_id: int, db: Session = Depends(get_db)): 
-    db_competition = crud.get_competition(db, competition_id=competition_id)
-    if db_competition is None:
-        raise HTTPException(status_code=404, detail="Competição não encontrada")
-    return crud.delete_competition(db=db, competition_id=competition_id)
+async def delete_competition(competition_id: int, db: Session = Depends(get_session)): 
+    encontrado(await crud_async.delete_competition(db=db, competition_id=competition_id), "Competição não encontrada")
+    return {"message": "Competition deleted successfully"}
 
 @app.put("/competicoes/{competition_id}", response_model=schemas.CompeticaoResponse)
-def update_competition(competition_id: int, competition: schemas.CompeticaoUpdate, db: Session = Depends(get_db)):
-    db_competition = crud.get_competition(db, competition_id=competition_id)
-    if db_competition is None:
+async def update_competition(
+    competition_id: int,
+    competition: schemas.CompeticaoUpdate,
+    response: Response,
+    versao: Optional[int] = IF_MATCH,
+    db: Session = Depends(get_session),
+):
+    db_competition = await crud_async.update_competition(db=db, competition_id=competition_id, competition=competition, versao=versao)
+    return com_etag(response, encontrado(db_competition, "Competição não encontrada"))
+
+@app.get("/competicoes/{competition_id}/stats", response_model=schemas.StatsResponse)
+async def competition_stats(competition_id: int, db: Session = Depends(get_session)):
+    return encontrado(await crud_async.get_competition_stats(db, competition_id), "Competição não encontrada")
+
+@app.post("/competicoes/{competition_id}/cronograma", response_model=schemas.CronogramaResponse)
+async def planejar_competition(
+    competition_id: int,
+    parametros: schemas.CronogramaRequest = Body(default_factory=schemas.CronogramaRequest),
+    db: Session = Depends(get_session),
+):
+    cronograma = await crud_async.planejar_competition(db, competition_id, parametros)
+    return encontrado(cronograma, "Competição não encontrada")
+
+# Feed de alterações: o cliente guarda o `cursor` e pede só o que mudou desde ele
+@app.get("/competicoes/{competition_id}/changes", response_model=schemas.AlteracoesResponse)
+async def competition_changes(
+    competition_id: int,
+    since: int = Query(0, ge=0),
+    limit: int = PAGE_LIMIT,
+    db: Session = Depends(get_session),
+):
+    return encontrado(await crud_async.get_alteracoes(db, competition_id, since, limit), "Competição não encontrada")
+
+@app.get("/competicoes/{competition_id}/export")
+async def export_competition(
+    competition_id: int,
+    formato: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    db: Session = Depends(get_session),
+):
+    if await crud_async.get_competition(db, competition_id=competition_id) is None:
         raise HTTPException(status_code=404, detail="Competição não encontrada")
-    return crud.update_competition(db=db, competition_id=competition_id, competition=competition)
+    if formato == "csv":
+        return StreamingResponse(
+            export.competicao_csv(competition_id),
+            media_type="text/csv",
+            headers={"Content-Disposition": f'attachment; filename="competicao_{competition_id}.csv"'},
+        )
+    return StreamingResponse(export.competicao_ndjson(competition_id), media_type="application/x-ndjson")
 
 #  Provas
 
 @app.post("/provas/", response_model=schemas.ProvaResponse)
-def create_prova_endpoint(prova: schemas.ProvaCreate, db: Session = Depends(get_db)):
-    return crud.create_prova(db, prova)
-
-@app.get("/provas/{prova_id}", response_model=schemas.ProvaResponse)
-def get_prova_endpoint(prova_id: int, db: Session = Depends(get_db)):
-    return crud.get_prova(db, prova_id)
+async def create_prova_endpoint(prova: schemas.ProvaCreate, db: Session = Depends(get_session)):
+    return await crud_async.create_prova(db, prova)
+
+@app.get("/provas/{prova_id}", response_model=schemas.ProvaDetalhada, response_model_exclude_unset=True)
+async def get_prova_endpoint(
+    prova_id: int,
+    request: Request,
+    response: Response,
+    expand: Optional[str] = None,
+    db: Session = Depends(get_session),
+):
+    caminhos = expansoes(expand, crud.EXPAND_PROVA)
+    if caminhos:
+        # A versão da prova não cobre as linhas expandidas: sem ETag
+        return encontrado(await crud_async.get_prova_expandida(db, prova_id, caminhos), "Prova não encontrada")
+    return await detalhe(request, response, db, crud_async.get_prova_cached, prova_id, "Prova não encontrada")
 
 @app.get("/provas/", response_model=list[schemas.ProvaResponse])
-def get_provas_endpoint(db: Session = Depends(get_db)):
-    return crud.get_provas(db)
+async def get_provas_endpoint(
+    request: Request,
+    after: Optional[int] = None,
+    limit: int = PAGE_LIMIT,
+    id_competicao: Optional[int] = None,
+    db: Session = Depends(get_session),
+):
+    return await paginated(
+        request, crud_async.get_provas, db, models.Prova, schemas.ProvaResponse, "id_prova", limit,
+        after=after, id_competicao=id_competicao,
+    )
+
+@app.get("/provas/{prova_id}/stats", response_model=schemas.StatsResponse)
+async def get_prova_stats_endpoint(prova_id: int, db: Session = Depends(get_session)):
+    return encontrado(await crud_async.get_prova_stats(db, prova_id), "Prova não encontrada")
+
+@app.get("/provas/{prova_id}/classificacao", response_model=list[schemas.ClassificacaoResponse])
+async def get_classificacao_endpoint(prova_id: int, db: Session = Depends(get_session)):
+    classificacao = await crud_async.get_classificacao(db, prova_id)
+    if classificacao is None:
+        raise HTTPException(status_code=404, detail="Prova não encontrada")
+    return classificacao
+
+@app.post("/provas/{prova_id}/rescore", response_model=schemas.RescoreResponse)
+async def rescore_prova_endpoint(prova_id: int, db: Session = Depends(get_session)):
+    resultado = await crud_async.rescore_prova(db, prova_id)
+    if resultado is None:
+        raise HTTPException(status_code=404, detail="Prova não encontrada")
+    return resultado
 
 @app.put("/provas/{prova_id}", response_model=schemas.ProvaResponse)
-def update_prova_endpoint(prova_id: int, prova_update: schemas.ProvaUpdate, db: Session = Depends(get_db)):
-    return crud.update_prova(db, prova_id, prova_update)
+async def update_prova_endpoint(
+    prova_id: int,
+    prova_update: schemas.ProvaUpdate,
+    response: Response,
+    versao: Optional[int] = IF_MATCH,
+    db: Session = Depends(get_session),
+):
+    return com_etag(response, encontrado(await crud_async.update_prova(db, prova_id, prova_update, versao), "Prova não encontrada"))
 
 @app.delete("/provas/{prova_id}")
-def delete_prova_endpoint(prova_id: int, db: Session = Depends(get_db)):
-    crud.delete_prova(db, prova_id)
+async def delete_prova_endpoint(prova_id: int, db: Session = Depends(get_session)):
+    encontrado(await crud_async.delete_prova(db, prova_id), "Prova não encontrada")
     return {"ok": True}
 
+# Ranking da temporada: pontos dos resultados somados por cão ou competidor em todas as competições do ano
+
+@app.get("/rankings", response_model=list[schemas.RankingTemporadaResponse], response_model_exclude_none=True)
+async def get_rankings_endpoint(
+    season: int,
+    categoria: Optional[str] = None,
+    por: str = Query("cao", pattern="^(cao|competidor)$"),
+    limit: int = PAGE_LIMIT,
+    db: Session = Depends(get_session),
+):
+    return await crud_async.get_rankings(db, season, categoria=categoria, por=por, limit=limit)
+
+@app.get("/cache/stats")
+async def cache_stats():
+    return cache.stats()
+
+@app.get("/metrics")
+async def metrics_endpoint():
+    # Formato texto do Prometheus: latência por rota, statements SQL e tempo no banco
+    return Response(metrics.registro.exportar(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+# Resultados ao vivo: cada commit de inscrição/cronometragem/resultado vira um push por assinante
+
+SSE_HEARTBEAT = 15
+
+@app.websocket("/ws/provas/{id_prova}")
+async def provas_ws(websocket: WebSocket, id_prova: int):
+    await websocket.accept()
+    topico = pubsub.topico_prova(id_prova)
+    fila = pubsub.hub.subscribe(topico)
+
+    async def enviar():
+        while True:
+            await websocket.send_json(await fila.get())
+
+    envio = asyncio.create_task(enviar())
+    try:
+        # Lê até o cliente desconectar; mensagens recebidas são ignoradas (keep-alive)
+        while True:
+            await websocket.receive_text()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        envio.cancel()
+        pubsub.hub.unsubscribe(topico, fila)
+
+@app.get("/sse/provas/{id_prova}")
+async def provas_sse(id_prova: int):
+    topico = pubsub.topico_prova(id_prova)
+    fila = pubsub.hub.subscribe(topico)
+
+    async def eventos():
+        try:
+            while True:
+                try:
+                    mensagem = await asyncio.wait_for(fila.get(), timeout=SSE_HEARTBEAT)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield f"event: {mensagem['tipo']}\ndata: {json.dumps(mensagem, ensure_ascii=False)}\n\n"
+        finally:
+            pubsub.hub.unsubscribe(topico, fila)
+
+    return StreamingResponse(eventos(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
 # Inscrições 
 
 @app.post("/inscricoes/", response_model=schemas.InscricaoResponse)
-def create_inscricao_endpoint(inscricao: schemas.InscricaoCreate, db: Session = Depends(get_db)):
-    return crud.create_inscricao(db, inscricao) 
-
-@app.get("/inscricoes/{inscricao_id}", response_model=schemas.InscricaoResponse)
-def get_inscricao_endpoint(inscricao_id: int, db: Session = Depends(get_db)):
-    return crud.get_inscricao(db, inscricao_id)
+async def create_inscricao_endpoint(inscricao: schemas.InscricaoCreate, db: Session = Depends(get_session)):
+    return await crud_async.create_inscricao(db, inscricao) 
+
+@app.post("/inscricoes/bulk", response_model=schemas.BulkResponse)
+async def create_inscricoes_bulk_endpoint(itens: list[dict] = Body(...), db: Session = Depends(get_session)):
+    return await crud_async.create_inscricoes_bulk(db, itens)
+
+@app.get("/inscricoes/{inscricao_id}", response_model=schemas.InscricaoDetalhada, response_model_exclude_unset=True)
+async def get_inscricao_endpoint(
+    inscricao_id: int,
+    request: Request,
+    response: Response,
+    expand: Optional[str] = None,
+    db: Session = Depends(get_session),
+):
+    caminhos = expansoes(expand, crud.EXPAND_INSCRICAO)
+    if caminhos:
+        return encontrado(await crud_async.get_inscricao_expandida(db, inscricao_id, caminhos), "Inscrição não encontrada")
+    return await detalhe(
+        request, response, db, crud_async.get_inscricao, inscricao_id, "Inscrição não encontrada", repository.inscricoes,
+    )
 
 @app.get("/inscricoes/", response_model=list[schemas.InscricaoResponse])
-def get_inscricoes_endpoint(db: Session = Depends(get_db)):
-    return crud.get_inscricoes(db) 
+async def get_inscricoes_endpoint(
+    request: Request,
+    after: Optional[int] = None,
+    limit: int = PAGE_LIMIT,
+    id_prova: Optional[int] = None,
+    id_competicao: Optional[int] = None,
+    id_competidor: Optional[int] = None,
+    microchip_cao: Optional[str] = None,
+    status: Optional[str] = None,
+    db: Session = Depends(get_session),
+):
+    return await paginated(
+        request, crud_async.get_inscricoes, db, models.Inscricao, schemas.InscricaoResponse, "id_inscricao", limit,
+        after=after, id_prova=id_prova, id_competicao=id_competicao,
+        id_competidor=id_competidor, microchip_cao=microchip_cao, status=status,
+    )
 
 @app.put("/inscricoes/{inscricao_id}", response_model=schemas.InscricaoResponse)
-def update_inscricao_endpoint(inscricao_id: int, inscricao_update: schemas.InscricaoUpdate, db: Session = Depends(get_db)):
-    return crud.update_inscricao(db, inscricao_id, inscricao_update)
+async def update_inscricao_endpoint(
+    inscricao_id: int,
+    inscricao_update: schemas.InscricaoUpdate,
+    response: Response,
+    versao: Optional[int] = IF_MATCH,
+    db: Session = Depends(get_session),
+):
+    return com_etag(response, encontrado(await crud_async.update_inscricao(db, inscricao_id, inscricao_update, versao), "Inscrição não encontrada"))
 
 @app.delete("/inscricoes/{inscricao_id}")
-def delete_inscricao_endpoint(inscricao_id: int, db: Session = Depends(get_db)):
-    crud.delete_inscricao(db, inscricao_id)
+async def delete_inscricao_endpoint(inscricao_id: int, db: Session = Depends(get_session)):
+    encontrado(await crud_async.delete_inscricao(db, inscricao_id), "Inscrição não encontrada")
     return {"ok": True}
 
 # Competidor
 @app.post("/competidor/", response_model=schemas.CompetidorResponse)
-def create_competidor_endpoint(competidor: schemas.CompetidorCreate, db: Session = Depends(get_db)):
-    return crud.create_competidor(db, competidor)
+async def create_competidor_endpoint(competidor: schemas.CompetidorCreate, db: Session = Depends(get_session)):
+    return await crud_async.create_competidor(db, competidor)
+
+@app.post("/competidor/bulk", response_model=schemas.BulkResponse)
+async def create_competidores_bulk_endpoint(itens: list[dict] = Body(...), db: Session = Depends(get_session)):
+    return await crud_async.create_competidores_bulk(db, itens)
 
 @app.get("/competidor/{competidor_id}", response_model=schemas.CompetidorResponse)
-def get_competidor_endpoint(competidor_id: int, db: Session = Depends(get_db)):
-    return crud.get_competidor(db, competidor_id)
+async def get_competidor_endpoint(competidor_id: int, request: Request, response: Response, db: Session = Depends(get_session)):
+    return await detalhe(request, response, db, crud_async.get_competidor, competidor_id, "Competidor não encontrado", repository.competidores)
 
 @app.get("/competidor/", response_model=list[schemas.CompetidorResponse])
-def get_competidores_endpoint(db: Session = Depends(get_db)):
-    return crud.get_competidores(db)
+async def get_competidores_endpoint(
+    request: Request,
+    after: Optional[int] = None,
+    limit: int = PAGE_LIMIT,
+    db: Session = Depends(get_session),
+):
+    return await paginated(
+        request, crud_async.get_competidores, db, models.Competidor, schemas.CompetidorResponse, "id_competidor", limit,
+        after=after,
+    )
 
 @app.put("/competidor/{competidor_id}", response_model=schemas.CompetidorResponse)
-def update_competidor_endpoint(competidor_id: int, competidor_update: schemas.CompetidorUpdate, db: Session = Depends(get_db)):
-    return crud.update_competidor(db, competidor_id, competidor_update)
+async def update_competidor_endpoint(
+    competidor_id: int,
+    competidor_update: schemas.CompetidorUpdate,
+    response: Response,
+    versao: Optional[int] = IF_MATCH,
+    db: Session = Depends(get_session),
+):
+    return com_etag(response, encontrado(await crud_async.update_competidor(db, competidor_id, competidor_update, versao), "Competidor não encontrado"))
 
 @app.delete("/competidor/{competidor_id}")
-def delete_competidor_endpoint(competidor_id: int, db: Session = Depends(get_db)):
-    crud.delete_competidor(db, competidor_id)
+async def delete_competidor_endpoint(competidor_id: int, db: Session = Depends(get_session)):
+    encontrado(await crud_async.delete_competidor(db, competidor_id), "Competidor não encontrado")
     return {"ok": True}
 
 # Cao
 @app.post("/cao/", response_model=schemas.CaoResponse)
-def create_cao_endpoint(cao: schemas.CaoCreate, db: Session = Depends(get_db)):
-    return crud.create_cao(db, cao)
+async def create_cao_endpoint(cao: schemas.CaoCreate, db: Session = Depends(get_session)):
+    return await crud_async.create_cao(db, cao)
+
+@app.post("/cao/bulk", response_model=schemas.BulkResponse)
+async def create_caes_bulk_endpoint(itens: list[dict] = Body(...), db: Session = Depends(get_session)):
+    return await crud_async.create_caes_bulk(db, itens)
 
 @app.get("/cao/{microchip}", response_model=schemas.CaoResponse)
-def get_cao_endpoint(microchip: str, db: Session = Depends(get_db)):
-    return crud.get_cao(db, microchip)
+async def get_cao_endpoint(microchip: str, request: Request, response: Response, db: Session = Depends(get_session)):
+    return await detalhe(request, response, db, crud_async.get_cao_cached, microchip, "Cão não encontrado")
 
 @app.get("/cao/", response_model=list[schemas.CaoResponse])
-def get_caes_endpoint(db: Session = Depends(get_db)):
-    return crud.get_caes(db)
+async def get_caes_endpoint(
+    request: Request,
+    after: Optional[str] = None,
+    limit: int = PAGE_LIMIT,
+    categoria_salto: Optional[str] = None,
+    db: Session = Depends(get_session),
+):
+    return await paginated(
+        request, crud_async.get_caes, db, models.Cao, schemas.CaoResponse, "microchip", limit,
+        after=after, categoria_salto=categoria_salto,
+    )
 
 @app.put("/cao/{microchip}", response_model=schemas.CaoResponse)
-def update_cao_endpoint(microchip: str, cao_update: schemas.CaoUpdate, db: Session = Depends(get_db)):
-    return crud.update_cao(db, microchip, cao_update)
+async def update_cao_endpoint(
+    microchip: str,
+    cao_update: schemas.CaoUpdate,
+    response: Response,
+    versao: Optional[int] = IF_MATCH,
+    db: Session = Depends(get_session),
+):
+    return com_etag(response, encontrado(await crud_async.update_cao(db, microchip, cao_update, versao), "Cão não encontrado"))
 
 @app.delete("/cao/{microchip}")
-def delete_cao_endpoint(microchip: str, db: Session = Depends(get_db)):
-    crud.delete_cao(db, microchip)
+async def delete_cao_endpoint(microchip: str, db: Session = Depends(get_session)):
+    encontrado(await crud_async.delete_cao(db, microchip), "Cão não encontrado")
     return {"ok": True}
 
 # Juiz
 @app.post("/juiz/", response_model=schemas.JuizResponse)
-def create_juiz_endpoint(juiz: schemas.JuizCreate, db: Session = Depends(get_db)):
-    return crud.create_juiz(db, juiz)
+async def create_juiz_endpoint(juiz: schemas.JuizCreate, db: Session = Depends(get_session)):
+    return await crud_async.create_juiz(db, juiz)
 
 @app.get("/juiz/{juiz_id}", response_model=schemas.JuizResponse)
-def get_juiz_endpoint(juiz_id: int, db: Session = Depends(get_db)):
-    return crud.get_juiz(db, juiz_id)
+async def get_juiz_endpoint(juiz_id: int, request: Request, response: Response, db: Session = Depends(get_session)):
+    return await detalhe(request, response, db, crud_async.get_juiz_cached, juiz_id, "Juiz não encontrado")
 
 @app.get("/juiz/", response_model=list[schemas.JuizResponse])
-def get_juizes_endpoint(db: Session = Depends(get_db)):
-    return crud.get_juizes(db)
+async def get_juizes_endpoint(
+    request: Request,
+    after: Optional[int] = None,
+    limit: int = PAGE_LIMIT,
+    db: Session = Depends(get_session),
+):
+    return await paginated(
+        request, crud_async.get_juizes, db, models.Juiz, schemas.JuizResponse, "id_juiz", limit,
+        after=after,
+    )
 
 @app.put("/juiz/{juiz_id}", response_model=schemas.JuizResponse)
-def update_juiz_endpoint(juiz_id: int, juiz_update: schemas.JuizUpdate, db: Session = Depends(get_db)):
-    return crud.update_juiz(db, juiz_id, juiz_update)
+async def update_juiz_endpoint(
+    juiz_id: int,
+    juiz_update: schemas.JuizUpdate,
+    response: Response,
+    versao: Optional[int] = IF_MATCH,
+    db: Session = Depends(get_session),
+):
+    return com_etag(response, encontrado(await crud_async.update_juiz(db, juiz_id, juiz_update, versao), "Juiz não encontrado"))
 
 @app.delete("/juiz/{juiz_id}")
-def delete_juiz_endpoint(juiz_id: int, db: Session = Depends(get_db)):
-    crud.delete_juiz(db, juiz_id)
+async def delete_juiz_endpoint(juiz_id: int, db: Session = Depends(get_session)):
+    encontrado(await crud_async.delete_juiz(db, juiz_id), "Juiz não encontrado")
     return {"ok": True}
 
 # Resultado
 @app.post("/resultados/", response_model=schemas.ResultadoResponse)
-def create_resultado_endpoint(resultado: schemas.ResultadoCreate, db: Session = Depends(get_db)):
-    return crud.create_resultado(db, resultado)
+async def create_resultado_endpoint(resultado: schemas.ResultadoCreate, db: Session = Depends(get_session)):
+    return await crud_async.create_resultado(db, resultado)
 
 @app.get("/resultados/{resultado_id}", response_model=schemas.ResultadoResponse)
-def get_resultado_endpoint(resultado_id: int, db: Session = Depends(get_db)):
-    return crud.get_resultado(db, resultado_id)
+async def get_resultado_endpoint(resultado_id: int, request: Request, response: Response, db: Session = Depends(get_session)):
+    return await detalhe(request, response, db, crud_async.get_resultado, resultado_id, "Resultado não encontrado", repository.resultados)
 
 @app.get("/resultados/", response_model=list[schemas.ResultadoResponse])
-def get_resultados_endpoint(db: Session = Depends(get_db)):
-    return crud.get_resultados(db)
+async def get_resultados_endpoint(
+    request: Request,
+    after: Optional[int] = None,
+    limit: int = PAGE_LIMIT,
+    id_inscricao: Optional[int] = None,
+    id_prova: Optional[int] = None,
+    db: Session = Depends(get_session),
+):
+    return await paginated(
+        request, crud_async.get_resultados, db, models.Resultado, schemas.ResultadoResponse, "id_resultado", limit,
+        after=after, id_inscricao=id_inscricao, id_prova=id_prova,
+    )
 
 @app.put("/resultados/{resultado_id}", response_model=schemas.ResultadoResponse)
-def update_resultado_endpoint(resultado_id: int, resultado_update: schemas.ResultadoUpdate, db: Session = Depends(get_db)):
-    return crud.update_resultado(db, resultado_id, resultado_update)
+async def update_resultado_endpoint(
+    resultado_id: int,
+    resultado_update: schemas.ResultadoUpdate,
+    response: Response,
+    versao: Optional[int] = IF_MATCH,
+    db: Session = Depends(get_session),
+):
+    return com_etag(response, encontrado(await crud_async.update_resultado(db, resultado_id, resultado_update, versao), "Resultado não encontrado"))
 
 @app.delete("/resultados/{resultado_id}")
-def delete_resultado_endpoint(resultado_id: int, db: Session = Depends(get_db)):
-    crud.delete_resultado(db, resultado_id)
+async def delete_resultado_endpoint(resultado_id: int, db: Session = Depends(get_session)):
+    encontrado(await crud_async.delete_resultado(db, resultado_id), "Resultado não encontrado")
     return {"ok": True}
 
 # Avaliacao
 @app.post("/avaliacoes/", response_model=schemas.AvaliacaoResponse)
-def create_avaliacao_endpoint(avaliacao: schemas.AvaliacaoCreate, db: Session = Depends(get_db)):
-    return crud.create_avaliacao(db, avaliacao)
+async def create_avaliacao_endpoint(avaliacao: schemas.AvaliacaoCreate, db: Session = Depends(get_session)):
+    return await crud_async.create_avaliacao(db, avaliacao)
 
 @app.get("/avaliacoes/{avaliacao_id}", response_model=schemas.AvaliacaoResponse)
-def get_avaliacao_endpoint(avaliacao_id: int, db: Session = Depends(get_db)):
-    return crud.get_avaliacao(db, avaliacao_id)
+async def get_avaliacao_endpoint(avaliacao_id: int, request: Request, response: Response, db: Session = Depends(get_session)):
+    return await detalhe(request, response, db, crud_async.get_avaliacao, avaliacao_id, "Avaliação não encontrada", repository.avaliacoes)
 
 @app.get("/avaliacoes/", response_model=list[schemas.AvaliacaoResponse])
-def get_avaliacoes_endpoint(db: Session = Depends(get_db)):
-    return crud.get_avaliacoes(db)
+async def get_avaliacoes_endpoint(
+    request: Request,
+    after: Optional[int] = None,
+    limit: int = PAGE_LIMIT,
+    id_prova: Optional[int] = None,
+    id_juiz: Optional[int] = None,
+    db: Session = Depends(get_session),
+):
+    return await paginated(
+        request, crud_async.get_avaliacoes, db, models.Avaliacao, schemas.AvaliacaoResponse, "id_avaliacao", limit,
+        after=after, id_prova=id_prova, id_juiz=id_juiz,
+    )
 
 @app.put("/avaliacoes/{avaliacao_id}", response_model=schemas.AvaliacaoResponse)
-def update_avaliacao_endpoint(avaliacao_id: int, avaliacao_update: schemas.AvaliacaoUpdate, db: Session = Depends(get_db)):
-    return crud.update_avaliacao(db, avaliacao_id, avaliacao_update)
+async def update_avaliacao_endpoint(
+    avaliacao_id: int,
+    avaliacao_update: schemas.AvaliacaoUpdate,
+    response: Response,
+    versao: Optional[int] = IF_MATCH,
+    db: Session = Depends(get_session),
+):
+    return com_etag(response, encontrado(await crud_async.update_avaliacao(db, avaliacao_id, avaliacao_update, versao), "Avaliação não encontrada"))
 
 @app.delete("/avaliacoes/{avaliacao_id}")
-def delete_avaliacao_endpoint(avaliacao_id: int, db: Session = Depends(get_db)):
-    crud.delete_avaliacao(db, avaliacao_id)
+async def delete_avaliacao_endpoint(avaliacao_id: int, db: Session = Depends(get_session)):
+    encontrado(await crud_async.delete_avaliacao(db, avaliacao_id), "Avaliação não encontrada")
     return {"ok": True}
 
 # Cronometragem
 @app.post("/cronometros/", response_model=schemas.CronometragemResponse)
-def create_cronometro_endpoint(cronometro: schemas.CronometragemCreate, db: Session = Depends(get_db)):
-    return crud.create_cronometro(db, cronometro)
+async def create_cronometro_endpoint(cronometro: schemas.CronometragemCreate, db: Session = Depends(get_session)):
+    return await crud_async.create_cronometro(db, cronometro)
+
+async def _comando_cronometro(comando, cronometro_id: int, db: Session):
+    try:
+        db_cronometro = await comando(db, cronometro_id)
+    except timing.EstadoInvalido as exc:
+        raise HTTPException(status_code=409, detail=str(exc))
+    if db_cronometro is None:
+        raise HTTPException(status_code=404, detail="Cronômetro não encontrado")
+    return db_cronometro
+
+@app.post("/cronometros/{cronometro_id}/start", response_model=schemas.CronometragemResponse)
+async def start_cronometro_endpoint(cronometro_id: int, db: Session = Depends(get_session)):
+    return await _comando_cronometro(crud_async.start_cronometro, cronometro_id, db)
+
+@app.post("/cronometros/{cronometro_id}/pause", response_model=schemas.CronometragemResponse)
+async def pause_cronometro_endpoint(cronometro_id: int, db: Session = Depends(get_session)):
+    return await _comando_cronometro(crud_async.pause_cronometro, cronometro_id, db)
+
+@app.post("/cronometros/{cronometro_id}/stop", response_model=schemas.CronometragemResponse)
+async def stop_cronometro_endpoint(cronometro_id: int, db: Session = Depends(get_session)):
+    return await _comando_cronometro(crud_async.stop_cronometro, cronometro_id, db)
 
 @app.get("/cronometros/{cronometro_id}", response_model=schemas.CronometragemResponse)
-def get_cronometro_endpoint(cronometro_id: int, db: Session = Depends(get_db)):
-    return crud.get_cronometro(db, cronometro_id)
+async def get_cronometro_endpoint(cronometro_id: int, request: Request, response: Response, db: Session = Depends(get_session)):
+    return await detalhe(request, response, db, crud_async.get_cronometro, cronometro_id, "Cronômetro não encontrado", repository.cronometros)
 
 @app.get("/cronometros/", response_model=list[schemas.CronometragemResponse])
-def get_cronometros_endpoint(db: Session = Depends(get_db)):
-    return crud.get_cronometros(db)
+async def get_cronometros_endpoint(
+    request: Request,
+    after: Optional[int] = None,
+    limit: int = PAGE_LIMIT,
+    id_inscricao: Optional[int] = None,
+    status: Optional[str] = None,
+    db: Session = Depends(get_session),
+):
+    return await paginated(
+        request, crud_async.get_cronometros, db, models.Cronometragem, schemas.CronometragemResponse, "id_cronometro", limit,
+        after=after, id_inscricao=id_inscricao, status=status,
+    )
 
 @app.put("/cronometros/{cronometro_id}", response_model=schemas.CronometragemResponse)
-def update_cronometro_endpoint(cronometro_id: int, cronometro_update: schemas.CronometragemUpdate, db: Session = Depends(get_db)):
-    return crud.update_cronometro(db, cronometro_id, cronometro_update)
+async def update_cronometro_endpoint(
+    cronometro_id: int,
+    cronometro_update: schemas.CronometragemUpdate,
+    response: Response,
+    versao: Optional[int] = IF_MATCH,
+    db: Session = Depends(get_session),
+):
+    return com_etag(response, encontrado(await crud_async.update_cronometro(db, cronometro_id, cronometro_update, versao), "Cronômetro não encontrado"))
 
 @app.delete("/cronometros/{cronometro_id}")
-def delete_cronometro_endpoint(cronometro_id: int, db: Session = Depends(get_db)):
-    crud.delete_cronometro(db, cronometro_id)
-    return {"ok": True}
\ No newline at end of file
+async def delete_cronometro_endpoint(cronometro_id: int, db: Session = Depends(get_session)):
+    encontrado(await crud_async.delete_cronometro(db, cronometro_id), "Cronômetro não encontrado")
+    return {"ok": True}
+
+# Sincronização em lote: o computador de pista acumula operações offline e envia tudo de uma vez
+@app.post("/sync/batch", response_model=schemas.SyncBatchResponse)
+async def sync_batch_endpoint(lote: schemas.SyncBatchRequest, db: Session = Depends(get_session)):
+    return await crud_async.sync_batch(db, lote)
@@ -0,0 +1,171 @@
+# app/metrics.py
+
+import contextvars
+import logging
+import threading
+import time
+from collections import defaultdict
+from sqlalchemy import event
+from . import config
+
+logger = logging.getLogger(__name__)
+
+# Limites (s) dos histogramas de latência por rota
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SEM_ROTA = "desconhecida"
+
+
+class Medicao:
+    """SQL statements and DB time accumulated by the request being served."""
+
+    __slots__ = ("caminho", "rota", "queries", "db_segundos")
+
+    def __init__(self, caminho: str):
+        self.caminho = caminho
+        self.rota = SEM_ROTA
+        self.queries = 0
+        self.db_segundos = 0.0
+
+
+# Objeto mutável no contexto: o threadpool, a fila de escrita e o greenlet do modo assíncrono
+# recebem uma cópia do contexto, mas somam no mesmo objeto da requisição
+_medicao: contextvars.ContextVar = contextvars.ContextVar("medicao", default=None)
+
+
+class Histograma:
+    def __init__(self):
+        self.contagens = [0] * len(BUCKETS)
+        self.soma = 0.0
+        self.total = 0
+
+    def observar(self, valor: float):
+        for i, limite in enumerate(BUCKETS):
+            if valor <= limite:
+                self.contagens[i] += 1
+                break
+        self.soma += valor
+        self.total += 1
+
+
+class Registro:
+    """In-process request/DB counters, rendered in the Prometheus text format."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requisicoes = defaultdict(int)           # (método, rota, status) -> n
+        self.latencias = defaultdict(Histograma)      # (método, rota) -> histograma
+        self.queries = defaultdict(int)               # (método, rota) -> statements
+        self.db_segundos = defaultdict(float)         # (método, rota) -> s dentro do banco
+        self.queries_lentas = 0
+
+    def registrar(self, metodo: str, status: int, duracao: float, medicao: Medicao):
+        chave = (metodo, medicao.rota)
+        with self._lock:
+            self.requisicoes[(metodo, medicao.rota, status)] += 1
+            self.latencias[chave].observar(duracao)
+            self.queries[chave] += medicao.queries
+            self.db_segundos[chave] += medicao.db_segundos
+
+    def query_lenta(self):
+        with self._lock:
+            self.queries_lentas += 1
+
+    def exportar(self) -> str:
+        linhas = []
+
+        def metrica(nome: str, tipo: str, ajuda: str):
+            linhas.append(f"# HELP {nome} {ajuda}")
+            linhas.append(f"# TYPE {nome} {tipo}")
+
+        with self._lock:
+            metrica("agility_http_requests_total", "counter", "Requisições HTTP por rota e status.")
+            for (metodo, rota, status), n in sorted(self.requisicoes.items()):
+                linhas.append(f'agility_http_requests_total{{{_rotulos(metodo, rota)},status="{status}"}} {n}')
+
+            metrica("agility_http_request_duration_seconds", "histogram", "Latência das requisições HTTP por rota.")
+            for (metodo, rota), histograma in sorted(self.latencias.items()):
+                rotulos = _rotulos(metodo, rota)
+                acumulado = 0
+                for limite, contagem in zip(BUCKETS, histograma.contagens):
+                    acumulado += contagem
+                    linhas.append(f'agility_http_request_duration_seconds_bucket{{{rotulos},le="{limite}"}} {acumulado}')
+                linhas.append(f'agility_http_request_duration_seconds_bucket{{{rotulos},le="+Inf"}} {histograma.total}')
+                linhas.append(f"agility_http_request_duration_seconds_sum{{{rotulos}}} {histograma.soma}")
+                linhas.append(f"agility_http_request_duration_seconds_count{{{rotulos}}} {histograma.total}")
+
+            metrica("agility_db_queries_total", "counter", "Statements SQL executados pelas requisições de cada rota.")
+            for (metodo, rota), n in sorted(self.queries.items()):
+                linhas.append(f"agility_db_queries_total{{{_rotulos(metodo, rota)}}} {n}")
+
+            metrica("agility_db_seconds_total", "counter", "Tempo dentro do banco gasto pelas requisições de cada rota.")
+            for (metodo, rota), segundos in sorted(self.db_segundos.items()):
+                linhas.append(f"agility_db_seconds_total{{{_rotulos(metodo, rota)}}} {segundos}")
+
+            metrica("agility_db_slow_queries_total", "counter", f"Statements acima de SLOW_QUERY_MS ({config.SLOW_QUERY_MS} ms).")
+            linhas.append(f"agility_db_slow_queries_total {self.queries_lentas}")
+        return "\n".join(linhas) + "\n"
+
+
+def _rotulos(metodo: str, rota: str) -> str:
+    rota = rota.replace("\\", "\\\\").replace('"', '\\"')
+    return f'method="{metodo}",route="{rota}"'
+
+
+registro = Registro()
+
+
+class MetricsMiddleware:
+    """ASGI middleware timing each HTTP request, labelled by route template (e.g. /provas/{prova_id})."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        medicao = Medicao(scope["path"])
+        token = _medicao.set(medicao)
+        status = 500
+        inicio = time.perf_counter()
+
+        async def enviar(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, enviar)
+        finally:
+            _medicao.reset(token)
+            rota = scope.get("route")
+            if rota is not None:
+                medicao.rota = rota.path
+            registro.registrar(scope["method"], status, time.perf_counter() - inicio, medicao)
+
+
+def instrumentar(engine):
+    # Conta e cronometra cada statement; os da requisição corrente vão para a sua Medicao
+    @event.listens_for(engine, "before_cursor_execute")
+    def antes(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("metricas_inicio", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def depois(conn, cursor, statement, parameters, context, executemany):
+        duracao = time.perf_counter() - conn.info["metricas_inicio"].pop()
+        medicao = _medicao.get()
+        if medicao is not None:
+            medicao.queries += 1
+            medicao.db_segundos += duracao
+        if config.SLOW_QUERY_MS and duracao * 1000 >= config.SLOW_QUERY_MS:
+            registro.query_lenta()
+            logger.warning(
+                "query lenta: %.1f ms em %s: %s",
+                duracao * 1000, medicao.caminho if medicao is not None else "-", " ".join(statement.split()),
+            )
+
+    @event.listens_for(engine, "handle_error")
+    def erro(contexto):
+        # Statement que falhou não passa pelo after_cursor_execute
+        if contexto.connection is not None and contexto.connection.info.get("metricas_inicio"):
+            contexto.connection.info["metricas_inicio"].pop()
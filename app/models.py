@@ -1,6 +1,6 @@
 # app/models.py
 
-from sqlalchemy import Boolean, Column, Date, Integer, Float, String, DateTime, ForeignKey, func
+from sqlalchemy import Boolean, Column, Date, Index, Integer, Float, String, DateTime, ForeignKey, func
 from sqlalchemy.orm import relationship
 from .database import Base
 class User(Base):
@@ -25,9 +25,15 @@ class Competicao(Base):
     nome_veterinario = Column(String)
     responsavel_id = Column(Integer, ForeignKey("users.id"))
     responsavel = relationship("User", back_populates="competicoes")
+    # Versão para controle otimista (If-Match): o flush do ORM grava com WHERE versao = <lida> e incrementa
+    versao = Column(Integer, nullable=False, server_default="1")
+    __mapper_args__ = {"version_id_col": versao}
 
 class Prova(Base):
     __tablename__ = "prova"
+    __table_args__ = (
+        Index("ix_prova_competicao_id", "id_competicao", "id_prova"),
+    )
 
     id_prova = Column(Integer, primary_key=True, index=True)
     id_competicao = Column(Integer, ForeignKey("competicoes.id_competicao"))
@@ -43,9 +49,20 @@ class Prova(Base):
     inscricoes = relationship("Inscricao", back_populates="prova")
     criado_em = Column(DateTime(timezone=True), server_default=func.now())
     atualizado_em = Column(DateTime(timezone=True), onupdate=func.now())
+    # Versão para controle otimista (If-Match); eager_defaults busca criado_em/atualizado_em via RETURNING
+    versao = Column(Integer, nullable=False, server_default="1")
+    # Avança a cada percurso/remoção na classificação (app/ranking.py): cópias em memória de outros workers recarregam
+    versao_classificacao = Column(Integer, nullable=False, server_default="0")
+    __mapper_args__ = {"eager_defaults": True, "version_id_col": versao}
 
 class Inscricao(Base):
     __tablename__ = "inscricao"
+    __table_args__ = (
+        Index("ix_inscricao_prova_id", "id_prova", "id_inscricao"),
+        Index("ix_inscricao_competidor_id", "id_competidor", "id_inscricao"),
+        Index("ix_inscricao_cao_id", "microchip_cao", "id_inscricao"),
+        Index("ix_inscricao_status_id", "status", "id_inscricao"),
+    )
 
     id_inscricao = Column(Integer, primary_key=True, index=True)
     id_prova = Column(Integer, ForeignKey("prova.id_prova"))
@@ -59,6 +76,8 @@ class Inscricao(Base):
     pontuacao = Column(Integer, nullable=True)
     hora_inicio = Column(DateTime(timezone=True), nullable=True)
     status = Column(String, nullable=False, default="pendente")
+    # Status dado pelo juiz quando o percurso o troca por "eliminado" (TMP, recusas); nulo: igual a status
+    status_juiz = Column(String, nullable=True)
     cronometros = relationship("Cronometragem", back_populates="inscricao")
     resultados = relationship("Resultado", back_populates="inscricao")
     criado_em = Column(DateTime(timezone=True), server_default=func.now())
@@ -67,9 +86,15 @@ class Inscricao(Base):
     prova = relationship("Prova", back_populates="inscricoes")
     competidor = relationship("Competidor", back_populates="inscricoes")
     cao = relationship("Cao", back_populates="inscricoes")
+    versao = Column(Integer, nullable=False, server_default="1")
+    __mapper_args__ = {"eager_defaults": True, "version_id_col": versao}
 
 class Cronometragem(Base):
     __tablename__ = "cronometro"
+    __table_args__ = (
+        Index("ix_cronometro_inscricao_id", "id_inscricao", "id_cronometro"),
+        Index("ix_cronometro_status_id", "status", "id_cronometro"),
+    )
 
     id_cronometro = Column(Integer, primary_key=True, index=True)
     id_inscricao = Column(Integer, ForeignKey("inscricao.id_inscricao"))
@@ -81,9 +106,15 @@ class Cronometragem(Base):
     atualizado_em = Column(DateTime(timezone=True), onupdate=func.now())
 
     inscricao = relationship("Inscricao", back_populates="cronometros")
+    versao = Column(Integer, nullable=False, server_default="1")
+    __mapper_args__ = {"eager_defaults": True, "version_id_col": versao}
 
 class Avaliacao(Base):
     __tablename__ = "avaliacao"
+    __table_args__ = (
+        Index("ix_avaliacao_prova_id", "id_prova", "id_avaliacao"),
+        Index("ix_avaliacao_juiz_id", "id_juiz", "id_avaliacao"),
+    )
 
     id_avaliacao = Column(Integer, primary_key=True, index=True)
     id_prova = Column(Integer, ForeignKey("prova.id_prova"))
@@ -95,6 +126,8 @@ class Avaliacao(Base):
 
     prova = relationship("Prova", back_populates="avaliacoes")
     juiz = relationship("Juiz", back_populates="avaliacoes")
+    versao = Column(Integer, nullable=False, server_default="1")
+    __mapper_args__ = {"eager_defaults": True, "version_id_col": versao}
 
 class Competidor(Base):
     __tablename__ = "competidor"
@@ -107,9 +140,14 @@ class Competidor(Base):
     # idade = Column(Integer, nullable=False)
     # sexo = Column(String, nullable=False)
     inscricoes = relationship("Inscricao", back_populates="competidor")
+    versao = Column(Integer, nullable=False, server_default="1")
+    __mapper_args__ = {"version_id_col": versao}
 
 class Cao(Base):
     __tablename__ = "cao"
+    __table_args__ = (
+        Index("ix_cao_categoria_microchip", "categoria_salto", "microchip"),
+    )
 
     microchip = Column(String, primary_key=True, index=True)
     nome = Column(String, nullable=False)
@@ -118,6 +156,8 @@ class Cao(Base):
     categoria_salto = Column(String, nullable=False)
     is_cao_branco = Column (Boolean, nullable=False, default=False)
     inscricoes = relationship("Inscricao", back_populates="cao")
+    versao = Column(Integer, nullable=False, server_default="1")
+    __mapper_args__ = {"version_id_col": versao}
     # idade = Column(Integer, nullable=False)
     # sexo = Column(String, nullable=False)
 
@@ -128,13 +168,92 @@ class Juiz(Base):
     nome = Column(String, nullable=False)
     email = Column(String, unique=True, nullable=False)
     avaliacoes = relationship("Avaliacao", back_populates="juiz")
+    versao = Column(Integer, nullable=False, server_default="1")
+    __mapper_args__ = {"version_id_col": versao}
 
 class Resultado(Base):
     __tablename__ = "resultado"
+    __table_args__ = (
+        Index("ix_resultado_inscricao_id", "id_inscricao", "id_resultado"),
+    )
 
     id_resultado = Column(Integer, primary_key=True, index=True)
     id_inscricao = Column(Integer, ForeignKey("inscricao.id_inscricao"))
     posicao = Column(Integer, nullable=True)
     total_pontos_t = Column(Integer, nullable=True)
     total_pontos_tp = Column(Integer, nullable=True)
-    inscricao = relationship("Inscricao", back_populates="resultados")
\ No newline at end of file
+    inscricao = relationship("Inscricao", back_populates="resultados")
+    versao = Column(Integer, nullable=False, server_default="1")
+    __mapper_args__ = {"version_id_col": versao}
+class EstatisticaProva(Base):
+    __tablename__ = "estatistica_prova"
+
+    # Resumo por prova e categoria de salto, mantido por app/stats.py a cada escrita de inscrição
+    id_prova = Column(Integer, ForeignKey("prova.id_prova"), primary_key=True)
+    categoria_salto = Column(String, primary_key=True)
+    inscritos = Column(Integer, nullable=False, default=0)
+    percursos = Column(Integer, nullable=False, default=0)
+    limpos = Column(Integer, nullable=False, default=0)
+    eliminados = Column(Integer, nullable=False, default=0)
+    soma_vel_media = Column(Float, nullable=False, default=0)
+    com_vel_media = Column(Integer, nullable=False, default=0)
+    melhor_tempo = Column(Float, nullable=True)
+
+class SyncOperacao(Base):
+    __tablename__ = "sync_operacao"
+
+    # Operações já aplicadas pelo POST /sync/batch: o reenvio do mesmo id_operacao não reaplica
+    dispositivo = Column(String, primary_key=True)
+    id_operacao = Column(String, primary_key=True)
+    entidade = Column(String, nullable=False)
+    acao = Column(String, nullable=False)
+    chave = Column(Integer, nullable=True)
+    carimbo = Column(DateTime(timezone=True), nullable=True)
+    aplicada_em = Column(DateTime(timezone=True), server_default=func.now())
+
+class Alteracao(Base):
+    __tablename__ = "alteracao"
+    # AUTOINCREMENT no SQLite: id_alteracao nunca é reaproveitado, mesmo depois de remover as últimas linhas
+    __table_args__ = (
+        Index("ix_alteracao_competicao_id", "id_competicao", "id_alteracao"),
+        {"sqlite_autoincrement": True},
+    )
+
+    # Log de alterações do GET /competicoes/{id}/changes, gravado por app/alteracoes.py; id_alteracao é o cursor
+    id_alteracao = Column(Integer, primary_key=True)
+    id_competicao = Column(Integer, nullable=False)
+    entidade = Column(String, nullable=False)
+    chave = Column(Integer, nullable=False)
+    acao = Column(String, nullable=False)
+    registrada_em = Column(DateTime(timezone=True), server_default=func.now())
+
+class TemporadaCao(Base):
+    __tablename__ = "temporada_cao"
+
+    # Pontos da temporada (ano da competição) por categoria da prova e cão, mantidos por app/temporada.py
+    temporada = Column(Integer, primary_key=True)
+    categoria = Column(String, primary_key=True)
+    microchip = Column(String, primary_key=True)
+    pontos = Column(Integer, nullable=False, default=0)
+    pontos_tp = Column(Integer, nullable=False, default=0)
+    provas = Column(Integer, nullable=False, default=0)
+
+class TemporadaCompetidor(Base):
+    __tablename__ = "temporada_competidor"
+
+    temporada = Column(Integer, primary_key=True)
+    categoria = Column(String, primary_key=True)
+    id_competidor = Column(Integer, primary_key=True)
+    pontos = Column(Integer, nullable=False, default=0)
+    pontos_tp = Column(Integer, nullable=False, default=0)
+    provas = Column(Integer, nullable=False, default=0)
+
+# Mesma ordem do GET /rankings: o top N sai lendo o índice, sem ordenar a temporada inteira
+Index(
+    "ix_temporada_cao_ordem", TemporadaCao.temporada, TemporadaCao.categoria,
+    TemporadaCao.pontos.desc(), TemporadaCao.pontos_tp.desc(), TemporadaCao.microchip,
+)
+Index(
+    "ix_temporada_competidor_ordem", TemporadaCompetidor.temporada, TemporadaCompetidor.categoria,
+    TemporadaCompetidor.pontos.desc(), TemporadaCompetidor.pontos_tp.desc(), TemporadaCompetidor.id_competidor,
+)
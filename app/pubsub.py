@@ -0,0 +1,69 @@
+# app/pubsub.py
+
+import asyncio
+import threading
+from collections import defaultdict
+
+# Mensagens pendentes por assinante; um cliente lento perde as mais antigas, não trava o hub
+QUEUE_SIZE = 256
+
+
+class Hub:
+    """In-process fan-out: one publish from a CRUD write reaches every subscriber of the topic."""
+
+    def __init__(self):
+        self._subscribers = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def subscribe(self, topic) -> asyncio.Queue:
+        fila = asyncio.Queue(maxsize=QUEUE_SIZE)
+        with self._lock:
+            self._subscribers[topic].add((asyncio.get_running_loop(), fila))
+        return fila
+
+    def unsubscribe(self, topic, fila: asyncio.Queue):
+        with self._lock:
+            assinantes = self._subscribers.get(topic, set())
+            assinantes.difference_update({item for item in assinantes if item[1] is fila})
+            if not assinantes:
+                self._subscribers.pop(topic, None)
+
+    def has_subscribers(self, topic=None) -> bool:
+        with self._lock:
+            if topic is None:
+                return bool(self._subscribers)
+            return bool(self._subscribers.get(topic))
+
+    def publish(self, topic, message: dict):
+        # Pode ser chamado de qualquer thread (threadpool, fila de escrita ou event loop)
+        with self._lock:
+            assinantes = list(self._subscribers.get(topic, ()))
+        for loop, fila in assinantes:
+            try:
+                loop.call_soon_threadsafe(_entregar, fila, message)
+            except RuntimeError:
+                # Event loop já encerrado
+                self.unsubscribe(topic, fila)
+
+
+def _entregar(fila: asyncio.Queue, message: dict):
+    if fila.full():
+        fila.get_nowait()
+    fila.put_nowait(message)
+
+
+hub = Hub()
+
+
+def topico_prova(id_prova: int) -> str:
+    return f"prova:{id_prova}"
+
+
+def tem_assinantes(id_prova=None) -> bool:
+    return hub.has_subscribers(None if id_prova is None else topico_prova(id_prova))
+
+
+def publicar(id_prova, tipo: str, dados):
+    if id_prova is None:
+        return
+    hub.publish(topico_prova(id_prova), {"tipo": tipo, "id_prova": id_prova, "dados": dados})
@@ -0,0 +1,365 @@
+# app/ranking.py
+
+import random
+import threading
+from collections import defaultdict
+from typing import Optional
+from sqlalchemy import bindparam, func, select
+from sqlalchemy.orm import Session
+from . import alteracoes, scoring
+from .models import Inscricao, Prova, Resultado
+
+CAMPOS_DE_PERCURSO = {"tempo_prova", "faltas_prova", "recusas_prova", "status", "id_prova"}
+# Espaço das advisory locks do PostgreSQL (segundo argumento: id_prova)
+TRAVA = 2001
+
+
+def chave_classificacao(inscricao, tsp: float, tmp: float):
+    # (penalidades, tempo_prova, id_inscricao) ou None quando o cão não entra na classificação
+    tempo = inscricao.tempo_prova
+    if tempo is None or scoring.eliminado(tempo, inscricao.recusas_prova, tmp, inscricao.status):
+        return None
+    penalidades = scoring.penalidades(tempo, inscricao.faltas_prova, inscricao.recusas_prova, tsp)
+    return (penalidades, tempo, inscricao.id_inscricao)
+
+
+class _No:
+    __slots__ = ("chave", "prioridade", "tamanho", "esquerda", "direita")
+
+    def __init__(self, chave):
+        self.chave = chave
+        self.prioridade = random.random()
+        self.tamanho = 1
+        self.esquerda = self.direita = None
+
+
+def _tamanho(no: Optional[_No]) -> int:
+    return no.tamanho if no is not None else 0
+
+
+def _ajustar(no: _No) -> _No:
+    no.tamanho = 1 + _tamanho(no.esquerda) + _tamanho(no.direita)
+    return no
+
+
+def _dividir(no: Optional[_No], chave):
+    # (chaves < chave, chaves >= chave)
+    if no is None:
+        return None, None
+    if no.chave < chave:
+        menores, maiores = _dividir(no.direita, chave)
+        no.direita = menores
+        return _ajustar(no), maiores
+    menores, maiores = _dividir(no.esquerda, chave)
+    no.esquerda = maiores
+    return menores, _ajustar(no)
+
+
+def _unir(menores: Optional[_No], maiores: Optional[_No]) -> Optional[_No]:
+    if menores is None:
+        return maiores
+    if maiores is None:
+        return menores
+    if menores.prioridade > maiores.prioridade:
+        menores.direita = _unir(menores.direita, maiores)
+        return _ajustar(menores)
+    maiores.esquerda = _unir(menores, maiores.esquerda)
+    return _ajustar(maiores)
+
+
+def _sem_primeiro(no: _No) -> Optional[_No]:
+    if no.esquerda is None:
+        return no.direita
+    no.esquerda = _sem_primeiro(no.esquerda)
+    return _ajustar(no)
+
+
+def _coletar(no: Optional[_No], inicio: int, fim: int, saida: list):
+    # Chaves das posições [inicio, fim) da subárvore, em ordem; desce só nos ramos que as contêm
+    if no is None or inicio >= fim:
+        return
+    esquerda = _tamanho(no.esquerda)
+    if inicio < esquerda:
+        _coletar(no.esquerda, inicio, min(fim, esquerda), saida)
+    if inicio <= esquerda < fim:
+        saida.append(no.chave)
+    if fim > esquerda + 1:
+        _coletar(no.direita, max(inicio - esquerda - 1, 0), fim - esquerda - 1, saida)
+
+
+class ListaOrdenada:
+    """Order-statistic treap of unique keys: insert, remove and rank in O(log n), a range of k in O(log n + k)."""
+
+    def __init__(self):
+        self._raiz = None
+
+    def __len__(self) -> int:
+        return _tamanho(self._raiz)
+
+    def inserir(self, chave) -> int:
+        # Devolve a posição (0-based) em que a chave entrou
+        menores, maiores = _dividir(self._raiz, chave)
+        posicao = _tamanho(menores)
+        self._raiz = _unir(_unir(menores, _No(chave)), maiores)
+        return posicao
+
+    def remover(self, chave) -> int:
+        # A chave precisa estar na lista; devolve a posição (0-based) que ela ocupava
+        menores, resto = _dividir(self._raiz, chave)
+        posicao = _tamanho(menores)
+        self._raiz = _unir(menores, _sem_primeiro(resto))
+        return posicao
+
+    def fatia(self, inicio: int, fim: int) -> list:
+        saida = []
+        _coletar(self._raiz, inicio, fim, saida)
+        return saida
+
+    def __iter__(self):
+        return iter(self.fatia(0, len(self)))
+
+
+class ClassificacaoProva:
+    """Ordered standings of one Prova, updated one run at a time."""
+
+    def __init__(self, id_prova: int, tsp: float, tmp: float, versao: int = 0):
+        self.id_prova = id_prova
+        self.tsp = tsp
+        self.tmp = tmp
+        # Prova.versao_classificacao que esta cópia reflete: outro worker que gravar um percurso a avança
+        self.versao = versao
+        self.com_resultado = set()
+        self._ordem = ListaOrdenada()
+        self._chaves = {}
+        # Só o estado em memória (leituras do telão x escrita de um percurso); nunca segurado durante I/O de banco
+        self._lock = threading.Lock()
+
+    def atualizar(self, id_inscricao: int, chave) -> list[tuple[int, Optional[int]]]:
+        # Devolve apenas os pares (id_inscricao, posicao) cuja posição mudou
+        with self._lock:
+            antiga = self._chaves.get(id_inscricao)
+            if antiga == chave:
+                return []
+            alteradas = []
+            i = j = None
+            if antiga is not None:
+                i = self._ordem.remover(antiga)
+                del self._chaves[id_inscricao]
+            if chave is not None:
+                j = self._ordem.inserir(chave)
+                self._chaves[id_inscricao] = chave
+            else:
+                alteradas.append((id_inscricao, None))
+
+            if i is not None and j is not None:
+                inicio, fim = min(i, j), max(i, j)
+            else:
+                inicio, fim = (i if j is None else j), len(self._ordem) - 1
+            for k, atual in enumerate(self._ordem.fatia(inicio, fim + 1), start=inicio):
+                alteradas.append((atual[-1], k + 1))
+            return alteradas
+
+    def carregar(self, chaves: dict):
+        with self._lock:
+            self._chaves = {id_inscricao: chave for id_inscricao, chave in chaves.items() if chave is not None}
+            self._ordem = ListaOrdenada()
+            for chave in sorted(self._chaves.values()):
+                self._ordem.inserir(chave)
+
+    def separar(self, alteradas, existente: Optional[int] = None, removida: Optional[int] = None):
+        # Divide as posições alteradas em UPDATE (já têm Resultado) e INSERT; `existente` trouxe um Resultado de
+        # outra prova, `removida` deixou a prova
+        with self._lock:
+            if existente is not None:
+                self.com_resultado.add(existente)
+            if removida is not None:
+                self.com_resultado.discard(removida)
+            atualizar = [(id_inscricao, posicao) for id_inscricao, posicao in alteradas if id_inscricao in self.com_resultado]
+            novos = [
+                (id_inscricao, posicao) for id_inscricao, posicao in alteradas
+                if id_inscricao not in self.com_resultado and posicao is not None
+            ]
+            self.com_resultado.update(id_inscricao for id_inscricao, _ in novos)
+            return atualizar, novos
+
+    def posicoes(self) -> list[tuple[int, int]]:
+        with self._lock:
+            return [(chave[-1], k + 1) for k, chave in enumerate(self._ordem)]
+
+    def classificacao(self) -> list[dict]:
+        with self._lock:
+            return [
+                {"posicao": k + 1, "id_inscricao": chave[2], "penalidades": chave[0], "tempo_prova": chave[1]}
+                for k, chave in enumerate(self._ordem)
+            ]
+
+
+_classificacoes: dict[int, ClassificacaoProva] = {}
+# Incrementado a cada descarte: uma carga que começou antes não é instalada com dados velhos
+_descartes: dict[int, int] = defaultdict(int)
+# Protege só o dicionário: nenhuma consulta ao banco é feita com ele (ou com o lock de uma prova) adquirido
+_lock = threading.Lock()
+
+
+def _travar(db: Session, id_prova: Optional[int]):
+    # PostgreSQL: escritores da mesma prova (em qualquer worker) em fila até o commit, para que as posições sejam
+    # gravadas na ordem em que a classificação em memória mudou. No SQLite o flush anterior já tomou a trava de escrita
+    if id_prova is not None and db.get_bind().dialect.name == "postgresql":
+        db.execute(select(func.pg_advisory_xact_lock(TRAVA, id_prova)))
+
+
+def _avancar(db: Session, id_prova: Optional[int]) -> Optional[int]:
+    # Conta no banco cada mudança da classificação da prova (qualquer worker); None se a prova não existe
+    if id_prova is None:
+        return None
+    tabela = Prova.__table__
+    return db.execute(
+        tabela.update().where(tabela.c.id_prova == id_prova)
+        # atualizado_em fica: a prova em si não mudou
+        .values(versao_classificacao=tabela.c.versao_classificacao + 1, atualizado_em=tabela.c.atualizado_em)
+        .returning(tabela.c.versao_classificacao)
+    ).scalar()
+
+
+def _carregar(db: Session, id_prova: int):
+    # Devolve (classificação, posições gravadas que divergem da calculada) ou None se a prova não existe
+    prova = db.query(Prova.tsp, Prova.tmp, Prova.versao_classificacao).filter(Prova.id_prova == id_prova).first()
+    if prova is None:
+        return None
+    classificacao = ClassificacaoProva(id_prova, prova.tsp, prova.tmp, prova.versao_classificacao)
+    inscricoes = db.query(
+        Inscricao.id_inscricao, Inscricao.tempo_prova, Inscricao.faltas_prova,
+        Inscricao.recusas_prova, Inscricao.status,
+    ).filter(Inscricao.id_prova == id_prova).all()
+    classificacao.carregar({
+        inscricao.id_inscricao: chave_classificacao(inscricao, prova.tsp, prova.tmp) for inscricao in inscricoes
+    })
+
+    gravadas = dict(
+        db.query(Resultado.id_inscricao, Resultado.posicao)
+        .join(Inscricao, Resultado.id_inscricao == Inscricao.id_inscricao)
+        .filter(Inscricao.id_prova == id_prova)
+        .all()
+    )
+    classificacao.com_resultado = set(gravadas)
+    atuais = dict(classificacao.posicoes())
+    divergentes = [
+        (id_inscricao, atuais.get(id_inscricao))
+        for id_inscricao in {*gravadas, *atuais}
+        if gravadas.get(id_inscricao) != atuais.get(id_inscricao)
+    ]
+    return classificacao, divergentes
+
+
+def _gravar_posicoes(db: Session, atualizar, novos):
+    tabela = Resultado.__table__
+    if atualizar:
+        db.execute(
+            tabela.update()
+            .where(tabela.c.id_inscricao == bindparam("b_id_inscricao"))
+            .values(posicao=bindparam("b_posicao"), versao=tabela.c.versao + 1),
+            [{"b_id_inscricao": id_inscricao, "b_posicao": posicao} for id_inscricao, posicao in atualizar],
+        )
+        alteracoes.registrar(
+            db, "resultado", Resultado.id_inscricao.in_([id_inscricao for id_inscricao, _ in atualizar]), alteracoes.ATUALIZADA,
+        )
+    if novos:
+        db.execute(tabela.insert(), [{"id_inscricao": id_inscricao, "posicao": posicao} for id_inscricao, posicao in novos])
+        alteracoes.registrar(
+            db, "resultado", Resultado.id_inscricao.in_([id_inscricao for id_inscricao, _ in novos]), alteracoes.CRIADA,
+        )
+
+
+def _obter(db: Session, id_prova: int, versao: int):
+    # (classificação, posições gravadas agora para alinhar o banco a ela); a lista só vem preenchida na carga.
+    # `versao`: a do banco antes desta transação mexer na classificação; outra na memória é recarregada
+    with _lock:
+        classificacao = _classificacoes.get(id_prova)
+        if classificacao is not None and classificacao.versao != versao:
+            # Outro worker gravou percursos desta prova depois da nossa carga
+            _classificacoes.pop(id_prova)
+            _descartes[id_prova] += 1
+            classificacao = None
+        geracao = _descartes[id_prova]
+    if classificacao is not None:
+        return classificacao, []
+    carregada = _carregar(db, id_prova)
+    if carregada is None:
+        return None, []
+    classificacao, divergentes = carregada
+    with _lock:
+        if _descartes[id_prova] == geracao:
+            # Duas cargas simultâneas: fica a primeira instalada
+            classificacao = _classificacoes.setdefault(id_prova, classificacao)
+    if classificacao is not carregada[0]:
+        return classificacao, []
+    # Sincroniza uma única vez as posições gravadas à mão com a ordem calculada
+    _gravar_posicoes(db, *classificacao.separar(divergentes))
+    return classificacao, divergentes
+
+
+def obter(db: Session, id_prova: int) -> Optional[ClassificacaoProva]:
+    versao = db.query(Prova.versao_classificacao).filter(Prova.id_prova == id_prova).scalar()
+    if versao is None:
+        return None
+    return _obter(db, id_prova, versao)[0]
+
+
+def registrar_percurso(db: Session, inscricao: Inscricao, com_resultado: bool = False):
+    # Chamado dentro da transação de crud.update_inscricao, antes do commit. `com_resultado`: a inscrição
+    # veio de outra prova trazendo o seu Resultado, que passa a ser atualizado em vez de inserir outro
+    _travar(db, inscricao.id_prova)
+    versao = _avancar(db, inscricao.id_prova)
+    if versao is None:
+        return []
+    classificacao, carregadas = _obter(db, inscricao.id_prova, versao - 1)
+    if classificacao is None:
+        return []
+    chave = chave_classificacao(inscricao, classificacao.tsp, classificacao.tmp)
+    alteradas = classificacao.atualizar(inscricao.id_inscricao, chave)
+    classificacao.versao = versao
+    existente = inscricao.id_inscricao if com_resultado else None
+    _gravar_posicoes(db, *classificacao.separar(alteradas, existente=existente))
+    # Carga a frio já com este percurso (flush anterior): as posições que ela gravou também mudaram
+    return list({**dict(carregadas), **dict(alteradas)}.items())
+
+
+def remover_inscricao(db: Session, id_prova: Optional[int], id_inscricao: int) -> bool:
+    """Take an inscrição out of a Prova's standings; True if it has a Resultado (kept, without posicao)."""
+    _travar(db, id_prova)
+    # O Resultado da própria inscrição perde a posição, com a classificação em memória ou não
+    # (chamar antes de desvincular o Resultado, na remoção da inscrição)
+    tabela = Resultado.__table__
+    resultados = db.scalars(
+        tabela.update().where(tabela.c.id_inscricao == id_inscricao)
+        .values(posicao=None, versao=tabela.c.versao + 1)
+        .returning(tabela.c.id_resultado)
+    ).all()
+    if resultados:
+        alteracoes.registrar(db, "resultado", Resultado.id_resultado.in_(resultados), alteracoes.ATUALIZADA)
+    versao = _avancar(db, id_prova)
+    with _lock:
+        classificacao = _classificacoes.get(id_prova)
+    if classificacao is not None and (versao is None or classificacao.versao != versao - 1):
+        # Cópia desatualizada (outro worker): a próxima consulta recarrega já sem a inscrição
+        descartar(id_prova)
+    elif classificacao is not None:
+        alteradas = classificacao.atualizar(id_inscricao, None)
+        classificacao.versao = versao
+        outras = [(i, p) for i, p in alteradas if i != id_inscricao]
+        _gravar_posicoes(db, *classificacao.separar(outras, removida=id_inscricao))
+    return bool(resultados)
+
+
+def descartar(id_prova: int):
+    # Força a reconstrução na próxima consulta (ex.: commit falhou)
+    with _lock:
+        _classificacoes.pop(id_prova, None)
+        _descartes[id_prova] += 1
+
+
+def invalidar(db: Session, id_prova: int):
+    """Rebuild a Prova's standings in every worker after a change that skips registrar_percurso (rescore, bulk)."""
+    _travar(db, id_prova)
+    _avancar(db, id_prova)
+    descartar(id_prova)
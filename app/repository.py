@@ -0,0 +1,95 @@
+# app/repository.py
+
+from typing import Optional
+from sqlalchemy import delete, exists, select, update
+from sqlalchemy.orm import Session
+from .models import Avaliacao, Cao, Competicao, Competidor, Cronometragem, Inscricao, Juiz, Prova, Resultado, User
+
+
+class VersaoDivergente(Exception):
+    """The row exists but its versao no longer matches the client's If-Match."""
+
+    def __init__(self, atual: int):
+        super().__init__(f"Versão divergente: a atual é {atual}")
+        self.atual = atual
+
+
+class EmUso(Exception):
+    """The row is still referenced through a non-nullable FK, so it cannot be deleted."""
+
+
+def versionar(model, valores: dict) -> dict:
+    # UPDATE fora do flush do ORM também incrementa a versão dos modelos versionados
+    if "versao" in model.__table__.c:
+        return {**valores, "versao": model.__table__.c.versao + 1}
+    return valores
+
+
+def conferir_versao(obj, versao: Optional[int]):
+    if versao is not None and obj.versao != versao:
+        raise VersaoDivergente(obj.versao)
+
+
+class Repository:
+    """Primary-key get/update/delete for one model, each in a single statement."""
+
+    def __init__(self, model, pk, desvincular=(), impedir=()):
+        self.model = model
+        self.pk = pk
+        # FKs anuláveis que apontam para este modelo: zeradas antes do DELETE, como o ORM fazia
+        self.desvincular = desvincular
+        # FKs NOT NULL: com alguma linha apontando, o DELETE é recusado (o SQLite deixaria órfãos, o PostgreSQL falharia)
+        self.impedir = impedir
+
+    def get(self, db: Session, key, options=()):
+        return db.get(self.model, key, options=options)
+
+    def validadores(self, db: Session, key):
+        # Só versao e carimbos de tempo, pela PK: base do GET condicional sem carregar a linha inteira
+        colunas = [self.model.versao] + [
+            getattr(self.model, nome) for nome in ("atualizado_em", "criado_em") if hasattr(self.model, nome)
+        ]
+        return db.query(*colunas).filter(self.pk == key).first()
+
+    def update(self, db: Session, key, data: dict, versao: Optional[int] = None):
+        # UPDATE ... RETURNING: atualização parcial sem SELECT antes nem refresh depois; None se não existe.
+        # Com `versao` (If-Match) é um compare-and-swap no mesmo statement: WHERE pk = :key AND versao = :versao
+        if not data:
+            obj = self.get(db, key)
+            if obj is not None:
+                conferir_versao(obj, versao)
+            return obj
+        stmt = update(self.model).where(self.pk == key)
+        if versao is not None:
+            stmt = stmt.where(self.model.versao == versao)
+        obj = db.scalar(stmt.values(**versionar(self.model, data)).returning(self.model))
+        if obj is None and versao is not None:
+            # Só no caminho de falha: distingue chave inexistente (404) de versão divergente (412)
+            atual = db.query(self.model.versao).filter(self.pk == key).scalar()
+            if atual is not None:
+                raise VersaoDivergente(atual)
+        return obj
+
+    def delete(self, db: Session, key, *returning):
+        # Sem `returning` devolve se alguma linha foi removida (rowcount); com, a linha removida ou None
+        for fk in self.impedir:
+            if db.scalar(select(exists().where(fk == key))):
+                raise EmUso(f"{self.model.__name__} {key} ainda referenciado em {fk.class_.__tablename__}")
+        for fk in self.desvincular:
+            db.execute(update(fk.class_).where(fk == key).values(versionar(fk.class_, {fk.key: None})))
+        stmt = delete(self.model).where(self.pk == key)
+        if returning:
+            return db.execute(stmt.returning(*returning)).first()
+        return db.execute(stmt).rowcount > 0
+
+
+users = Repository(User, User.id, desvincular=[Competicao.responsavel_id])
+competicoes = Repository(Competicao, Competicao.id_competicao, desvincular=[Prova.id_competicao])
+provas = Repository(Prova, Prova.id_prova, desvincular=[Inscricao.id_prova, Avaliacao.id_prova])
+inscricoes = Repository(Inscricao, Inscricao.id_inscricao, desvincular=[Cronometragem.id_inscricao, Resultado.id_inscricao])
+competidores = Repository(Competidor, Competidor.id_competidor, desvincular=[Inscricao.id_competidor])
+caes = Repository(Cao, Cao.microchip, impedir=[Inscricao.microchip_cao])
+juizes = Repository(Juiz, Juiz.id_juiz, desvincular=[Avaliacao.id_juiz])
+resultados = Repository(Resultado, Resultado.id_resultado)
+avaliacoes = Repository(Avaliacao, Avaliacao.id_avaliacao)
+cronometros = Repository(Cronometragem, Cronometragem.id_cronometro)
@@ -0,0 +1,129 @@
+# app/scheduler.py
+
+import heapq
+from collections import defaultdict, deque
+from datetime import datetime, timedelta
+from typing import NamedTuple, Optional
+from sqlalchemy import bindparam
+from sqlalchemy.orm import Session
+from . import scoring
+from .models import Cao, Competicao, Inscricao, Prova
+
+ESPACAMENTO = 5          # percursos de outros condutores entre dois cães do mesmo condutor
+INTERVALO_PERCURSO = 30  # s entre a saída de um cão e a entrada do próximo
+TROCA_ALTURA = 300       # s para ajustar os obstáculos quando a altura de salto muda
+INTERVALO_PROVA = 600    # s entre provas (reconhecimento de pista)
+
+# Só percursos ainda por correr: quem já tem tempo ou foi eliminado mantém o horário
+A_AGENDAR = Inscricao.tempo_prova.is_(None) & (Inscricao.status != scoring.ELIMINADO)
+
+
+class Percurso(NamedTuple):
+    id_inscricao: int
+    id_competidor: Optional[int]
+    categoria_salto: str
+
+    @property
+    def condutor(self):
+        # Inscrição sem competidor não disputa espaçamento com ninguém
+        return self.id_competidor if self.id_competidor is not None else ("inscricao", self.id_inscricao)
+
+
+def espacar(percursos: list[Percurso], espacamento: int, ultimo: dict, posicao: int) -> tuple[list[Percurso], int]:
+    """Order one jump-height group so the same handler is at least `espacamento` runs apart."""
+    por_condutor = defaultdict(deque)
+    for percurso in percursos:
+        por_condutor[percurso.condutor].append(percurso)
+    # Prontos: condutor com mais cães primeiro; esperando: (posição em que fica livre, item)
+    prontos, esperando = [], []
+    for ordem, (condutor, fila) in enumerate(por_condutor.items()):
+        item = (-len(fila), ordem, condutor)
+        livre = ultimo[condutor] + espacamento + 1 if condutor in ultimo else posicao
+        if livre <= posicao:
+            heapq.heappush(prontos, item)
+        else:
+            heapq.heappush(esperando, (livre, item))
+
+    saida = []
+    while prontos or esperando:
+        while esperando and esperando[0][0] <= posicao:
+            heapq.heappush(prontos, heapq.heappop(esperando)[1])
+        if prontos:
+            _, ordem, condutor = heapq.heappop(prontos)
+        else:
+            # Todos os condutores restantes ainda em intervalo: entra o que fica livre antes
+            _, (_, ordem, condutor) = heapq.heappop(esperando)
+        fila = por_condutor[condutor]
+        saida.append(fila.popleft())
+        ultimo[condutor] = posicao
+        posicao += 1
+        if fila:
+            heapq.heappush(esperando, (posicao + espacamento, (-len(fila), ordem, condutor)))
+    return saida, posicao
+
+
+def planejar(
+    db: Session,
+    id_competicao: int,
+    inicio: Optional[datetime] = None,
+    espacamento: int = ESPACAMENTO,
+    intervalo_percurso: int = INTERVALO_PERCURSO,
+    troca_altura: int = TROCA_ALTURA,
+    intervalo_prova: int = INTERVALO_PROVA,
+) -> Optional[dict]:
+    """Build the start order of every Prova of a Competicao and write all hora_inicio in one batch."""
+    competicao = db.get(Competicao, id_competicao)
+    if competicao is None:
+        return None
+    provas = db.query(Prova.id_prova, Prova.tmp).filter(Prova.id_competicao == id_competicao).order_by(Prova.id_prova).all()
+    linhas = (
+        db.query(Inscricao.id_prova, Inscricao.id_inscricao, Inscricao.id_competidor, Cao.categoria_salto)
+        .join(Cao, Cao.microchip == Inscricao.microchip_cao)
+        .join(Prova, Prova.id_prova == Inscricao.id_prova)
+        .filter(Prova.id_competicao == id_competicao, A_AGENDAR)
+        .order_by(Inscricao.id_inscricao)
+        .all()
+    )
+    por_prova = defaultdict(lambda: defaultdict(list))
+    for linha in linhas:
+        por_prova[linha.id_prova][linha.categoria_salto].append(Percurso(linha.id_inscricao, linha.id_competidor, linha.categoria_salto))
+
+    hora = inicio or competicao.data
+    ultimo, posicao = {}, 0
+    altura_atual, crescente = None, True
+    horarios, resumo, trocas = [], [], 0
+    for prova in provas:
+        grupos = por_prova.get(prova.id_prova)
+        if not grupos:
+            continue
+        if resumo:
+            hora += timedelta(seconds=intervalo_prova)
+        inicio_prova = hora
+        # Alturas em zigue-zague entre provas: a última altura de uma prova é a primeira da seguinte
+        alturas = sorted(grupos, reverse=not crescente)
+        crescente = not crescente
+        percursos = 0
+        for altura in alturas:
+            if altura_atual is not None and altura != altura_atual:
+                hora += timedelta(seconds=troca_altura)
+                trocas += 1
+            altura_atual = altura
+            ordem, posicao = espacar(grupos[altura], espacamento, ultimo, posicao)
+            for percurso in ordem:
+                horarios.append({"b_id_inscricao": percurso.id_inscricao, "hora_inicio": hora})
+                hora += timedelta(seconds=prova.tmp + intervalo_percurso)
+            percursos += len(ordem)
+        resumo.append({"id_prova": prova.id_prova, "percursos": percursos, "inicio": inicio_prova, "fim": hora})
+
+    if horarios:
+        tabela = Inscricao.__table__
+        db.execute(
+            tabela.update().where(tabela.c.id_inscricao == bindparam("b_id_inscricao")).values(versao=tabela.c.versao + 1),
+            horarios,
+        )
+    return {
+        "id_competicao": id_competicao,
+        "agendadas": len(horarios),
+        "trocas_de_altura": trocas,
+        "provas": resumo,
+    }
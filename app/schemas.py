@@ -1,6 +1,11 @@
 # app/schemas.py
-from typing import Optional
-from pydantic import BaseModel, field_validator
+from datetime import datetime
+from typing import Annotated, Literal, Optional
+from pydantic import BaseModel, PlainSerializer, model_validator
+from sqlalchemy import inspect
+
+# Datetime nativo: o Pydantic faz o parse na entrada e a saída JSON continua em isoformat()
+IsoDateTime = Annotated[datetime, PlainSerializer(datetime.isoformat, return_type=str, when_used="json")]
 
 # User Schemas
 class UserCreate(BaseModel):
@@ -16,7 +21,7 @@ class UserResponse(BaseModel):
 # Competition Schemas
 class CompeticaoCreate(BaseModel):
     nome: str
-    data: str  # Use str for date in ISO format
+    data: datetime
     localizacao: str
     nomes_arbitros_convidados: str = None
     nome_diretor_evento: str = None
@@ -26,7 +31,7 @@ class CompeticaoCreate(BaseModel):
 
 class CompeticaoUpdate(BaseModel):
     nome: str = None
-    data: str = None
+    data: datetime = None
     localizacao: str = None
     nomes_arbitros_convidados: str = None
     nome_diretor_evento: str = None
@@ -36,19 +41,14 @@ class CompeticaoUpdate(BaseModel):
 class CompeticaoResponse(BaseModel):
     id_competicao: int
     nome: str
-    data: str
+    data: IsoDateTime
     localizacao: str
     nomes_arbitros_convidados: Optional[str] = None
     nome_diretor_evento: Optional[str] = None
     nome_responsavel_secretaria: Optional[str] = None
     nome_veterinario: Optional[str] = None
-    responsavel_id: int
-
-    @field_validator("data", mode="before")
-    def date_to_str(cls, v):
-        if isinstance(v, (str, type(None))):
-            return v
-        return v.isoformat()
+    responsavel_id: Optional[int] = None
+    versao: int
 
     class Config:
         from_attributes = True
@@ -69,8 +69,8 @@ class ProvaUpdate(BaseModel):
     categoria: Optional[str] = None
     classe: Optional[str] = None
     num_obstaculos: Optional[int] = None
-    tsp: Optional[int] = None
-    tmp: Optional[int] = None
+    tsp: Optional[float] = None
+    tmp: Optional[float] = None
     vel_media_necessaria: Optional[float] = None
     comprimento_pista: Optional[int] = None
     descricao: Optional[str] = None
@@ -80,20 +80,15 @@ class ProvaResponse(BaseModel):
     categoria: str
     classe: str
     num_obstaculos: int
-    tsp: int
-    tmp: int
+    tsp: float
+    tmp: float
     vel_media_necessaria: float
     comprimento_pista: int
     descricao: Optional[str] = None
-    id_competicao: int
-    criado_em: str
-    atualizado_em: Optional[str] = None
-
-    @field_validator("criado_em", "atualizado_em", mode="before")
-    def dt_to_str(cls, v):
-        if isinstance(v, (str, type(None))):
-            return v
-        return v.isoformat()
+    id_competicao: Optional[int] = None
+    criado_em: IsoDateTime
+    atualizado_em: Optional[IsoDateTime] = None
+    versao: int
 
     class Config:
         from_attributes = True
@@ -110,7 +105,7 @@ class InscricaoCreate(BaseModel):
     recusas_prova: Optional[int] = None
     vel_media: Optional[float] = None
     pontuacao: Optional[int] = None
-    hora_inicio: Optional[str] = None  # Use str for datetime in ISO format
+    hora_inicio: Optional[datetime] = None
     status: str = "pendente"
 
 class InscricaoUpdate(BaseModel):
@@ -123,13 +118,14 @@ class InscricaoUpdate(BaseModel):
     recusas_prova: Optional[int] = None
     vel_media: Optional[float] = None
     pontuacao: Optional[int] = None
-    hora_inicio: Optional[str] = None  # Use str for datetime in ISO format
+    hora_inicio: Optional[datetime] = None
     status: Optional[str] = None
 
 class InscricaoResponse(BaseModel):
     id_inscricao: int
-    id_prova: int
-    id_competidor: int
+    # Chaves estrangeiras ficam nulas quando o registro pai é removido (repository.desvincular)
+    id_prova: Optional[int] = None
+    id_competidor: Optional[int] = None
     microchip_cao: str
     colete_competidor: str
     tempo_prova: Optional[float] = None
@@ -137,14 +133,9 @@ class InscricaoResponse(BaseModel):
     recusas_prova: Optional[int] = None
     vel_media: Optional[float] = None
     pontuacao: Optional[int] = None
-    hora_inicio: Optional[str] = None  # Use str for datetime in ISO format
+    hora_inicio: Optional[IsoDateTime] = None
     status: str
-
-    @field_validator("hora_inicio", mode="before")
-    def dt_to_str(cls, v):
-        if isinstance(v, (str, type(None))):
-            return v
-        return v.isoformat()
+    versao: int
 
     class Config:
         from_attributes = True
@@ -162,6 +153,7 @@ class CompetidorResponse(BaseModel):
     id_competidor: int
     nome: str
     escola: str
+    versao: int
     class Config:
         from_attributes = True
 
@@ -188,6 +180,7 @@ class CaoResponse(BaseModel):
     cernelha: str
     categoria_salto: str
     is_cao_branco: bool
+    versao: int
     class Config:
         from_attributes = True
 
@@ -204,6 +197,7 @@ class JuizResponse(BaseModel):
     id_juiz: int
     nome: str
     email: str
+    versao: int
     class Config:
         from_attributes = True
 
@@ -222,13 +216,70 @@ class ResultadoUpdate(BaseModel):
 
 class ResultadoResponse(BaseModel):
     id_resultado: int
-    id_inscricao: int
+    id_inscricao: Optional[int] = None
     posicao: Optional[int] = None  # Permite nulo
     total_pontos_t: Optional[int] = None
     total_pontos_tp: Optional[int] = None
+    versao: int
     class Config:
         from_attributes = True
 
+class ClassificacaoResponse(BaseModel):
+    posicao: int
+    id_inscricao: int
+    penalidades: float
+    tempo_prova: float
+
+class RescoreResponse(BaseModel):
+    id_prova: int
+    reavaliadas: int
+
+# Cronograma (ordem de largada)
+class CronogramaRequest(BaseModel):
+    inicio: Optional[datetime] = None  # padrão: data da competição
+    espacamento: int = 5
+    intervalo_percurso: int = 30
+    troca_altura: int = 300
+    intervalo_prova: int = 600
+
+class CronogramaProvaResponse(BaseModel):
+    id_prova: int
+    percursos: int
+    inicio: IsoDateTime
+    fim: IsoDateTime
+
+class CronogramaResponse(BaseModel):
+    id_competicao: int
+    agendadas: int
+    trocas_de_altura: int
+    provas: list[CronogramaProvaResponse]
+
+# Ranking da temporada
+class RankingTemporadaResponse(BaseModel):
+    posicao: int
+    microchip: Optional[str] = None
+    id_competidor: Optional[int] = None
+    nome: Optional[str] = None
+    pontos: int
+    pontos_tp: int
+    provas: int
+
+# Estatísticas
+class EstatisticaResponse(BaseModel):
+    inscritos: int
+    percursos: int
+    limpos: int
+    eliminados: int
+    vel_media: Optional[float] = None
+    melhor_tempo: Optional[float] = None
+
+class EstatisticaCategoriaResponse(EstatisticaResponse):
+    categoria_salto: str
+
+class StatsResponse(BaseModel):
+    total: EstatisticaResponse
+    categorias: list[EstatisticaCategoriaResponse]
+
 # Avaliacao
 class AvaliacaoCreate(BaseModel):
     id_prova: int
@@ -244,52 +295,116 @@ class AvaliacaoUpdate(BaseModel):
 
 class AvaliacaoResponse(BaseModel):
     id_avaliacao: int
-    id_prova: int
-    id_juiz: int
+    id_prova: Optional[int] = None
+    id_juiz: Optional[int] = None
     diretor_prova: str
     comentarios: Optional[str] = None
-    criado_em: Optional[str] = None
-    atualizado_em: Optional[str] = None
-
-    @field_validator("criado_em", "atualizado_em", mode="before")
-    def dt_to_str(cls, v):
-        if isinstance(v, (str, type(None))):
-            return v
-        return v.isoformat()
+    criado_em: Optional[IsoDateTime] = None
+    atualizado_em: Optional[IsoDateTime] = None
+    versao: int
 
     class Config:
         from_attributes = True
 
+# Importação em lote
+class BulkError(BaseModel):
+    indice: int
+    erro: str
+
+class BulkResponse(BaseModel):
+    inseridos: int
+    erros: list[BulkError]
+
+# Sincronização em lote (diário de escrita dos computadores de pista)
+class SyncOperacao(BaseModel):
+    id_operacao: str  # gerado no dispositivo (ex.: UUID); reenvios com o mesmo id não reaplicam
+    entidade: Literal["cronometro", "inscricao", "resultado"]
+    acao: Literal["create", "update", "delete"]
+    id: Optional[int] = None  # chave do registro em update/delete
+    versao: Optional[int] = None  # em update: aplica só se o registro ainda estiver nesta versão
+    dados: dict = {}
+    carimbo: Optional[datetime] = None  # hora do dispositivo em que a operação foi registrada
+
+class SyncBatchRequest(BaseModel):
+    dispositivo: str
+    operacoes: list[SyncOperacao]
+
+class SyncResultado(BaseModel):
+    id_operacao: str
+    status: Literal["aplicada", "duplicada", "erro"]
+    id: Optional[int] = None
+    dados: Optional[dict] = None  # estado do registro após o lote (None se removido)
+    erro: Optional[str] = None
+
+class SyncBatchResponse(BaseModel):
+    resultados: list[SyncResultado]
+
+# Feed de alterações por competição
+class AlteracaoResponse(BaseModel):
+    seq: int
+    entidade: Literal["prova", "inscricao", "cronometro", "resultado", "avaliacao"]
+    id: int
+    acao: Literal["create", "update", "delete"]
+    dados: Optional[dict] = None  # estado atual do registro (None na remoção)
+
+class AlteracoesResponse(BaseModel):
+    alteracoes: list[AlteracaoResponse]
+    cursor: int  # enviar como ?since= na próxima chamada
+    mais: bool  # há mais alterações depois do cursor
+
 # Cronometragem
 class CronometragemCreate(BaseModel):
     id_inscricao: int
-    tempo_inicial: str  # ISO format
-    tempo_final: Optional[str] = None
+    tempo_inicial: datetime
+    tempo_final: Optional[datetime] = None
     status: str = "parado"
     tempo_oficial: Optional[float] = None
 
 class CronometragemUpdate(BaseModel):
     id_inscricao: Optional[int] = None
-    tempo_inicial: Optional[str] = None
-    tempo_final: Optional[str] = None
+    tempo_inicial: Optional[datetime] = None
+    tempo_final: Optional[datetime] = None
     status: Optional[str] = None
     tempo_oficial: Optional[float] = None
 
 class CronometragemResponse(BaseModel):
     id_cronometro: int
-    id_inscricao: int
-    tempo_inicial: str
-    tempo_final: Optional[str] = None
+    id_inscricao: Optional[int] = None
+    tempo_inicial: IsoDateTime
+    tempo_final: Optional[IsoDateTime] = None
     status: str
     tempo_oficial: Optional[float] = None
-    criado_em: Optional[str] = None
-    atualizado_em: Optional[str] = None
-
-    @field_validator("tempo_inicial", "tempo_final", "criado_em", "atualizado_em", mode="before")
-    def dt_to_str(cls, v):
-        if isinstance(v, (str, type(None))):
-            return v
-        return v.isoformat()
+    criado_em: Optional[IsoDateTime] = None
+    atualizado_em: Optional[IsoDateTime] = None
+    versao: int
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+# Leituras expandidas (?expand=): só os relacionamentos carregados entram na resposta
+def _somente_carregados(obj):
+    estado = inspect(obj, raiseerr=False)
+    if estado is None or not hasattr(estado, "unloaded"):
+        return obj
+    # Relacionamento fora do expand continua descarregado: omitido em vez de disparar um lazy load
+    return {nome: getattr(obj, nome) for nome in estado.mapper.attrs.keys() if nome not in estado.unloaded}
+
+class InscricaoDetalhada(InscricaoResponse):
+    cao: Optional[CaoResponse] = None
+    competidor: Optional[CompetidorResponse] = None
+    cronometros: Optional[list[CronometragemResponse]] = None
+    resultados: Optional[list[ResultadoResponse]] = None
+
+    @model_validator(mode="before")
+    @classmethod
+    def carregados(cls, obj):
+        return _somente_carregados(obj)
+
+class ProvaDetalhada(ProvaResponse):
+    inscricoes: Optional[list[InscricaoDetalhada]] = None
+    avaliacoes: Optional[list[AvaliacaoResponse]] = None
+
+    @model_validator(mode="before")
+    @classmethod
+    def carregados(cls, obj):
+        return _somente_carregados(obj)
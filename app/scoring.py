@@ -0,0 +1,93 @@
+# app/scoring.py
+
+import math
+from typing import NamedTuple, Optional
+
+PENALIDADE_FALTA = 5
+PENALIDADE_RECUSA = 5
+MAX_RECUSAS = 3
+# Casas decimais mantidas antes do teto da pontuação: descarta o ruído do float (41.1 - 40 = 1.1000000000000014)
+# sem perder milésimos do cronômetro
+CASAS_PONTUACAO = 6
+
+ELIMINADO = "eliminado"
+
+# Campos da inscrição dos quais a pontuação é derivada (a prova define TSP/TMP/pista)
+CAMPOS_DE_PONTUACAO = {"tempo_prova", "faltas_prova", "recusas_prova", "status", "id_prova"}
+# Campos da prova que mudam a pontuação de todas as inscrições
+CAMPOS_DA_PROVA = {"tsp", "tmp", "comprimento_pista"}
+
+
+class Pontuacao(NamedTuple):
+    faltas_tempo: Optional[float]
+    penalidades: Optional[float]
+    eliminado: bool
+    vel_media: Optional[float]
+    pontuacao: Optional[int]
+
+
+def faltas_de_tempo(tempo: float, tsp: float) -> float:
+    # Cada segundo acima do TSP conta uma falta de tempo
+    return max(0.0, tempo - tsp)
+
+
+def status_do_juiz(inscricao) -> str:
+    # status_juiz nulo (linha anterior à coluna, ou nunca eliminada pelo percurso): o status gravado é o do juiz
+    return inscricao.status_juiz if inscricao.status_juiz is not None else inscricao.status
+
+
+def eliminado(tempo: Optional[float], recusas: Optional[int], tmp: float, status: Optional[str] = None) -> bool:
+    # `status` é o do juiz: a eliminação pelo percurso é sempre recalculada a partir de tempo/recusas/TMP
+    if status == ELIMINADO:
+        return True
+    if (recusas or 0) >= MAX_RECUSAS:
+        return True
+    return tempo is not None and tempo > tmp
+
+
+def penalidades(tempo: float, faltas: Optional[int], recusas: Optional[int], tsp: float) -> float:
+    return (faltas or 0) * PENALIDADE_FALTA + (recusas or 0) * PENALIDADE_RECUSA + faltas_de_tempo(tempo, tsp)
+
+
+def pontos(total: float) -> int:
+    # Teto: qualquer fração de segundo acima do TSP custa um ponto inteiro, então uma falta de tempo nunca vira
+    # percurso limpo (pontuação 0); round() arredondaria 0.4 para 0 e 4.5 para 4 (arredondamento bancário)
+    return math.ceil(round(total, CASAS_PONTUACAO))
+
+
+def pontuar(tempo, faltas, recusas, status, tsp: float, tmp: float, comprimento_pista) -> Pontuacao:
+    if eliminado(tempo, recusas, tmp, status):
+        return Pontuacao(None, None, True, None, None)
+    if tempo is None:
+        return Pontuacao(None, None, False, None, None)
+    total = penalidades(tempo, faltas, recusas, tsp)
+    vel_media = comprimento_pista / tempo if tempo > 0 and comprimento_pista else None
+    return Pontuacao(faltas_de_tempo(tempo, tsp), total, False, vel_media, pontos(total))
+
+
+def campos_pontuados(pontuacao: Pontuacao, status_juiz: str) -> dict:
+    # Valores a gravar na Inscricao: o status do juiz fica em status_juiz, então uma correção que tira
+    # a eliminação do percurso (TMP maior, tempo ou recusas corrigidos) devolve o status anterior
+    return {
+        "vel_media": pontuacao.vel_media,
+        "pontuacao": pontuacao.pontuacao,
+        "status": ELIMINADO if pontuacao.eliminado else status_juiz,
+        "status_juiz": status_juiz,
+    }
+
+
+def pontuar_lote(inscricoes, tsp: float, tmp: float, comprimento_pista) -> list[dict]:
+    """Rescore every row of a Prova in one pass; returns only the rows whose stored values change."""
+    alteradas = []
+    for inscricao in inscricoes:
+        status_juiz = status_do_juiz(inscricao)
+        resultado = pontuar(
+            inscricao.tempo_prova, inscricao.faltas_prova, inscricao.recusas_prova, status_juiz,
+            tsp, tmp, comprimento_pista,
+        )
+        campos = campos_pontuados(resultado, status_juiz)
+        if (campos["vel_media"], campos["pontuacao"], campos["status"]) != (
+            inscricao.vel_media, inscricao.pontuacao, inscricao.status,
+        ):
+            alteradas.append({"b_id_inscricao": inscricao.id_inscricao, **campos})
+    return alteradas
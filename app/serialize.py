@@ -0,0 +1,21 @@
+# app/serialize.py
+
+import functools
+import orjson
+
+
+def colunas(model, schema) -> list:
+    # Só as colunas do schema de resposta, na mesma ordem dos campos
+    return [getattr(model, nome) for nome in schema.model_fields]
+
+
+@functools.cache
+def _campos(schema) -> tuple:
+    return tuple(schema.model_fields)
+
+
+def linhas_json(model, schema, rows) -> bytes:
+    # Mesmo JSON do response_model=list[schema], sem validar linha a linha: datetimes saem em isoformat pelo orjson.
+    # Os valores saem como o banco devolve, então os tipos do schema precisam ser os das colunas (Float -> float)
+    campos = _campos(schema)
+    return orjson.dumps([dict(zip(campos, row)) for row in rows])
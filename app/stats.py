@@ -0,0 +1,233 @@
+# app/stats.py
+
+from typing import NamedTuple, Optional
+from sqlalchemy import case, delete, func, select
+from sqlalchemy.orm import Session
+from . import scoring
+from .models import Cao, EstatisticaProva, Inscricao, Prova
+
+# Campos da inscrição que alteram o resumo (além dos de pontuação, que mudam pontuacao/vel_media/status)
+CAMPOS = {"id_prova", "microchip_cao", "tempo_prova", "status", "pontuacao", "vel_media"}
+CONTADORES = ("inscritos", "percursos", "limpos", "eliminados", "soma_vel_media", "com_vel_media")
+
+_tabela = EstatisticaProva.__table__
+
+
+class Percurso(NamedTuple):
+    id_prova: Optional[int]
+    microchip_cao: Optional[str]
+    categoria_salto: Optional[str]
+    tempo_prova: Optional[float]
+    status: str
+    pontuacao: Optional[int]
+    vel_media: Optional[float]
+
+    @property
+    def melhor_tempo(self) -> Optional[float]:
+        # Só percursos válidos disputam o melhor tempo
+        return None if self.status == scoring.ELIMINADO else self.tempo_prova
+
+    def contadores(self) -> dict:
+        eliminado = self.status == scoring.ELIMINADO
+        return {
+            "inscritos": 1,
+            "percursos": int(self.tempo_prova is not None),
+            "limpos": int(self.pontuacao == 0 and not eliminado),
+            "eliminados": int(eliminado),
+            "soma_vel_media": self.vel_media or 0.0,
+            "com_vel_media": int(self.vel_media is not None),
+        }
+
+
+def retrato(db: Session, inscricao, anterior: Optional[Percurso] = None) -> Percurso:
+    # Estado da inscrição no que importa ao resumo; aceita objeto ORM ou linha de RETURNING. `anterior`: o retrato
+    # de antes da escrita, de onde vem a categoria quando o cão é o mesmo (sem um segundo SELECT do cão)
+    if anterior is not None and anterior.microchip_cao == inscricao.microchip_cao:
+        categoria_salto = anterior.categoria_salto
+    elif inscricao.microchip_cao is not None:
+        cao = db.get(Cao, inscricao.microchip_cao)
+        categoria_salto = cao.categoria_salto if cao is not None else None
+    else:
+        categoria_salto = None
+    return Percurso(
+        inscricao.id_prova, inscricao.microchip_cao, categoria_salto,
+        inscricao.tempo_prova, inscricao.status, inscricao.pontuacao, inscricao.vel_media,
+    )
+
+
+def _grupo(percurso: Optional[Percurso]):
+    if percurso is None or percurso.id_prova is None or percurso.categoria_salto is None:
+        return None
+    return (percurso.id_prova, percurso.categoria_salto)
+
+
+def _do_grupo(grupo):
+    return (_tabela.c.id_prova == grupo[0]) & (_tabela.c.categoria_salto == grupo[1])
+
+
+def _somar(db: Session, grupo, contadores: dict, melhor_tempo: Optional[float] = None, criar: bool = False):
+    # Soma `contadores` (negativos para subtrair) à linha do grupo; `criar` insere a linha que ainda não existe
+    if not contadores and melhor_tempo is None:
+        return
+    valores = {coluna: _tabela.c[coluna] + valor for coluna, valor in contadores.items()}
+    if melhor_tempo is not None:
+        valores["melhor_tempo"] = case(
+            (_tabela.c.melhor_tempo.is_(None) | (_tabela.c.melhor_tempo > melhor_tempo), melhor_tempo),
+            else_=_tabela.c.melhor_tempo,
+        )
+    if db.execute(_tabela.update().where(_do_grupo(grupo)).values(valores)).rowcount == 0 and criar:
+        db.execute(_tabela.insert().values(
+            id_prova=grupo[0], categoria_salto=grupo[1], melhor_tempo=melhor_tempo, **contadores,
+        ))
+
+
+def _melhor_tempo_do_grupo(grupo):
+    return (
+        select(func.min(Inscricao.tempo_prova))
+        .join(Cao, Cao.microchip == Inscricao.microchip_cao)
+        .where(
+            Inscricao.id_prova == grupo[0], Cao.categoria_salto == grupo[1],
+            Inscricao.status != scoring.ELIMINADO,
+        )
+        .scalar_subquery()
+    )
+
+
+def registrar(db: Session, antes: Optional[Percurso], depois: Optional[Percurso]):
+    """Apply one inscricao change to the summary: subtract the old row, add the new one."""
+    if antes == depois:
+        return
+    grupo_antes, grupo_depois = _grupo(antes), _grupo(depois)
+    if grupo_antes is not None and grupo_antes == grupo_depois:
+        # Mesmo grupo (o caso de um percurso gravado): um único UPDATE com a diferença
+        anteriores = antes.contadores()
+        diferenca = {
+            coluna: valor - anteriores[coluna] for coluna, valor in depois.contadores().items() if valor != anteriores[coluna]
+        }
+        _somar(db, grupo_depois, diferenca, depois.melhor_tempo)
+    else:
+        if grupo_antes is not None:
+            _somar(db, grupo_antes, {coluna: -valor for coluna, valor in antes.contadores().items()})
+        if grupo_depois is not None:
+            _somar(db, grupo_depois, depois.contadores(), depois.melhor_tempo, criar=True)
+
+    perdido = antes.melhor_tempo if grupo_antes is not None else None
+    if perdido is None:
+        return
+    if grupo_antes == grupo_depois and depois.melhor_tempo is not None and depois.melhor_tempo <= perdido:
+        return
+    # O percurso que saiu podia ser o mais rápido: só então o mínimo do grupo é recalculado
+    db.flush()
+    db.execute(
+        _tabela.update()
+        .where(_do_grupo(grupo_antes), _tabela.c.melhor_tempo >= perdido)
+        .values(melhor_tempo=_melhor_tempo_do_grupo(grupo_antes))
+    )
+
+
+def recalcular(db: Session, id_prova: int):
+    # Reconstrói o resumo de uma prova com um GROUP BY (lotes, repontuação, troca de categoria)
+    db.flush()
+    eliminado = Inscricao.status == scoring.ELIMINADO
+    agregado = (
+        select(
+            Inscricao.id_prova,
+            Cao.categoria_salto,
+            func.count(),
+            func.count(Inscricao.tempo_prova),
+            func.sum(case(((Inscricao.pontuacao == 0) & ~eliminado, 1), else_=0)),
+            func.sum(case((eliminado, 1), else_=0)),
+            func.coalesce(func.sum(Inscricao.vel_media), 0.0),
+            func.count(Inscricao.vel_media),
+            func.min(case((~eliminado, Inscricao.tempo_prova))),
+        )
+        .join(Cao, Cao.microchip == Inscricao.microchip_cao)
+        .where(Inscricao.id_prova == id_prova)
+        .group_by(Inscricao.id_prova, Cao.categoria_salto)
+    )
+    db.execute(delete(EstatisticaProva).where(EstatisticaProva.id_prova == id_prova))
+    db.execute(_tabela.insert().from_select(
+        ["id_prova", "categoria_salto", *CONTADORES, "melhor_tempo"], agregado,
+    ))
+
+
+def recalcular_cao(db: Session, microchip: str):
+    # Cão mudou de categoria de salto: todas as provas em que está inscrito mudam de grupo
+    provas = db.execute(select(Inscricao.id_prova).where(Inscricao.microchip_cao == microchip).distinct()).scalars()
+    for id_prova in provas.all():
+        if id_prova is not None:
+            recalcular(db, id_prova)
+
+
+def descartar(db: Session, id_prova: int):
+    db.execute(delete(EstatisticaProva).where(EstatisticaProva.id_prova == id_prova))
+
+
+def preencher(db: Session):
+    # Banco que já tinha inscrições antes da tabela existir: calcula tudo uma vez
+    if db.query(EstatisticaProva.id_prova).first() is not None:
+        return
+    provas = db.execute(select(Inscricao.id_prova).where(Inscricao.id_prova.is_not(None)).distinct()).scalars().all()
+    for id_prova in provas:
+        recalcular(db, id_prova)
+    db.commit()
+
+
+def _resumo(linhas) -> list[dict]:
+    return [
+        {
+            "categoria_salto": linha.categoria_salto,
+            "inscritos": linha.inscritos,
+            "percursos": linha.percursos,
+            "limpos": linha.limpos,
+            "eliminados": linha.eliminados,
+            "vel_media": linha.soma_vel_media / linha.com_vel_media if linha.com_vel_media else None,
+            "melhor_tempo": linha.melhor_tempo,
+        }
+        for linha in linhas
+    ]
+
+
+def _total(categorias: list[dict], linhas) -> dict:
+    soma = sum(linha.soma_vel_media for linha in linhas)
+    com = sum(linha.com_vel_media for linha in linhas)
+    tempos = [categoria["melhor_tempo"] for categoria in categorias if categoria["melhor_tempo"] is not None]
+    return {
+        **{campo: sum(categoria[campo] for categoria in categorias) for campo in ("inscritos", "percursos", "limpos", "eliminados")},
+        "vel_media": soma / com if com else None,
+        "melhor_tempo": min(tempos, default=None),
+    }
+
+
+def _colunas_agregadas():
+    return [
+        EstatisticaProva.categoria_salto,
+        *(func.sum(getattr(EstatisticaProva, coluna)).label(coluna) for coluna in CONTADORES),
+        func.min(EstatisticaProva.melhor_tempo).label("melhor_tempo"),
+    ]
+
+
+def da_prova(db: Session, id_prova: int) -> dict:
+    linhas = (
+        db.query(EstatisticaProva)
+        .filter(EstatisticaProva.id_prova == id_prova, EstatisticaProva.inscritos > 0)
+        .order_by(EstatisticaProva.categoria_salto)
+        .all()
+    )
+    categorias = _resumo(linhas)
+    return {"total": _total(categorias, linhas), "categorias": categorias}
+
+
+def da_competicao(db: Session, id_competicao: int) -> dict:
+    # Soma os resumos das provas: uma linha por prova e categoria, sem tocar nas inscrições
+    linhas = (
+        db.query(*_colunas_agregadas())
+        .join(Prova, Prova.id_prova == EstatisticaProva.id_prova)
+        .filter(Prova.id_competicao == id_competicao)
+        .group_by(EstatisticaProva.categoria_salto)
+        .having(func.sum(EstatisticaProva.inscritos) > 0)
+        .order_by(EstatisticaProva.categoria_salto)
+        .all()
+    )
+    categorias = _resumo(linhas)
+    return {"total": _total(categorias, linhas), "categorias": categorias}
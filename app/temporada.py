@@ -0,0 +1,146 @@
+# app/temporada.py
+
+from collections import defaultdict
+from typing import Optional
+from sqlalchemy import Integer, cast, delete, extract, func, or_, select
+from sqlalchemy.orm import Session
+from .models import Cao, Competicao, Competidor, Inscricao, Prova, Resultado, TemporadaCao, TemporadaCompetidor
+
+# Campos cuja alteração muda a quem (ou a que temporada/categoria) os pontos de um resultado pertencem
+CAMPOS_DO_RESULTADO = {"id_inscricao", "total_pontos_t", "total_pontos_tp"}
+CAMPOS_DA_INSCRICAO = {"id_prova", "microchip_cao", "id_competidor"}
+CAMPOS_DA_PROVA = {"categoria"}
+CAMPOS_DA_COMPETICAO = {"data"}
+
+ANO = cast(extract("year", Competicao.data), Integer)
+# Linhas gravadas só com a posição (app/ranking.py) não contam como prova disputada
+PONTUADO = or_(Resultado.total_pontos_t.is_not(None), Resultado.total_pontos_tp.is_not(None))
+
+_cao = TemporadaCao.__table__
+_competidor = TemporadaCompetidor.__table__
+_COLUNA = {_cao: "microchip", _competidor: "id_competidor"}
+
+
+def _resultados(*colunas):
+    return (
+        select(*colunas)
+        .select_from(Resultado)
+        .join(Inscricao, Inscricao.id_inscricao == Resultado.id_inscricao)
+        .join(Prova, Prova.id_prova == Inscricao.id_prova)
+        .join(Competicao, Competicao.id_competicao == Prova.id_competicao)
+        .where(PONTUADO)
+    )
+
+
+def _somas():
+    return (
+        func.coalesce(func.sum(Resultado.total_pontos_t), 0),
+        func.coalesce(func.sum(Resultado.total_pontos_tp), 0),
+        func.count(),
+    )
+
+
+def _somar(db: Session, tabela, chave: dict, valores, sinal: int):
+    pontos, pontos_tp, provas = valores
+    filtro = [tabela.c[coluna] == valor for coluna, valor in chave.items()]
+    atualizadas = db.execute(tabela.update().where(*filtro).values(
+        pontos=tabela.c.pontos + sinal * pontos,
+        pontos_tp=tabela.c.pontos_tp + sinal * pontos_tp,
+        provas=tabela.c.provas + sinal * provas,
+    )).rowcount
+    if atualizadas == 0 and sinal > 0:
+        db.execute(tabela.insert().values(**chave, pontos=pontos, pontos_tp=pontos_tp, provas=provas))
+
+
+def _aplicar(db: Session, criterio, sinal: int, tabelas=(_cao, _competidor)):
+    # Soma (ou subtrai) nas tabelas da temporada os pontos dos resultados que atendem ao critério
+    db.flush()
+    linhas = db.execute(
+        _resultados(ANO, Prova.categoria, Inscricao.microchip_cao, Inscricao.id_competidor, *_somas())
+        .where(criterio)
+        .group_by(ANO, Prova.categoria, Inscricao.microchip_cao, Inscricao.id_competidor)
+    ).all()
+    grupos = {_cao: defaultdict(lambda: [0, 0, 0]), _competidor: defaultdict(lambda: [0, 0, 0])}
+    for ano, categoria, microchip, id_competidor, *valores in linhas:
+        if ano is None or categoria is None:
+            continue
+        for tabela, chave in ((_cao, microchip), (_competidor, id_competidor)):
+            if chave is None:
+                continue
+            acumulado = grupos[tabela][(ano, categoria, chave)]
+            for i, valor in enumerate(valores):
+                acumulado[i] += valor
+    for tabela in tabelas:
+        coluna = _COLUNA[tabela]
+        for (ano, categoria, chave), valores in grupos[tabela].items():
+            _somar(db, tabela, {"temporada": ano, "categoria": categoria, coluna: chave}, valores, sinal)
+
+
+def somar(db: Session, criterio):
+    _aplicar(db, criterio, 1)
+
+
+def subtrair(db: Session, criterio):
+    _aplicar(db, criterio, -1)
+
+
+def subtrair_competidor(db: Session, id_competidor: int):
+    # Competidor removido: as inscrições perdem o competidor, mas os pontos dos cães continuam
+    _aplicar(db, Inscricao.id_competidor == id_competidor, -1, tabelas=(_competidor,))
+
+
+def recalcular(db: Session):
+    # Reconstrói as duas tabelas com um GROUP BY por chave
+    db.flush()
+    for tabela, chave in ((_cao, Inscricao.microchip_cao), (_competidor, Inscricao.id_competidor)):
+        db.execute(delete(tabela))
+        db.execute(tabela.insert().from_select(
+            ["temporada", "categoria", _COLUNA[tabela], "pontos", "pontos_tp", "provas"],
+            _resultados(ANO, Prova.categoria, chave, *_somas())
+            .where(chave.is_not(None), Prova.categoria.is_not(None), Competicao.data.is_not(None))
+            .group_by(ANO, Prova.categoria, chave),
+        ))
+
+
+def preencher(db: Session):
+    # Banco que já tinha resultados antes das tabelas existirem: calcula tudo uma vez
+    if db.query(TemporadaCao.temporada).first() is not None:
+        return
+    if db.query(_resultados(Resultado.id_resultado).exists()).scalar():
+        recalcular(db)
+        db.commit()
+
+
+def classificar(
+    db: Session, temporada: int, categoria: Optional[str] = None, por: str = "cao", limit: int = 100,
+) -> list[dict]:
+    """Top N of a season, by dog or by handler, optionally restricted to one categoria."""
+    if por == "cao":
+        model, chave, nome = TemporadaCao, TemporadaCao.microchip, Cao.nome
+        nomes = (Cao, Cao.microchip == TemporadaCao.microchip)
+    else:
+        model, chave, nome = TemporadaCompetidor, TemporadaCompetidor.id_competidor, Competidor.nome
+        nomes = (Competidor, Competidor.id_competidor == TemporadaCompetidor.id_competidor)
+    if categoria is not None:
+        # Uma categoria: leitura direta do índice (temporada, categoria, pontos desc, pontos_tp desc, chave)
+        pontos, pontos_tp, provas = model.pontos, model.pontos_tp, model.provas
+        query = db.query(chave, nome, pontos, pontos_tp, provas).filter(
+            model.temporada == temporada, model.categoria == categoria, model.provas > 0,
+        )
+    else:
+        # Todas as categorias: soma as linhas de cada cão/competidor na temporada
+        pontos, pontos_tp, provas = func.sum(model.pontos), func.sum(model.pontos_tp), func.sum(model.provas)
+        query = (
+            db.query(chave, nome, pontos, pontos_tp, provas)
+            .filter(model.temporada == temporada)
+            .group_by(chave, nome)
+            .having(provas > 0)
+        )
+    linhas = query.outerjoin(*nomes).order_by(pontos.desc(), pontos_tp.desc(), chave).limit(limit).all()
+    return [
+        {
+            "posicao": posicao, chave.key: linha[0], "nome": linha[1],
+            "pontos": linha[2], "pontos_tp": linha[3], "provas": linha[4],
+        }
+        for posicao, linha in enumerate(linhas, start=1)
+    ]
@@ -0,0 +1,46 @@
+# app/timing.py
+
+import threading
+import time
+from datetime import datetime, timezone
+
+PARADO = "parado"
+RODANDO = "rodando"
+PAUSADO = "pausado"
+FINALIZADO = "finalizado"
+
+
+class EstadoInvalido(Exception):
+    pass
+
+
+# Início (time.monotonic) do trecho em andamento de cada cronômetro deste processo
+_inicios: dict[int, float] = {}
+_lock = threading.Lock()
+
+
+def iniciar(id_cronometro: int):
+    with _lock:
+        _inicios[id_cronometro] = time.monotonic()
+
+
+def _desde(momento: datetime) -> float:
+    # SQLite devolve datetimes sem fuso (gravados em UTC)
+    if momento.tzinfo is None:
+        momento = momento.replace(tzinfo=timezone.utc)
+    return (datetime.now(timezone.utc) - momento).total_seconds()
+
+
+def acumular(cronometro) -> float:
+    """Closes the running segment and returns the accumulated official time in seconds."""
+    with _lock:
+        inicio = _inicios.pop(cronometro.id_cronometro, None)
+    acumulado = cronometro.tempo_oficial or 0.0
+    if inicio is not None:
+        decorrido = time.monotonic() - inicio
+    elif cronometro.tempo_oficial is None:
+        # Processo reiniciado ou start em outro worker: cai para o relógio de parede
+        decorrido = _desde(cronometro.tempo_inicial)
+    else:
+        decorrido = _desde(cronometro.atualizado_em or cronometro.tempo_inicial)
+    return round(acumulado + max(decorrido, 0.0), 3)
@@ -0,0 +1,45 @@
+# app/writer.py
+
+import contextvars
+import queue
+import threading
+from concurrent.futures import Future
+
+
+class WriterQueue:
+    """Runs submitted write operations on one dedicated thread, in arrival order."""
+
+    def __init__(self, name: str = "sqlite-writer"):
+        self._name = name
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop, name=self._name, daemon=True)
+                self._thread.start()
+
+    def _loop(self):
+        while True:
+            contexto, func, args, kwargs, future = self._queue.get()
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(contexto.run(func, *args, **kwargs))
+            except BaseException as exc:
+                future.set_exception(exc)
+
+    def run(self, func, *args, **kwargs):
+        # Bloqueia a thread chamadora até a operação ser executada pela thread de escrita
+        if threading.current_thread() is self._thread:
+            return func(*args, **kwargs)
+        self._ensure_started()
+        future = Future()
+        # Roda no contexto de quem chamou (ex.: métricas da requisição corrente)
+        self._queue.put((contextvars.copy_context(), func, args, kwargs, future))
+        return future.result()
+
+
+writer_queue = WriterQueue()
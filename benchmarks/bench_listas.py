@@ -0,0 +1,93 @@
+# benchmarks/bench_listas.py
+#
+# Compara a serialização das listas: objetos ORM validados pelo response_model (caminho do FastAPI)
+# contra tuplas só com as colunas do schema codificadas pelo orjson (app/serialize.py).
+#
+#     python -m benchmarks.bench_listas [linhas]
+
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+_tmp = tempfile.mkdtemp()
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_tmp}/bench.db")
+
+from pydantic import TypeAdapter  # noqa: E402
+from sqlalchemy import insert  # noqa: E402
+from app import models, schemas, serialize  # noqa: E402
+from app.database import SessionLocal, engine  # noqa: E402
+
+LISTAS = [
+    (models.Prova, schemas.ProvaResponse),
+    (models.Inscricao, schemas.InscricaoResponse),
+    (models.Cronometragem, schemas.CronometragemResponse),
+]
+
+
+def popular(db, linhas: int):
+    inicio = datetime(2026, 5, 1, 9, 0, 0)
+    # TSP/TMP inteiros e fracionários: os dois caminhos precisam devolver 40.0 e 40.5 como float
+    db.execute(insert(models.Prova), [
+        {"id_competicao": 1, "categoria": "M", "classe": "A1", "num_obstaculos": 20, "tsp": 40.0 + i % 2 / 2, "tmp": 60.0,
+         "vel_media_necessaria": 3.5, "comprimento_pista": 150, "descricao": f"Prova {i}"}
+        for i in range(linhas)
+    ])
+    db.execute(insert(models.Inscricao), [
+        {"id_prova": i % 50 + 1, "id_competidor": i, "microchip_cao": f"c{i}", "colete_competidor": str(i),
+         "tempo_prova": 35.5 + i % 10, "faltas_prova": i % 3, "recusas_prova": 0, "vel_media": 4.1, "pontuacao": 5,
+         "hora_inicio": inicio + timedelta(minutes=i), "status": "pendente"}
+        for i in range(linhas)
+    ])
+    db.execute(insert(models.Cronometragem), [
+        {"id_inscricao": i + 1, "tempo_inicial": inicio + timedelta(seconds=i), "status": "finalizado",
+         "tempo_final": inicio + timedelta(seconds=i + 40), "tempo_oficial": 40.123}
+        for i in range(linhas)
+    ])
+    db.commit()
+
+
+def pydantic_json(db, model, schema, linhas: int) -> bytes:
+    # O que o FastAPI faz com response_model=list[schema]: valida cada objeto e depois json.dumps
+    adapter = TypeAdapter(list[schema])
+    objs = db.query(model).limit(linhas).all()
+    dados = adapter.dump_python(adapter.validate_python(objs, from_attributes=True), mode="json")
+    return json.dumps(dados, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def rapido_json(db, model, schema, linhas: int) -> bytes:
+    rows = db.query(*serialize.colunas(model, schema)).limit(linhas).all()
+    return serialize.linhas_json(model, schema, rows)
+
+
+def tipado(corpo: bytes):
+    return json.loads(corpo, parse_int=lambda s: ("int", int(s)), parse_float=lambda s: ("float", float(s)))
+
+
+def medir(func, *args, repeticoes: int = 20):
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        saida = func(*args)
+    return (time.perf_counter() - inicio) / repeticoes * 1000, saida
+
+
+def main(linhas: int = 1000):
+    models.Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        popular(db, linhas)
+        print(f"{'lista':<16} {'pydantic ms':>12} {'orjson ms':>10} {'ganho':>7}")
+        for model, schema in LISTAS:
+            antigo, esperado = medir(lambda: pydantic_json(db, model, schema, linhas))
+            novo, obtido = medir(lambda: rapido_json(db, model, schema, linhas))
+            # O contrato JSON precisa ser o mesmo, inclusive int x float (40 == 40.0 no json.loads comum)
+            assert tipado(esperado) == tipado(obtido), model.__tablename__
+            print(f"{model.__tablename__:<16} {antigo:>12.2f} {novo:>10.2f} {antigo / novo:>6.1f}x")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000)
@@ -0,0 +1,137 @@
+# benchmarks/bench_writes.py
+#
+# Compara o caminho antigo de escrita (add/commit/refresh e get/setattr/commit/refresh)
+# com o atual (INSERT/UPDATE ... RETURNING) contando statements e latência por escrita.
+# Em inscrição, cronômetro e resultado o caminho atual também grava pontuação, estatísticas,
+# classificação, temporada e o feed de alterações, que o antigo não fazia: ali a contagem mostra o
+# custo total de cada escrita, não só a troca do refresh pelo RETURNING.
+#
+#     python -m benchmarks.bench_writes [repeticoes]
+
+import os
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from datetime import datetime
+
+_tmp = tempfile.mkdtemp()
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_tmp}/bench.db")
+
+from sqlalchemy import event  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+from app import crud, models  # noqa: E402
+from app.database import engine  # noqa: E402
+from app.schemas import (  # noqa: E402
+    CaoCreate, CaoUpdate, CompetidorCreate, CompetidorUpdate, CronometragemCreate, CronometragemUpdate, InscricaoCreate,
+    InscricaoUpdate, JuizCreate, JuizUpdate, ProvaCreate, ProvaUpdate, ResultadoCreate, ResultadoUpdate,
+)
+
+_statements = 0
+
+
+@event.listens_for(engine, "before_cursor_execute")
+def _contar(conn, cursor, statement, parameters, context, executemany):
+    global _statements
+    _statements += 1
+
+
+# Sessão no estilo original: expira tudo no commit, o que obrigava o refresh
+LegacySession = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+def legacy_create(db, model, schema):
+    obj = model(**schema.model_dump())
+    db.add(obj)
+    db.commit()
+    db.refresh(obj)
+    return obj
+
+
+def legacy_update(db, model, pk, key, schema):
+    obj = db.query(model).filter(pk == key).first()
+    for campo, valor in schema.model_dump(exclude_unset=True).items():
+        setattr(obj, campo, valor)
+    db.commit()
+    db.refresh(obj)
+    return obj
+
+
+def medir(nome, session_factory, func, repeticoes):
+    global _statements
+    db = session_factory()
+    try:
+        _statements = 0
+        inicio = time.perf_counter()
+        for i in range(repeticoes):
+            func(db, i)
+        duracao = time.perf_counter() - inicio
+    finally:
+        db.close()
+    print(f"{nome:<28} {_statements / repeticoes:>8.2f} {duracao / repeticoes * 1000:>10.3f}")
+
+
+def main(repeticoes: int = 500):
+    models.Base.metadata.create_all(bind=engine)
+    SessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
+
+    competidor = lambda i: CompetidorCreate(nome=f"Competidor {i}", escola="Bench")
+    cao = lambda p, i: CaoCreate(microchip=f"{p}{i}", nome=f"Cão {i}", raca="SRD", cernelha="45", categoria_salto="M")
+    juiz = lambda p, i: JuizCreate(nome=f"Juiz {i}", email=f"{p}{i}@bench")
+    prova = lambda i: ProvaCreate(
+        categoria="M", classe="A1", num_obstaculos=20, tsp=40, tmp=60,
+        vel_media_necessaria=3.5, comprimento_pista=150, descricao=f"Prova {i}", id_competicao=1,
+    )
+    inscricao = lambda p, i: InscricaoCreate(id_prova=1, id_competidor=i + 1, microchip_cao=f"{p}{i}", colete_competidor=str(i))
+    # Percurso cronometrado: no caminho atual repontua, atualiza estatísticas e classificação da prova 1
+    percurso = lambda i: InscricaoUpdate(tempo_prova=38.0 + i % 7, faltas_prova=i % 3)
+    cronometro = lambda i: CronometragemCreate(id_inscricao=i, tempo_inicial=datetime(2026, 5, 1, 10))
+    resultado = lambda i: ResultadoCreate(id_inscricao=i, total_pontos_t=i % 10, total_pontos_tp=i % 5)
+
+    # Chaves geradas pelos creates de cada caminho: os updates seguintes alteram essas mesmas linhas
+    criados = defaultdict(list)
+
+    def criando(caminho, func, pk):
+        def caso(db, i):
+            criados[caminho].append(getattr(func(db, i), pk))
+        return caso
+
+    casos = [
+        ("create competidor", lambda db, i: legacy_create(db, models.Competidor, competidor(i)),
+                              lambda db, i: crud.create_competidor(db, competidor(i))),
+        ("update competidor", lambda db, i: legacy_update(db, models.Competidor, models.Competidor.id_competidor, i + 1, CompetidorUpdate(escola=str(i))),
+                              lambda db, i: crud.update_competidor(db, i + 1, CompetidorUpdate(escola=str(i)))),
+        ("create cao", lambda db, i: legacy_create(db, models.Cao, cao("L", i)),
+                       lambda db, i: crud.create_cao(db, cao("N", i))),
+        ("update cao", lambda db, i: legacy_update(db, models.Cao, models.Cao.microchip, f"L{i}", CaoUpdate(raca="BC")),
+                       lambda db, i: crud.update_cao(db, f"N{i}", CaoUpdate(raca="BC"))),
+        ("create juiz", lambda db, i: legacy_create(db, models.Juiz, juiz("L", i)),
+                        lambda db, i: crud.create_juiz(db, juiz("N", i))),
+        ("update juiz", lambda db, i: legacy_update(db, models.Juiz, models.Juiz.id_juiz, i + 1, JuizUpdate(nome=f"J{i}")),
+                        lambda db, i: crud.update_juiz(db, i + 1, JuizUpdate(nome=f"J{i}"))),
+        ("create prova", lambda db, i: legacy_create(db, models.Prova, prova(i)),
+                         lambda db, i: crud.create_prova(db, prova(i))),
+        ("update prova", lambda db, i: legacy_update(db, models.Prova, models.Prova.id_prova, i + 1, ProvaUpdate(descricao=str(i))),
+                         lambda db, i: crud.update_prova(db, i + 1, ProvaUpdate(descricao=str(i)))),
+        ("create inscricao", criando("L inscricao", lambda db, i: legacy_create(db, models.Inscricao, inscricao("L", i)), "id_inscricao"),
+                             criando("N inscricao", lambda db, i: crud.create_inscricao(db, inscricao("N", i)), "id_inscricao")),
+        ("update inscricao", lambda db, i: legacy_update(db, models.Inscricao, models.Inscricao.id_inscricao, criados["L inscricao"][i], percurso(i)),
+                             lambda db, i: crud.update_inscricao(db, criados["N inscricao"][i], percurso(i))),
+        ("create cronometro", criando("L cronometro", lambda db, i: legacy_create(db, models.Cronometragem, cronometro(criados["L inscricao"][i])), "id_cronometro"),
+                              criando("N cronometro", lambda db, i: crud.create_cronometro(db, cronometro(criados["N inscricao"][i])), "id_cronometro")),
+        ("update cronometro", lambda db, i: legacy_update(db, models.Cronometragem, models.Cronometragem.id_cronometro, criados["L cronometro"][i], CronometragemUpdate(tempo_oficial=40.0 + i % 7)),
+                              lambda db, i: crud.update_cronometro(db, criados["N cronometro"][i], CronometragemUpdate(tempo_oficial=40.0 + i % 7))),
+        ("create resultado", criando("L resultado", lambda db, i: legacy_create(db, models.Resultado, resultado(criados["L inscricao"][i])), "id_resultado"),
+                             criando("N resultado", lambda db, i: crud.create_resultado(db, resultado(criados["N inscricao"][i])), "id_resultado")),
+        ("update resultado", lambda db, i: legacy_update(db, models.Resultado, models.Resultado.id_resultado, criados["L resultado"][i], ResultadoUpdate(total_pontos_t=i % 7)),
+                             lambda db, i: crud.update_resultado(db, criados["N resultado"][i], ResultadoUpdate(total_pontos_t=i % 7))),
+    ]
+
+    print(f"{'escrita':<28} {'queries':>8} {'ms/escrita':>10}")
+    for nome, antigo, atual in casos:
+        medir(f"{nome} (refresh)", LegacySession, antigo, repeticoes)
+        medir(f"{nome} (returning)", SessionLocal, atual, repeticoes)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 500)
@@ -0,0 +1,253 @@
+# benchmarks/replay.py
+#
+# Semeia uma temporada sintética (competições, provas, milhares de cães/competidores/inscrições)
+# e reproduz em processo o tráfego de um dia de competição contra app.main:app: inscrições de
+# última hora, cronômetro (criar/start/stop), correção de faltas e telões consultando a
+# classificação. Reporta p50/p99, vazão e statements SQL por rota.
+#
+#     python -m benchmarks.replay [--operacoes 5000] [--caes 3000] [--seed 1] [--limite-p99 MS]
+#
+# Sem DATABASE_URL usa um SQLite temporário; com DATABASE_URL semeia esse banco (dados são acrescentados).
+
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+if "DATABASE_URL" not in os.environ:
+    os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/bench.db"
+
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import insert, select  # noqa: E402
+from app import metrics, models, scoring, stats, temporada  # noqa: E402
+from app.database import SessionLocal  # noqa: E402
+from app.main import app  # noqa: E402
+
+ALTURAS = ("S", "M", "L", "I")
+TEMPORADA = 2026
+
+# Peso de cada operação no tráfego do dia
+MIX = {
+    "inscricao": 4,
+    "percurso": 20,
+    "correcao": 12,
+    "classificacao": 30,
+    "lista_prova": 14,
+    "prova": 8,
+    "estatisticas": 6,
+    "ranking": 6,
+}
+
+
+def semear(db, rng: random.Random, competicoes: int, provas: int, caes: int, competidores: int, por_prova: int):
+    """Past competitions with times and points, plus one competition day with runs still to go."""
+    marca = rng.randrange(10 ** 9)
+    user_id = db.scalar(insert(models.User).values(name="Bench", email=f"bench{marca}@bench").returning(models.User.id))
+    ids_competidores = list(db.scalars(
+        insert(models.Competidor).returning(models.Competidor.id_competidor),
+        [{"nome": f"Condutor {i}", "escola": f"Escola {i % 40}"} for i in range(competidores)],
+    ))
+    caes_rows = [
+        {"microchip": f"B{marca}-{i}", "nome": f"Cão {i}", "raca": "SRD", "cernelha": "45",
+         "categoria_salto": rng.choice(ALTURAS)}
+        for i in range(caes)
+    ]
+    db.execute(insert(models.Cao), caes_rows)
+    # Cada cão tem um condutor fixo; alguns condutores correm vários cães
+    dono = {cao["microchip"]: rng.choice(ids_competidores) for cao in caes_rows}
+    microchips = list(dono)
+
+    dia = None
+    for c in range(competicoes):
+        data = datetime(TEMPORADA, 3, 1, 8, 0) + timedelta(days=7 * c)
+        id_competicao = db.scalar(insert(models.Competicao).values(
+            nome=f"Etapa {c + 1}", data=data, localizacao="Bench", responsavel_id=user_id,
+        ).returning(models.Competicao.id_competicao))
+        passada = c < competicoes - 1
+        ids_provas = list(db.scalars(insert(models.Prova).returning(models.Prova.id_prova), [
+            {"id_competicao": id_competicao, "categoria": f"A{p % 3 + 1}", "classe": "G1", "num_obstaculos": 20,
+             "tsp": 40.0, "tmp": 60.0, "vel_media_necessaria": 3.5, "comprimento_pista": 160, "descricao": f"Prova {p + 1}"}
+            for p in range(provas)
+        ]))
+        for id_prova in ids_provas:
+            inscricoes = []
+            for microchip in rng.sample(microchips, min(por_prova, len(microchips))):
+                linha = {"id_prova": id_prova, "id_competidor": dono[microchip], "microchip_cao": microchip,
+                         "colete_competidor": str(rng.randint(1, 999)), "status": "pendente"}
+                if passada:
+                    tempo, faltas, recusas = rng.uniform(32, 65), rng.choice((0, 0, 0, 1, 2)), rng.choice((0, 0, 0, 1, 3))
+                    pontuacao = scoring.pontuar(tempo, faltas, recusas, "pendente", 40.0, 60.0, 160)
+                    linha.update(tempo_prova=tempo, faltas_prova=faltas, recusas_prova=recusas,
+                                 **scoring.campos_pontuados(pontuacao, "pendente"))
+                inscricoes.append(linha)
+            ids = list(db.scalars(insert(models.Inscricao).returning(models.Inscricao.id_inscricao), inscricoes))
+            if passada:
+                db.execute(insert(models.Resultado), [
+                    {"id_inscricao": id_inscricao, "total_pontos_t": rng.randint(0, 20), "total_pontos_tp": rng.randint(0, 20)}
+                    for id_inscricao in ids
+                ])
+            stats.recalcular(db, id_prova)
+        if not passada:
+            dia = (id_competicao, ids_provas)
+    temporada.recalcular(db)
+    db.commit()
+
+    id_competicao, ids_provas = dia
+    pendentes = list(db.execute(
+        select(models.Inscricao.id_inscricao, models.Inscricao.id_prova).where(models.Inscricao.id_prova.in_(ids_provas))
+    ).all())
+    return id_competicao, ids_provas, microchips, dono, pendentes
+
+
+class Replay:
+    def __init__(self, client: TestClient, rng: random.Random, dia, microchips, dono, pendentes):
+        self.client = client
+        self.rng = rng
+        self.id_competicao, self.provas = dia
+        self.microchips = microchips
+        self.dono = dono
+        self.pendentes = [tuple(linha) for linha in pendentes]
+        self.rng.shuffle(self.pendentes)
+        self.corridas = []
+        self.latencias = defaultdict(list)
+
+    def chamar(self, metodo: str, rota: str, url: str, **kwargs):
+        # `rota` é o modelo da rota no app, a mesma chave usada por app/metrics.py
+        inicio = time.perf_counter()
+        resposta = self.client.request(metodo, url, **kwargs)
+        self.latencias[(metodo, rota)].append(time.perf_counter() - inicio)
+        if resposta.status_code >= 400:
+            raise RuntimeError(f"{metodo} {url}: {resposta.status_code} {resposta.text[:200]}")
+        return resposta
+
+    def inscricao(self):
+        microchip = self.rng.choice(self.microchips)
+        id_inscricao = self.chamar("POST", "/inscricoes/", "/inscricoes/", json={
+            "id_prova": self.rng.choice(self.provas), "id_competidor": self.dono[microchip],
+            "microchip_cao": microchip, "colete_competidor": "late",
+        }).json()["id_inscricao"]
+        self.pendentes.append((id_inscricao, None))
+
+    def percurso(self):
+        if not self.pendentes:
+            return self.correcao()
+        id_inscricao, id_prova = self.pendentes.pop()
+        agora = datetime.now().isoformat()
+        id_cronometro = self.chamar("POST", "/cronometros/", "/cronometros/", json={
+            "id_inscricao": id_inscricao, "tempo_inicial": agora,
+        }).json()["id_cronometro"]
+        self.chamar("POST", "/cronometros/{cronometro_id}/start", f"/cronometros/{id_cronometro}/start")
+        self.chamar("POST", "/cronometros/{cronometro_id}/stop", f"/cronometros/{id_cronometro}/stop")
+        self.corridas.append(id_inscricao)
+
+    def correcao(self):
+        if not self.corridas:
+            return self.classificacao()
+        # Juiz corrige faltas/recusas e o tempo lançado pela mesa
+        self.chamar("PUT", "/inscricoes/{inscricao_id}", f"/inscricoes/{self.rng.choice(self.corridas)}", json={
+            "tempo_prova": round(self.rng.uniform(32, 65), 2),
+            "faltas_prova": self.rng.choice((0, 0, 1, 2)),
+            "recusas_prova": self.rng.choice((0, 0, 0, 1)),
+        })
+
+    def classificacao(self):
+        id_prova = self.rng.choice(self.provas)
+        self.chamar("GET", "/provas/{prova_id}/classificacao", f"/provas/{id_prova}/classificacao")
+
+    def lista_prova(self):
+        self.chamar("GET", "/inscricoes/", "/inscricoes/", params={"id_prova": self.rng.choice(self.provas), "limit": 200})
+
+    def prova(self):
+        self.chamar("GET", "/provas/{prova_id}", f"/provas/{self.rng.choice(self.provas)}")
+
+    def estatisticas(self):
+        self.chamar("GET", "/competicoes/{competition_id}/stats", f"/competicoes/{self.id_competicao}/stats")
+
+    def ranking(self):
+        self.chamar("GET", "/rankings", "/rankings", params={
+            "season": TEMPORADA, "categoria": f"A{self.rng.randint(1, 3)}", "limit": 50,
+        })
+
+    def executar(self, operacoes: int) -> float:
+        nomes, pesos = list(MIX), list(MIX.values())
+        inicio = time.perf_counter()
+        for nome in self.rng.choices(nomes, pesos, k=operacoes):
+            getattr(self, nome)()
+        return time.perf_counter() - inicio
+
+
+def percentil(valores: list, p: float) -> float:
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, round(p / 100 * (len(ordenados) - 1)))]
+
+
+def relatorio(latencias: dict, queries: dict, duracao: float) -> list[dict]:
+    linhas = []
+    for (metodo, rota), valores in sorted(latencias.items()):
+        n = len(valores)
+        total_queries = queries.get((metodo, rota))
+        linhas.append({
+            "rota": f"{metodo} {rota}",
+            "n": n,
+            "p50_ms": percentil(valores, 50) * 1000,
+            "p99_ms": percentil(valores, 99) * 1000,
+            "media_ms": statistics.fmean(valores) * 1000,
+            "queries": total_queries / n if total_queries is not None else None,
+        })
+    total = sum(len(valores) for valores in latencias.values())
+    print(f"{'rota':<48} {'n':>6} {'p50 ms':>8} {'p99 ms':>8} {'média':>8} {'queries':>8}")
+    for linha in linhas:
+        queries_txt = f"{linha['queries']:.1f}" if linha["queries"] is not None else "-"
+        print(f"{linha['rota']:<48} {linha['n']:>6} {linha['p50_ms']:>8.2f} {linha['p99_ms']:>8.2f} "
+              f"{linha['media_ms']:>8.2f} {queries_txt:>8}")
+    print(f"\n{total} requisições em {duracao:.2f} s: {total / duracao:.0f} req/s")
+    return linhas
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay de um dia de competição contra app.main:app")
+    parser.add_argument("--operacoes", type=int, default=5000)
+    parser.add_argument("--competicoes", type=int, default=8)
+    parser.add_argument("--provas", type=int, default=6, help="provas por competição")
+    parser.add_argument("--caes", type=int, default=3000)
+    parser.add_argument("--competidores", type=int, default=1200)
+    parser.add_argument("--por-prova", type=int, default=250, help="inscrições por prova")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", help="grava o relatório neste arquivo")
+    parser.add_argument("--limite-p99", type=float, help="falha (exit 1) se alguma rota passar deste p99 em ms")
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    inicio = time.perf_counter()
+    with TestClient(app) as client, SessionLocal() as db:
+        id_competicao, provas, microchips, dono, pendentes = semear(
+            db, rng, args.competicoes, args.provas, args.caes, args.competidores, args.por_prova,
+        )
+        print(f"temporada semeada em {time.perf_counter() - inicio:.1f} s "
+              f"({args.competicoes} competições, {args.competicoes * args.provas} provas, {len(pendentes)} percursos no dia)\n")
+        replay = Replay(client, rng, (id_competicao, provas), microchips, dono, pendentes)
+        # Contadores de statements do middleware de métricas, só do trecho medido
+        antes = dict(metrics.registro.queries)
+        duracao = replay.executar(args.operacoes)
+        queries = {chave: n - antes.get(chave, 0) for chave, n in metrics.registro.queries.items()}
+
+    linhas = relatorio(replay.latencias, queries, duracao)
+    if args.json:
+        with open(args.json, "w") as arquivo:
+            json.dump({"args": vars(args), "duracao_s": duracao, "rotas": linhas}, arquivo, indent=2)
+    if args.limite_p99 is not None:
+        acima = [linha["rota"] for linha in linhas if linha["p99_ms"] > args.limite_p99]
+        if acima:
+            print(f"p99 acima de {args.limite_p99} ms: {', '.join(acima)}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
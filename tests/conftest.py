@@ -0,0 +1,114 @@
+# tests/conftest.py
+#
+# Sem DATABASE_URL a suíte roda num SQLite temporário; com DATABASE_URL (ex.: um PostgreSQL local)
+# as mesmas rotas rodam contra esse banco. O schema é recriado a cada teste.
+
+import os
+import tempfile
+
+if "DATABASE_URL" not in os.environ:
+    os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/test.db"
+
+import pytest  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import event  # noqa: E402
+from app import cache, models, pubsub, ranking, timing  # noqa: E402
+from app.database import SessionLocal, async_engine, engine  # noqa: E402
+from app.main import app  # noqa: E402
+
+
+def _limpar_memoria():
+    with ranking._lock:
+        for id_prova in list(ranking._classificacoes):
+            ranking._descartes[id_prova] += 1
+        ranking._classificacoes.clear()
+    cache.backend.clear()
+    for nome in cache._contadores:
+        cache._contadores[nome] = 0
+    timing._inicios.clear()
+    pubsub.hub._subscribers.clear()
+
+
+@pytest.fixture
+def client():
+    models.Base.metadata.drop_all(bind=engine)
+    models.Base.metadata.create_all(bind=engine)
+    _limpar_memoria()
+    with TestClient(app) as c:
+        yield c
+    _limpar_memoria()
+
+
+@pytest.fixture
+def db(client):
+    session = SessionLocal()
+    yield session
+    session.rollback()
+    session.close()
+
+
+@pytest.fixture
+def consultas(client):
+    # Statements SQL emitidos pelas rotas (no modo assíncrono, pelo engine assíncrono)
+    statements = []
+    alvo = async_engine.sync_engine if async_engine is not None else engine
+
+    def contar(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(alvo, "before_cursor_execute", contar)
+    yield statements
+    event.remove(alvo, "before_cursor_execute", contar)
+
+
+class Cenario:
+    """A competition with one prova (TSP 40 s, TMP 60 s), one competidor and dogs m0..m5 entered."""
+
+    def __init__(self, c: TestClient, caes: int = 6):
+        self.c = c
+        self.user = c.post("/users/", json={"name": "Ana", "email": "ana@example.com"}).json()["id"]
+        self.competicao = self.nova_competicao()
+        self.prova = self.nova_prova()
+        self.competidor = c.post("/competidor/", json={"nome": "Bia", "escola": "Escola"}).json()["id_competidor"]
+        self.inscricoes = []
+        for i in range(caes):
+            c.post("/cao/", json={
+                "microchip": f"m{i}", "nome": f"Cão {i}", "raca": "Border Collie", "cernelha": "40",
+                "categoria_salto": "S" if i % 2 else "L",
+            })
+            self.inscricoes.append(self.inscrever(f"m{i}", colete=str(i)))
+
+    def nova_competicao(self, data: str = "2026-05-01T09:00:00") -> int:
+        return self.c.post("/competicoes/", json={
+            "nome": "Copa", "data": data, "localizacao": "João Pessoa", "responsavel_id": self.user,
+        }).json()["id_competicao"]
+
+    def nova_prova(self, id_competicao: int = None, **campos) -> int:
+        corpo = {
+            "categoria": "A1", "classe": "G1", "num_obstaculos": 20, "tsp": 40, "tmp": 60,
+            "vel_media_necessaria": 3.5, "comprimento_pista": 160,
+            "id_competicao": id_competicao or self.competicao, **campos,
+        }
+        resposta = self.c.post("/provas/", json=corpo)
+        assert resposta.status_code == 200, resposta.text
+        return resposta.json()["id_prova"]
+
+    def inscrever(self, microchip: str, id_prova: int = None, colete: str = "1", **campos) -> int:
+        resposta = self.c.post("/inscricoes/", json={
+            "id_prova": id_prova or self.prova, "id_competidor": self.competidor,
+            "microchip_cao": microchip, "colete_competidor": colete, **campos,
+        })
+        assert resposta.status_code == 200, resposta.text
+        return resposta.json()["id_inscricao"]
+
+    def percurso(self, id_inscricao: int, tempo: float, faltas: int = 0, recusas: int = 0) -> dict:
+        resposta = self.c.put(f"/inscricoes/{id_inscricao}", json={
+            "tempo_prova": tempo, "faltas_prova": faltas, "recusas_prova": recusas,
+        })
+        assert resposta.status_code == 200, resposta.text
+        return resposta.json()
+
+
+@pytest.fixture
+def cenario(client):
+    return Cenario(client)
@@ -0,0 +1,143 @@
+import random
+
+ENTIDADES = ("prova", "inscricao", "cronometro", "resultado", "avaliacao")
+CHAVES = {
+    "prova": "id_prova", "inscricao": "id_inscricao", "cronometro": "id_cronometro",
+    "resultado": "id_resultado", "avaliacao": "id_avaliacao",
+}
+
+
+def reproduzir(c, id_competicao: int, estado: dict = None, since: int = 0, limit: int = 7):
+    # Consome o feed página a página, como um cliente offline
+    estado = {} if estado is None else estado
+    while True:
+        pagina = c.get(f"/competicoes/{id_competicao}/changes", params={"since": since, "limit": limit})
+        assert pagina.status_code == 200, pagina.text
+        pagina = pagina.json()
+        for alteracao in pagina["alteracoes"]:
+            assert alteracao["seq"] > since
+            chave = (alteracao["entidade"], alteracao["id"])
+            if alteracao["acao"] == "delete":
+                estado.pop(chave, None)
+            else:
+                estado[chave] = alteracao["dados"]
+        assert pagina["cursor"] >= since
+        since = pagina["cursor"]
+        if not pagina["mais"]:
+            return estado, since
+
+
+def estado_atual(c, id_competicao: int) -> dict:
+    # O que a API devolve hoje para a competição, lido pelas listas
+    estado = {}
+
+    def juntar(entidade, linhas):
+        for linha in linhas:
+            estado[(entidade, linha[CHAVES[entidade]])] = linha
+
+    provas = c.get("/provas/", params={"id_competicao": id_competicao, "limit": 1000}).json()
+    juntar("prova", provas)
+    for prova in provas:
+        inscricoes = c.get("/inscricoes/", params={"id_prova": prova["id_prova"], "limit": 1000}).json()
+        juntar("inscricao", inscricoes)
+        juntar("resultado", c.get("/resultados/", params={"id_prova": prova["id_prova"], "limit": 1000}).json())
+        juntar("avaliacao", c.get("/avaliacoes/", params={"id_prova": prova["id_prova"], "limit": 1000}).json())
+        for inscricao in inscricoes:
+            juntar("cronometro", c.get("/cronometros/", params={"id_inscricao": inscricao["id_inscricao"]}).json())
+    return estado
+
+
+def test_replay_do_feed_reconstroi_o_estado(cenario):
+    c = cenario.c
+    aleatorio = random.Random(11)
+    outra_competicao = cenario.nova_competicao()
+    prova_de_fora = cenario.nova_prova(outra_competicao)
+    provas = [cenario.prova, cenario.nova_prova()]
+    inscricoes = list(cenario.inscricoes)
+    juiz = c.post("/juiz/", json={"nome": "Juiz", "email": "juiz@example.com"}).json()["id_juiz"]
+    avaliacoes, cronometros = [], []
+
+    # Um cliente sincroniza no meio do caminho e continua do cursor
+    parcial, cursor = None, 0
+    for passo in range(150):
+        if passo == 70:
+            parcial, cursor = reproduzir(c, cenario.competicao)
+        sorteio = aleatorio.random()
+        alvo = aleatorio.choice(inscricoes)
+        if sorteio < 0.3:
+            c.put(f"/inscricoes/{alvo}", json={
+                "tempo_prova": round(aleatorio.uniform(33, 58), 2), "faltas_prova": aleatorio.randint(0, 2),
+            })
+        elif sorteio < 0.4:
+            inscricoes.append(cenario.inscrever(f"m{aleatorio.randint(0, 5)}", id_prova=aleatorio.choice(provas)))
+        elif sorteio < 0.45 and len(inscricoes) > 3:
+            inscricoes.remove(alvo)
+            c.delete(f"/inscricoes/{alvo}")
+        elif sorteio < 0.5:
+            c.put(f"/inscricoes/{alvo}", json={"id_prova": aleatorio.choice(provas + [prova_de_fora])})
+        elif sorteio < 0.6:
+            id_cronometro = c.post("/cronometros/", json={
+                "id_inscricao": alvo, "tempo_inicial": "2026-05-01T10:00:00",
+            }).json()["id_cronometro"]
+            cronometros.append(id_cronometro)
+            c.post(f"/cronometros/{id_cronometro}/start")
+            c.post(f"/cronometros/{id_cronometro}/stop")
+        elif sorteio < 0.65 and cronometros:
+            c.delete(f"/cronometros/{cronometros.pop(aleatorio.randrange(len(cronometros)))}")
+        elif sorteio < 0.72:
+            avaliacoes.append(c.post("/avaliacoes/", json={
+                "id_prova": aleatorio.choice(provas), "id_juiz": juiz, "diretor_prova": "Diretor",
+            }).json()["id_avaliacao"])
+        elif sorteio < 0.76 and avaliacoes:
+            c.put(f"/avaliacoes/{aleatorio.choice(avaliacoes)}", json={"comentarios": f"passo {passo}"})
+        elif sorteio < 0.78 and avaliacoes:
+            c.delete(f"/avaliacoes/{avaliacoes.pop()}")
+        elif sorteio < 0.84:
+            resultados = c.get("/resultados/", params={"id_inscricao": alvo}).json()
+            if resultados:
+                c.put(f"/resultados/{resultados[0]['id_resultado']}", json={"total_pontos_t": aleatorio.randint(0, 20)})
+        elif sorteio < 0.9:
+            c.put(f"/provas/{aleatorio.choice(provas)}", json={"tsp": aleatorio.choice([38, 40, 42])})
+        elif sorteio < 0.93:
+            c.put(f"/provas/{aleatorio.choice(provas)}", json={"descricao": f"passo {passo}"})
+        else:
+            c.post(f"/competicoes/{cenario.competicao}/cronograma", json={"inicio": "2026-05-01T08:00:00"})
+
+    esperado = estado_atual(c, cenario.competicao)
+    assert reproduzir(c, cenario.competicao)[0] == esperado
+    assert reproduzir(c, cenario.competicao, parcial, cursor)[0] == esperado
+    assert reproduzir(c, outra_competicao)[0] == estado_atual(c, outra_competicao)
+
+
+def test_remocao_da_prova_remove_os_dependentes(cenario):
+    c = cenario.c
+    cenario.percurso(cenario.inscricoes[0], 39.0)
+    antes, cursor = reproduzir(c, cenario.competicao)
+    assert {entidade for entidade, _ in antes} == {"prova", "inscricao", "resultado"}
+    c.delete(f"/provas/{cenario.prova}")
+    depois, _ = reproduzir(c, cenario.competicao, antes, cursor)
+    assert depois == {} == estado_atual(c, cenario.competicao)
+
+
+def test_feed_com_competidor_e_juiz_removidos(cenario):
+    c = cenario.c
+    juiz = c.post("/juiz/", json={"nome": "Juiz", "email": "juiz@example.com"}).json()["id_juiz"]
+    c.post("/avaliacoes/", json={"id_prova": cenario.prova, "id_juiz": juiz, "diretor_prova": "Diretor"})
+    assert c.delete(f"/competidor/{cenario.competidor}").status_code == 200
+    assert c.delete(f"/juiz/{juiz}").status_code == 200
+
+    for since in (0, 3, 10):
+        assert c.get(f"/competicoes/{cenario.competicao}/changes", params={"since": since}).status_code == 200
+    estado, _ = reproduzir(c, cenario.competicao)
+    assert estado == estado_atual(c, cenario.competicao)
+    assert all(dados["id_competidor"] is None for (entidade, _), dados in estado.items() if entidade == "inscricao")
+    assert all(dados["id_juiz"] is None for (entidade, _), dados in estado.items() if entidade == "avaliacao")
+
+
+def test_paginas_e_competicao_inexistente(cenario):
+    c = cenario.c
+    primeira = c.get(f"/competicoes/{cenario.competicao}/changes", params={"limit": 2}).json()
+    assert len(primeira["alteracoes"]) == 2 and primeira["mais"]
+    vazia = c.get(f"/competicoes/{cenario.competicao}/changes", params={"since": 10**6}).json()
+    assert vazia == {"alteracoes": [], "cursor": 10**6, "mais": False}
+    assert c.get("/competicoes/999/changes").status_code == 404
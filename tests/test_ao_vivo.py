@@ -0,0 +1,101 @@
+import asyncio
+import json
+import time
+from app import main, pubsub
+
+
+def aguardar_assinante(id_prova: int):
+    # O endpoint assina o tópico logo depois do accept, no event loop do TestClient
+    limite = time.monotonic() + 2
+    while not pubsub.tem_assinantes(id_prova):
+        assert time.monotonic() < limite, "websocket não assinou o tópico"
+        time.sleep(0.01)
+
+
+def recebidas(ws, id_prova: int) -> list:
+    # Lê até um marcador publicado agora: mensagem que faltar falha o teste em vez de travar o receive
+    pubsub.publicar(id_prova, "fim", None)
+    mensagens = []
+    while (mensagem := ws.receive_json())["tipo"] != "fim":
+        mensagens.append(mensagem)
+    return mensagens
+
+
+def test_websocket_recebe_percursos_e_classificacao(cenario):
+    c = cenario.c
+    with c.websocket_connect(f"/ws/provas/{cenario.prova}") as ws:
+        aguardar_assinante(cenario.prova)
+        # Primeiro percurso da prova: a classificação ainda não está em memória
+        cenario.percurso(cenario.inscricoes[0], 35.0)
+        inscricao, classificacao = recebidas(ws, cenario.prova)
+        assert inscricao["tipo"] == "inscricao" and inscricao["id_prova"] == cenario.prova
+        assert inscricao["dados"]["tempo_prova"] == 35.0 and inscricao["dados"]["pontuacao"] == 0
+        assert classificacao == {
+            "tipo": "classificacao", "id_prova": cenario.prova,
+            "dados": [{"id_inscricao": cenario.inscricoes[0], "posicao": 1}],
+        }
+
+        cenario.percurso(cenario.inscricoes[1], 34.0)
+        assert recebidas(ws, cenario.prova)[1]["dados"] == [
+            {"id_inscricao": cenario.inscricoes[1], "posicao": 1}, {"id_inscricao": cenario.inscricoes[0], "posicao": 2},
+        ]
+
+        cronometro = c.post("/cronometros/", json={
+            "id_inscricao": cenario.inscricoes[2], "tempo_inicial": "2026-05-01T10:00:00",
+        }).json()["id_cronometro"]
+        c.post(f"/cronometros/{cronometro}/start")
+        [mensagem] = recebidas(ws, cenario.prova)
+        assert mensagem["tipo"] == "cronometragem" and mensagem["dados"]["status"] == "rodando"
+
+    # Desconectado, o tópico fica sem assinantes
+    limite = time.monotonic() + 2
+    while pubsub.tem_assinantes(cenario.prova):
+        assert time.monotonic() < limite
+        time.sleep(0.01)
+
+
+def test_outras_provas_nao_chegam(cenario):
+    c = cenario.c
+    outra = cenario.nova_prova()
+    outra_inscricao = cenario.inscrever("m0", id_prova=outra)
+    with c.websocket_connect(f"/ws/provas/{cenario.prova}") as ws:
+        aguardar_assinante(cenario.prova)
+        cenario.percurso(outra_inscricao, 30.0)
+        cenario.percurso(cenario.inscricoes[0], 36.0)
+        assert [mensagem["tipo"] for mensagem in recebidas(ws, cenario.prova)] == ["inscricao", "classificacao"]
+
+
+def test_sse(monkeypatch):
+    monkeypatch.setattr(main, "SSE_HEARTBEAT", 0.05)
+
+    async def ler():
+        resposta = await main.provas_sse(7)
+        eventos = resposta.body_iterator
+        try:
+            pubsub.publicar(7, "inscricao", {"id_inscricao": 1})
+            primeiro = await eventos.__anext__()
+            segundo = await eventos.__anext__()
+        finally:
+            await eventos.aclose()
+        return primeiro, segundo
+
+    primeiro, segundo = asyncio.run(ler())
+    cabecalho, dados = primeiro.strip().split("\n")
+    assert cabecalho == "event: inscricao"
+    assert json.loads(dados.removeprefix("data: ")) == {"tipo": "inscricao", "id_prova": 7, "dados": {"id_inscricao": 1}}
+    assert segundo == ": keep-alive\n\n"
+    assert not pubsub.tem_assinantes(7)
+
+
+def test_fila_cheia_descarta_as_mais_antigas(monkeypatch):
+    monkeypatch.setattr(pubsub, "QUEUE_SIZE", 2)
+
+    async def publicar_tres():
+        fila = pubsub.hub.subscribe("t")
+        for i in range(3):
+            pubsub.hub.publish("t", {"i": i})
+        await asyncio.sleep(0)
+        pubsub.hub.unsubscribe("t", fila)
+        return [fila.get_nowait()["i"] for _ in range(fila.qsize())]
+
+    assert asyncio.run(publicar_tres()) == [1, 2]
@@ -0,0 +1,46 @@
+import inspect
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from app import crud, crud_async
+from app.writer import WriterQueue
+
+
+def test_toda_funcao_do_crud_tem_versao_assincrona():
+    publicas = {
+        nome for nome, funcao in vars(crud).items()
+        if inspect.isfunction(funcao) and funcao.__module__ == crud.__name__ and not nome.startswith("_")
+    }
+    faltando = sorted(nome for nome in publicas if not inspect.iscoroutinefunction(getattr(crud_async, nome, None)))
+    assert faltando == []
+
+
+def test_fila_de_escrita_serializa_em_uma_thread():
+    fila = WriterQueue("teste")
+    threads, em_execucao, maximo = set(), [0], [0]
+    trava = threading.Lock()
+
+    def escrever(i):
+        with trava:
+            em_execucao[0] += 1
+            maximo[0] = max(maximo[0], em_execucao[0])
+        threads.add(threading.current_thread().name)
+        with trava:
+            em_execucao[0] -= 1
+        return i
+
+    with ThreadPoolExecutor(8) as executor:
+        assert list(executor.map(lambda i: fila.run(escrever, i), range(50))) == list(range(50))
+    assert threads == {"teste"} and maximo[0] == 1
+
+
+def test_fila_de_escrita_propaga_excecao_e_aceita_reentrada():
+    fila = WriterQueue("teste")
+
+    def falhar():
+        raise ValueError("x")
+
+    with pytest.raises(ValueError):
+        fila.run(falhar)
+    # Chamada feita de dentro da própria thread de escrita roda direto (sem deadlock)
+    assert fila.run(lambda: fila.run(lambda: 42)) == 42
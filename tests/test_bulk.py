@@ -0,0 +1,53 @@
+def test_bulk_de_caes_e_competidores(client):
+    caes = [
+        {"microchip": f"c{i}", "nome": "d", "raca": "r", "cernelha": "40", "categoria_salto": "S"} for i in range(50)
+    ]
+    resposta = client.post("/cao/bulk", json=caes + [caes[3], {"microchip": "sem-nome"}]).json()
+    assert resposta["inseridos"] == 50
+    assert [erro["indice"] for erro in resposta["erros"]] == [50, 51]
+    assert resposta["erros"][0]["erro"] == "Microchip c3 já cadastrado"
+    assert "nome" in resposta["erros"][1]["erro"]
+    assert len(client.get("/cao/", params={"limit": 1000}).json()) == 50
+
+    resposta = client.post("/competidor/bulk", json=[{"nome": f"h{i}", "escola": "e"} for i in range(20)] + [{"nome": 1}]).json()
+    assert resposta["inseridos"] == 20 and [erro["indice"] for erro in resposta["erros"]] == [20]
+
+
+def test_bulk_de_inscricoes(cenario):
+    c = cenario.c
+    itens = [
+        {"id_prova": cenario.prova, "id_competidor": cenario.competidor, "microchip_cao": f"m{i}", "colete_competidor": "b"}
+        for i in range(6)
+    ]
+    resposta = c.post("/inscricoes/bulk", json=itens + [
+        {**itens[0], "id_prova": 999},
+        {**itens[0], "id_competidor": 999},
+        {**itens[0], "microchip_cao": "zz"},
+        {**itens[0], "hora_inicio": "ontem"},
+    ]).json()
+    assert resposta["inseridos"] == 6
+    assert [(erro["indice"], erro["erro"]) for erro in resposta["erros"][:3]] == [
+        (6, "Prova 999 não encontrada"), (7, "Competidor 999 não encontrado"), (8, "Cão zz não encontrado"),
+    ]
+    assert resposta["erros"][3]["indice"] == 9
+    assert c.get(f"/provas/{cenario.prova}/stats").json()["total"]["inscritos"] == 12
+
+
+def test_bulk_com_percursos_ja_cronometrados(cenario):
+    c = cenario.c
+    base = {"id_prova": cenario.prova, "id_competidor": cenario.competidor, "colete_competidor": "b"}
+    c.post("/inscricoes/bulk", json=[
+        {**base, "microchip_cao": "m0", "tempo_prova": 41.5, "faltas_prova": 1},
+        {**base, "microchip_cao": "m1", "tempo_prova": 36.0},
+        {**base, "microchip_cao": "m2", "tempo_prova": 62.0},
+    ])
+    # Pontuados como numa inscrição criada uma a uma
+    importadas = c.get("/inscricoes/", params={"id_prova": cenario.prova, "after": cenario.inscricoes[-1]}).json()
+    assert [(linha["pontuacao"], linha["status"]) for linha in importadas] == [
+        (7, "pendente"), (0, "pendente"), (None, "eliminado"),
+    ]
+    assert importadas[1]["vel_media"] == 160 / 36.0
+    classificacao = c.get(f"/provas/{cenario.prova}/classificacao").json()
+    assert [linha["id_inscricao"] for linha in classificacao] == [importadas[1]["id_inscricao"], importadas[0]["id_inscricao"]]
+    total = c.get(f"/provas/{cenario.prova}/stats").json()["total"]
+    assert (total["percursos"], total["limpos"], total["eliminados"]) == (3, 1, 1)
@@ -0,0 +1,84 @@
+import pytest
+from app import cache
+
+
+@pytest.fixture(params=["memory", "redis"])
+def backend(request, monkeypatch, client):
+    if request.param == "memory":
+        novo = cache.MemoryBackend(maxsize=100, ttl=30)
+    else:
+        # Redis de mentira (fakeredis) no lugar de um servidor: mesmo protocolo de chaves, TTL e serialização
+        fakeredis = pytest.importorskip("fakeredis")
+        novo = cache.RedisBackend("redis://localhost", ttl=30, client=fakeredis.FakeRedis())
+    monkeypatch.setattr(cache, "backend", novo)
+    return novo
+
+
+def test_leitura_pelo_cache(cenario, backend):
+    c = cenario.c
+    for _ in range(3):
+        c.get(f"/provas/{cenario.prova}")
+        c.get("/cao/m1")
+    estatisticas = c.get("/cache/stats").json()
+    assert estatisticas["backend"] == backend.name
+    assert (estatisticas["hits"], estatisticas["misses"]) == (4, 2)
+    assert estatisticas["hit_ratio"] == pytest.approx(4 / 6)
+
+
+@pytest.mark.parametrize("rota, campo", [
+    ("/provas/{prova}", "descricao"),
+    ("/cao/livre", "nome"),
+    ("/competicoes/{competicao}", "nome"),
+])
+def test_gravacao_invalida(cenario, backend, rota, campo):
+    c = cenario.c
+    # Cão sem inscrições (microchip_cao não aceita nulo: o cão inscrito não pode ser removido)
+    c.post("/cao/", json={"microchip": "livre", "nome": "d", "raca": "r", "cernelha": "40", "categoria_salto": "S"})
+    url = rota.format(prova=cenario.prova, competicao=cenario.nova_competicao())
+    c.get(url)
+    c.put(url, json={campo: "novo"})
+    lido = c.get(url).json()
+    assert lido[campo] == "novo" and lido["versao"] == 2
+    c.delete(url)
+    assert c.get(url).status_code == 404
+
+
+def test_juiz_removido_sai_do_cache(client, backend):
+    juiz = client.post("/juiz/", json={"nome": "Juiz", "email": "juiz@example.com"}).json()["id_juiz"]
+    client.get(f"/juiz/{juiz}")
+    client.put(f"/juiz/{juiz}", json={"nome": "Outro"})
+    assert client.get(f"/juiz/{juiz}").json()["nome"] == "Outro"
+    client.delete(f"/juiz/{juiz}")
+    assert client.get(f"/juiz/{juiz}").status_code == 404
+
+
+def test_chaves_desvinculadas_nao_ficam_velhas_no_cache(cenario, backend):
+    c = cenario.c
+    assert c.get(f"/competicoes/{cenario.competicao}").json()["responsavel_id"] == cenario.user
+    assert c.get(f"/provas/{cenario.prova}").json()["id_competicao"] == cenario.competicao
+    c.delete(f"/users/{cenario.user}")
+    assert c.get(f"/competicoes/{cenario.competicao}").json()["responsavel_id"] is None
+    c.delete(f"/competicoes/{cenario.competicao}")
+    assert c.get(f"/provas/{cenario.prova}").json()["id_competicao"] is None
+
+
+def test_entrada_em_formato_antigo_conta_como_ausente(cenario, backend):
+    if backend.name != "redis":
+        pytest.skip("só o Redis guarda JSON entre versões do app")
+    c = cenario.c
+    c.get(f"/provas/{cenario.prova}")
+    backend._client.set(backend._key(("prova", cenario.prova)), b'{"id_prova": 1}')
+    assert c.get(f"/provas/{cenario.prova}").json()["versao"] == 1
+
+
+def test_memory_backend_lru_e_ttl(monkeypatch):
+    agora = [100.0]
+    monkeypatch.setattr(cache.time, "monotonic", lambda: agora[0])
+    backend = cache.MemoryBackend(maxsize=2, ttl=10)
+    backend.set("a", 1)
+    backend.set("b", 2)
+    backend.get("a", None)
+    backend.set("c", 3)
+    assert (backend.get("a", None), backend.get("b", None), backend.get("c", None)) == (1, None, 3)
+    agora[0] += 11
+    assert backend.get("a", None) is None and backend.size() == 1
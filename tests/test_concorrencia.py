@@ -0,0 +1,51 @@
+import pytest
+
+
+@pytest.mark.parametrize("rota, corpo", [
+    ("/provas/{prova}", {"descricao": "nova"}),
+    ("/inscricoes/{inscricao}", {"colete_competidor": "9"}),
+    ("/competicoes/{competicao}", {"nome": "Copa 2"}),
+    ("/cao/m0", {"nome": "Rex"}),
+    ("/competidor/{competidor}", {"nome": "Bia 2"}),
+])
+def test_if_match(cenario, rota, corpo):
+    c = cenario.c
+    url = rota.format(
+        prova=cenario.prova, inscricao=cenario.inscricoes[0],
+        competicao=cenario.competicao, competidor=cenario.competidor,
+    )
+    resposta = c.put(url, json=corpo, headers={"If-Match": '"1"'})
+    assert resposta.status_code == 200, resposta.text
+    assert resposta.headers["ETag"] == '"2"' and resposta.json()["versao"] == 2
+
+    # Edição feita sobre a versão 1, que já não existe: nada é gravado
+    velha = c.put(url, json={chave: "perdida" for chave in corpo}, headers={"If-Match": '"1"'})
+    assert velha.status_code == 412
+    assert velha.headers["ETag"] == '"2"'
+    assert c.get(url).json()["versao"] == 2
+
+    # Sem If-Match (ou *) a gravação não confere a versão
+    assert c.put(url, json=corpo, headers={"If-Match": "*"}).json()["versao"] == 3
+    assert c.put(url, json=corpo).json()["versao"] == 4
+
+
+def test_if_match_invalido_e_registro_inexistente(cenario):
+    c = cenario.c
+    assert c.put(f"/provas/{cenario.prova}", json={"descricao": "x"}, headers={"If-Match": "abc"}).status_code == 400
+    assert c.put("/provas/999", json={"descricao": "x"}, headers={"If-Match": '"1"'}).status_code == 404
+
+
+def test_if_match_aceita_etag_fraco(cenario):
+    c = cenario.c
+    resposta = c.put(f"/inscricoes/{cenario.inscricoes[0]}", json={"tempo_prova": 39.0}, headers={"If-Match": 'W/"1"'})
+    assert resposta.status_code == 200
+
+
+def test_escritas_do_sistema_tambem_mudam_a_versao(cenario):
+    c = cenario.c
+    # A repontuação grava a inscrição: quem leu antes dela recebe 412
+    cenario.percurso(cenario.inscricoes[0], 42.0)
+    lida = c.get(f"/inscricoes/{cenario.inscricoes[0]}").headers["ETag"]
+    c.put(f"/provas/{cenario.prova}", json={"tsp": 45})
+    resposta = c.put(f"/inscricoes/{cenario.inscricoes[0]}", json={"faltas_prova": 1}, headers={"If-Match": lida})
+    assert resposta.status_code == 412
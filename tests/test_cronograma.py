@@ -0,0 +1,70 @@
+from datetime import datetime, timedelta
+
+
+def hora(texto: str) -> datetime:
+    # hora_inicio tem fuso: o PostgreSQL devolve +00:00, o SQLite guarda sem fuso
+    return datetime.fromisoformat(texto).replace(tzinfo=None)
+
+
+def horarios(c, id_prova: int) -> list:
+    inscricoes = c.get("/inscricoes/", params={"id_prova": id_prova, "limit": 1000}).json()
+    return sorted((hora(i["hora_inicio"]), i["id_inscricao"]) for i in inscricoes if i["hora_inicio"])
+
+
+def test_cronograma_agrupa_alturas(cenario):
+    c = cenario.c
+    resposta = c.post(f"/competicoes/{cenario.competicao}/cronograma", json={"espacamento": 0})
+    assert resposta.status_code == 200, resposta.text
+    cronograma = resposta.json()
+    assert cronograma["agendadas"] == 6 and cronograma["trocas_de_altura"] == 1
+    [prova] = cronograma["provas"]
+    assert prova["percursos"] == 6 and hora(prova["inicio"]) == datetime(2026, 5, 1, 9)
+
+    ordem = horarios(c, cenario.prova)
+    # L (m0, m2, m4) antes de S (m1, m3, m5); intervalo de TMP + 30 s e 300 s na troca de altura
+    assert [id_inscricao for _, id_inscricao in ordem] == [cenario.inscricoes[i] for i in (0, 2, 4, 1, 3, 5)]
+    passos = [(b - a).total_seconds() for (a, _), (b, _) in zip(ordem, ordem[1:])]
+    assert passos == [90, 90, 390, 90, 90]
+
+
+def test_cronograma_espaca_os_caes_do_mesmo_condutor(cenario):
+    c = cenario.c
+    # Um só condutor com três cães L e outros três condutores com um cão L cada
+    outros = [c.post("/competidor/", json={"nome": f"C{i}", "escola": "E"}).json()["id_competidor"] for i in range(3)]
+    prova = cenario.nova_prova()
+    for i in (0, 2, 4):
+        cenario.inscrever(f"m{i}", id_prova=prova)
+    for i, competidor in enumerate(outros):
+        c.post("/cao/", json={"microchip": f"o{i}", "nome": "d", "raca": "r", "cernelha": "40", "categoria_salto": "L"})
+        c.post("/inscricoes/", json={"id_prova": prova, "id_competidor": competidor, "microchip_cao": f"o{i}", "colete_competidor": "9"})
+
+    c.post(f"/competicoes/{cenario.competicao}/cronograma", json={"espacamento": 1})
+    inscricoes = {i["id_inscricao"]: i for i in c.get("/inscricoes/", params={"id_prova": prova}).json()}
+    condutores = [inscricoes[id_inscricao]["id_competidor"] for _, id_inscricao in horarios(c, prova)]
+    assert all(a != b for a, b in zip(condutores, condutores[1:]))
+
+
+def test_percursos_corridos_mantem_o_horario(cenario):
+    c = cenario.c
+    c.put(f"/inscricoes/{cenario.inscricoes[0]}", json={"hora_inicio": "2026-05-01T08:00:00"})
+    cenario.percurso(cenario.inscricoes[0], 39.0)
+    inicio = datetime(2026, 5, 1, 14, 0)
+    cronograma = c.post(f"/competicoes/{cenario.competicao}/cronograma", json={"inicio": inicio.isoformat()}).json()
+    assert cronograma["agendadas"] == 5
+    assert hora(c.get(f"/inscricoes/{cenario.inscricoes[0]}").json()["hora_inicio"]) == datetime(2026, 5, 1, 8)
+    assert min(h for h, _ in horarios(c, cenario.prova) if h >= inicio) == inicio
+
+
+def test_intervalo_entre_provas(cenario):
+    c = cenario.c
+    segunda = cenario.nova_prova()
+    cenario.inscrever("m1", id_prova=segunda)
+    cronograma = c.post(f"/competicoes/{cenario.competicao}/cronograma", json={"intervalo_prova": 600}).json()
+    primeira, seguinte = cronograma["provas"]
+    assert hora(seguinte["inicio"]) - hora(primeira["fim"]) == timedelta(seconds=600)
+    # A segunda prova começa pela altura em que a primeira terminou: sem troca entre provas
+    assert cronograma["trocas_de_altura"] == 1
+
+
+def test_cronograma_de_competicao_inexistente(client):
+    assert client.post("/competicoes/999/cronograma").status_code == 404
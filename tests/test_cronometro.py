@@ -0,0 +1,80 @@
+import time
+import pytest
+from app import timing
+
+
+def novo_cronometro(c, id_inscricao: int) -> int:
+    return c.post("/cronometros/", json={
+        "id_inscricao": id_inscricao, "tempo_inicial": "2026-05-01T10:00:00",
+    }).json()["id_cronometro"]
+
+
+def test_start_pause_stop(cenario):
+    c = cenario.c
+    cronometro = novo_cronometro(c, cenario.inscricoes[0])
+    assert c.post(f"/cronometros/{cronometro}/start").json()["status"] == "rodando"
+    time.sleep(0.1)
+    pausado = c.post(f"/cronometros/{cronometro}/pause").json()
+    assert pausado["status"] == "pausado" and pausado["tempo_oficial"] >= 0.1
+    # O tempo pausado não conta
+    time.sleep(0.3)
+    c.post(f"/cronometros/{cronometro}/start")
+    time.sleep(0.1)
+    parado = c.post(f"/cronometros/{cronometro}/stop").json()
+    assert parado["status"] == "finalizado" and parado["tempo_final"] is not None
+    assert 0.2 <= parado["tempo_oficial"] < 0.45
+
+    # O tempo oficial vai para a inscrição, já pontuada e classificada
+    inscricao = c.get(f"/inscricoes/{cenario.inscricoes[0]}").json()
+    assert inscricao["tempo_prova"] == parado["tempo_oficial"]
+    assert inscricao["pontuacao"] == 0
+    assert c.get(f"/provas/{cenario.prova}/classificacao").json()[0]["id_inscricao"] == cenario.inscricoes[0]
+
+
+@pytest.mark.parametrize("comando", ["pause", "stop"])
+def test_comandos_fora_de_ordem(cenario, comando):
+    c = cenario.c
+    cronometro = novo_cronometro(c, cenario.inscricoes[0])
+    assert c.post(f"/cronometros/{cronometro}/{comando}").status_code == 409
+    c.post(f"/cronometros/{cronometro}/start")
+    c.post(f"/cronometros/{cronometro}/stop")
+    assert c.post(f"/cronometros/{cronometro}/start").status_code == 409
+    assert c.post(f"/cronometros/999/{comando}").status_code == 404
+
+
+def test_start_repetido_nao_zera(cenario):
+    c = cenario.c
+    cronometro = novo_cronometro(c, cenario.inscricoes[0])
+    inicio = c.post(f"/cronometros/{cronometro}/start").json()["tempo_inicial"]
+    assert c.post(f"/cronometros/{cronometro}/start").json()["tempo_inicial"] == inicio
+    # A resposta do comando é a mesma que a releitura devolve
+    parado = c.post(f"/cronometros/{cronometro}/stop").json()
+    relido = c.get(f"/cronometros/{cronometro}").json()
+    assert (relido["tempo_inicial"], relido["tempo_final"]) == (inicio, parado["tempo_final"])
+
+
+def test_stop_sem_o_inicio_em_memoria(cenario):
+    # Processo reiniciado entre o start e o stop: vale o relógio de parede desde tempo_inicial
+    c = cenario.c
+    cronometro = novo_cronometro(c, cenario.inscricoes[0])
+    c.post(f"/cronometros/{cronometro}/start")
+    timing._inicios.clear()
+    time.sleep(0.2)
+    assert c.post(f"/cronometros/{cronometro}/stop").json()["tempo_oficial"] >= 0.2
+
+
+def test_stop_com_inscricao_sem_prova_ou_removida(cenario):
+    c = cenario.c
+    sem_prova = novo_cronometro(c, cenario.inscricoes[0])
+    removida = novo_cronometro(c, cenario.inscricoes[1])
+    for cronometro in (sem_prova, removida):
+        c.post(f"/cronometros/{cronometro}/start")
+    c.delete(f"/provas/{cenario.prova}")
+    c.delete(f"/inscricoes/{cenario.inscricoes[1]}")
+
+    parado = c.post(f"/cronometros/{sem_prova}/stop")
+    assert parado.status_code == 200
+    assert c.get(f"/inscricoes/{cenario.inscricoes[0]}").json()["tempo_prova"] == parado.json()["tempo_oficial"]
+    parado = c.post(f"/cronometros/{removida}/stop")
+    assert parado.status_code == 200
+    assert parado.json()["id_inscricao"] is None
@@ -0,0 +1,87 @@
+import threading
+import pytest
+from sqlalchemy import Column, Index, Integer, MetaData, String, Table, create_engine, inspect, text
+from app import config
+from app.database import adicionar_colunas, apply_sqlite_tuning, criar_indices, engine, engine_options, is_sqlite, preparar_schema
+
+
+def test_engine_options():
+    assert engine_options("sqlite://") == {"connect_args": {"check_same_thread": False}}
+    assert engine_options("sqlite+aiosqlite:///:memory:") == {}
+    arquivo = engine_options("sqlite:///agility.db")
+    assert arquivo["connect_args"] == {"check_same_thread": False}
+    assert arquivo["pool_size"] == config.DB_POOL_SIZE
+    postgres = engine_options("postgresql+psycopg://u:s@localhost/agility")
+    assert "connect_args" not in postgres
+    assert (postgres["max_overflow"], postgres["pool_pre_ping"]) == (config.DB_MAX_OVERFLOW, config.DB_POOL_PRE_PING)
+    assert is_sqlite("sqlite:///x.db") and not is_sqlite("postgresql://localhost/x")
+
+
+def test_pragmas_do_sqlite(tmp_path):
+    teste = create_engine(f"sqlite:///{tmp_path}/tuning.db")
+    apply_sqlite_tuning(teste)
+    with teste.connect() as conn:
+        assert conn.exec_driver_sql("PRAGMA journal_mode").scalar() == "wal"
+        assert conn.exec_driver_sql("PRAGMA synchronous").scalar() == 1  # NORMAL
+        assert conn.exec_driver_sql("PRAGMA busy_timeout").scalar() == config.SQLITE_BUSY_TIMEOUT_MS
+    teste.dispose()
+
+
+def test_adicionar_colunas(tmp_path):
+    teste = create_engine(f"sqlite:///{tmp_path}/antigo.db")
+    with teste.begin() as conn:
+        conn.execute(text("CREATE TABLE juiz (id INTEGER PRIMARY KEY)"))
+        conn.execute(text("INSERT INTO juiz (id) VALUES (1)"))
+    metadata = MetaData()
+    Table("juiz", metadata, Column("id", Integer, primary_key=True), Column("versao", Integer, nullable=False, server_default="1"))
+    Table("nova", metadata, Column("id", Integer, primary_key=True))
+    adicionar_colunas(teste, metadata)
+    adicionar_colunas(teste, metadata)  # idempotente
+    assert {coluna["name"] for coluna in inspect(teste).get_columns("juiz")} == {"id", "versao"}
+    # Tabela inexistente fica para o create_all
+    assert not inspect(teste).has_table("nova")
+    with teste.connect() as conn:
+        assert conn.execute(text("SELECT versao FROM juiz")).scalar() == 1
+    teste.dispose()
+
+
+def test_criar_indices(tmp_path):
+    teste = create_engine(f"sqlite:///{tmp_path}/antigo.db")
+    with teste.begin() as conn:
+        conn.execute(text("CREATE TABLE inscricao (id INTEGER PRIMARY KEY, status VARCHAR)"))
+    metadata = MetaData()
+    Table(
+        "inscricao", metadata, Column("id", Integer, primary_key=True), Column("status", String),
+        Index("ix_inscricao_status_id", "status", "id"),
+    )
+    criar_indices(teste, metadata)
+    criar_indices(teste, metadata)  # idempotente
+    assert [indice["name"] for indice in inspect(teste).get_indexes("inscricao")] == ["ix_inscricao_status_id"]
+    teste.dispose()
+
+
+@pytest.mark.skipif(engine.dialect.name != "postgresql", reason="advisory lock só no PostgreSQL")
+def test_workers_preparando_o_schema_juntos():
+    antiga, nova = MetaData(), MetaData()
+    Table("migracao", antiga, Column("id", Integer, primary_key=True))
+    Table("migracao", nova, Column("id", Integer, primary_key=True), Column("versao", Integer, server_default="1"))
+    antiga.drop_all(engine)
+    antiga.create_all(engine)
+    largada, erros = threading.Barrier(4), []
+
+    def worker():
+        largada.wait()
+        try:
+            with preparar_schema(engine):
+                adicionar_colunas(engine, nova)
+        except Exception as exc:
+            erros.append(exc)
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert erros == []
+    assert {coluna["name"] for coluna in inspect(engine).get_columns("migracao")} == {"id", "versao"}
+    nova.drop_all(engine)
@@ -0,0 +1,56 @@
+import pytest
+
+ROTAS = [
+    ("/users/999", {"name": "x", "email": "x@example.com"}),
+    ("/competicoes/999", {"nome": "x"}),
+    ("/provas/999", {"descricao": "x"}),
+    ("/inscricoes/999", {"faltas_prova": 1}),
+    ("/competidor/999", {"nome": "x"}),
+    ("/cao/nenhum", {"nome": "x"}),
+    ("/juiz/999", {"nome": "x"}),
+    ("/resultados/999", {"posicao": 1}),
+    ("/avaliacoes/999", {"nota": 1}),
+    ("/cronometros/999", {"tempo_inicial": "2026-05-01T10:00:00"}),
+]
+
+
+@pytest.mark.parametrize("url, corpo", ROTAS)
+def test_put_e_delete_de_inexistente(client, url, corpo):
+    assert client.put(url, json=corpo).status_code == 404
+    assert client.delete(url).status_code == 404
+
+
+def test_update_em_um_statement(cenario, consultas):
+    c = cenario.c
+    juiz = c.post("/juiz/", json={"nome": "Juiz", "email": "juiz@example.com"}).json()["id_juiz"]
+    consultas.clear()
+    resposta = c.put(f"/juiz/{juiz}", json={"nome": "Outro"})
+    assert resposta.json()["nome"] == "Outro" and resposta.json()["versao"] == 2
+    # UPDATE ... RETURNING: existência, gravação e resposta sem SELECT/refresh separados
+    assert [s.split()[0] for s in consultas] == ["UPDATE"]
+
+
+def test_delete_em_um_statement(client, consultas):
+    juiz = client.post("/juiz/", json={"nome": "Juiz", "email": "juiz@example.com"}).json()["id_juiz"]
+    consultas.clear()
+    assert client.delete(f"/juiz/{juiz}").status_code == 200
+    # Sem SELECT de existência: o rowcount do DELETE decide o 404 (antes dele, só o desvínculo das avaliações)
+    assert [s.split()[0] for s in consultas][-1] == "DELETE"
+    assert not any(s.startswith("SELECT") and "FROM juiz" in s for s in consultas)
+
+
+def test_delete_de_cao_inscrito(cenario):
+    c = cenario.c
+    resposta = c.delete("/cao/m0")
+    assert resposta.status_code == 409
+    assert c.get("/cao/m0").status_code == 200
+    assert c.get(f"/inscricoes/{cenario.inscricoes[0]}").json()["microchip_cao"] == "m0"
+    c.delete(f"/inscricoes/{cenario.inscricoes[0]}")
+    assert c.delete("/cao/m0").status_code == 200
+
+
+def test_create_sem_refresh(client, consultas):
+    consultas.clear()
+    resposta = client.post("/competidor/", json={"nome": "Bia", "escola": "E"})
+    assert resposta.status_code == 200 and resposta.json()["id_competidor"] >= 1
+    assert [s.split()[0] for s in consultas] == ["INSERT"]
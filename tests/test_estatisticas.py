@@ -0,0 +1,165 @@
+import random
+import pytest
+from app import stats, temporada
+from app.models import TemporadaCao, TemporadaCompetidor
+
+
+def arredondado(valor):
+    if isinstance(valor, dict):
+        return {chave: arredondado(item) for chave, item in valor.items()}
+    if isinstance(valor, list):
+        return [arredondado(item) for item in valor]
+    return round(valor, 9) if isinstance(valor, float) else valor
+
+
+def conferir_stats(db, id_prova: int):
+    # O resumo mantido a cada gravação é igual ao reconstruído do zero
+    db.expire_all()
+    incremental = stats.da_prova(db, id_prova)
+    stats.recalcular(db, id_prova)
+    assert arredondado(incremental) == arredondado(stats.da_prova(db, id_prova))
+    db.rollback()
+
+
+def retrato_temporada(db) -> list:
+    tabelas = []
+    for model in (TemporadaCao, TemporadaCompetidor):
+        assert db.query(model).filter(model.provas < 0).count() == 0
+        tabelas.append(sorted(tuple(linha) for linha in db.query(*model.__table__.c).filter(model.provas != 0)))
+    return tabelas
+
+
+def conferir_temporada(db):
+    db.expire_all()
+    incremental = retrato_temporada(db)
+    temporada.recalcular(db)
+    assert incremental == retrato_temporada(db)
+    db.rollback()
+
+
+def test_stats_incrementais_iguais_ao_recalculo(cenario, db):
+    c = cenario.c
+    aleatorio = random.Random(3)
+    inscricoes = list(cenario.inscricoes)
+    conferir_stats(db, cenario.prova)
+    for _ in range(120):
+        alvo = aleatorio.choice(inscricoes)
+        sorteio = aleatorio.random()
+        if sorteio < 0.5:
+            c.put(f"/inscricoes/{alvo}", json={
+                "tempo_prova": aleatorio.choice([None, 30 + aleatorio.random() * 40]),
+                "faltas_prova": aleatorio.randint(0, 2), "recusas_prova": aleatorio.randint(0, 3),
+            })
+        elif sorteio < 0.6:
+            c.put(f"/inscricoes/{alvo}", json={"status": aleatorio.choice(["pendente", "eliminado"])})
+        elif sorteio < 0.7:
+            c.put(f"/inscricoes/{alvo}", json={"microchip_cao": f"m{aleatorio.randint(0, 5)}"})
+        elif sorteio < 0.75:
+            c.put(f"/cao/m{aleatorio.randint(0, 5)}", json={"categoria_salto": aleatorio.choice(["S", "M", "L"])})
+        elif sorteio < 0.8:
+            c.put(f"/provas/{cenario.prova}", json={"tsp": aleatorio.choice([38, 40, 45])})
+        elif sorteio < 0.85:
+            inscricoes.append(cenario.inscrever("m1", tempo_prova=35.5))
+        elif sorteio < 0.9 and len(inscricoes) > 3:
+            c.delete(f"/inscricoes/{inscricoes.pop(aleatorio.randrange(len(inscricoes)))}")
+        else:
+            c.post("/inscricoes/bulk", json=[{
+                "id_prova": cenario.prova, "id_competidor": cenario.competidor,
+                "microchip_cao": "m2", "colete_competidor": "b", "tempo_prova": 41.0,
+            }])
+        conferir_stats(db, cenario.prova)
+
+
+def test_percurso_no_mesmo_grupo_em_um_update(cenario, db, consultas):
+    cenario.percurso(cenario.inscricoes[0], 41.0)
+    consultas.clear()
+    cenario.percurso(cenario.inscricoes[0], 39.0, faltas=1)
+    # O cão é lido uma vez e o grupo recebe só a diferença
+    assert sum(1 for s in consultas if s.startswith("SELECT") and "FROM cao" in s) == 1
+    assert sum(1 for s in consultas if s.startswith("UPDATE estatistica_prova")) == 1
+    consultas.clear()
+    cenario.c.put(f"/inscricoes/{cenario.inscricoes[0]}", json={"faltas_prova": 1})
+    assert not any(s.startswith("UPDATE estatistica_prova") for s in consultas)
+    conferir_stats(db, cenario.prova)
+
+
+def test_stats_da_prova_e_da_competicao(cenario):
+    c = cenario.c
+    cenario.percurso(cenario.inscricoes[0], 38.0)                 # limpo
+    cenario.percurso(cenario.inscricoes[1], 42.0)                 # falta de tempo
+    cenario.percurso(cenario.inscricoes[2], 61.0)                 # eliminado pelo TMP
+    total = c.get(f"/provas/{cenario.prova}/stats").json()["total"]
+    assert total["inscritos"] == 6
+    assert total["percursos"] == 3
+    assert total["limpos"] == 1
+    assert total["eliminados"] == 1
+    assert total["melhor_tempo"] == 38.0
+    assert total["vel_media"] == pytest.approx((160 / 38 + 160 / 42) / 2)
+
+    cenario.nova_prova()
+    assert c.get(f"/competicoes/{cenario.competicao}/stats").json()["total"] == total
+    assert c.get("/provas/999/stats").status_code == 404
+    assert c.get("/competicoes/999/stats").status_code == 404
+
+
+def test_temporada_incremental_igual_ao_recalculo(cenario, db):
+    c = cenario.c
+    aleatorio = random.Random(5)
+    outra_competicao = cenario.nova_competicao("2025-05-01T09:00:00")
+    provas = [cenario.prova, cenario.nova_prova(outra_competicao, categoria="A2")]
+    competidores = [cenario.competidor, c.post("/competidor/", json={"nome": "Caio", "escola": "E"}).json()["id_competidor"]]
+    inscricoes = list(cenario.inscricoes) + [cenario.inscrever(f"m{i}", id_prova=provas[1]) for i in range(6)]
+    resultados = []
+    conferir_temporada(db)
+    for _ in range(150):
+        sorteio = aleatorio.random()
+        if sorteio < 0.3 or not resultados:
+            resultados.append(c.post("/resultados/", json={
+                "id_inscricao": aleatorio.choice(inscricoes),
+                "total_pontos_t": aleatorio.randint(0, 20), "total_pontos_tp": aleatorio.randint(0, 20),
+            }).json()["id_resultado"])
+        elif sorteio < 0.45:
+            c.put(f"/resultados/{aleatorio.choice(resultados)}", json={"total_pontos_t": aleatorio.randint(0, 20)})
+        elif sorteio < 0.5:
+            c.put(f"/resultados/{aleatorio.choice(resultados)}", json={"id_inscricao": aleatorio.choice(inscricoes)})
+        elif sorteio < 0.55 and len(resultados) > 2:
+            c.delete(f"/resultados/{resultados.pop(aleatorio.randrange(len(resultados)))}")
+        elif sorteio < 0.62:
+            c.put(f"/inscricoes/{aleatorio.choice(inscricoes)}", json={"microchip_cao": f"m{aleatorio.randint(0, 5)}"})
+        elif sorteio < 0.67:
+            c.put(f"/inscricoes/{aleatorio.choice(inscricoes)}", json={"id_competidor": aleatorio.choice(competidores)})
+        elif sorteio < 0.72:
+            c.put(f"/inscricoes/{aleatorio.choice(inscricoes)}", json={"id_prova": aleatorio.choice(provas)})
+        elif sorteio < 0.8:
+            c.put(f"/provas/{aleatorio.choice(provas)}", json={"categoria": aleatorio.choice(["A1", "A2"])})
+        elif sorteio < 0.86:
+            c.put(f"/competicoes/{aleatorio.choice([cenario.competicao, outra_competicao])}", json={
+                "data": aleatorio.choice(["2025-03-01T10:00:00", "2026-03-01T10:00:00"]),
+            })
+        elif sorteio < 0.9 and len(inscricoes) > 4:
+            c.delete(f"/inscricoes/{inscricoes.pop(aleatorio.randrange(len(inscricoes)))}")
+        conferir_temporada(db)
+
+    # Remoções em cascata: prova, competição e competidor
+    c.delete(f"/provas/{provas[0]}")
+    conferir_temporada(db)
+    c.delete(f"/competicoes/{outra_competicao}")
+    conferir_temporada(db)
+    c.delete(f"/competidor/{competidores[0]}")
+    conferir_temporada(db)
+
+
+def test_rankings(cenario):
+    c = cenario.c
+    for i, pontos in enumerate((12, 30, 7)):
+        c.post("/resultados/", json={"id_inscricao": cenario.inscricoes[i], "total_pontos_t": pontos, "total_pontos_tp": 1})
+    ranking = c.get("/rankings", params={"season": 2026}).json()
+    assert [(linha["posicao"], linha["microchip"], linha["pontos"]) for linha in ranking] == [
+        (1, "m1", 30), (2, "m0", 12), (3, "m2", 7),
+    ]
+    por_competidor = c.get("/rankings", params={"season": 2026, "por": "competidor", "categoria": "A1"}).json()
+    assert por_competidor == [{
+        "posicao": 1, "id_competidor": cenario.competidor, "nome": "Bia", "pontos": 49, "pontos_tp": 3, "provas": 3,
+    }]
+    assert c.get("/rankings", params={"season": 2025}).json() == []
+    assert c.get("/rankings", params={"season": 2026, "por": "x"}).status_code == 422
@@ -0,0 +1,41 @@
+def test_expand_da_prova(cenario):
+    c = cenario.c
+    cenario.percurso(cenario.inscricoes[0], 39.0)
+    prova = c.get(f"/provas/{cenario.prova}", params={"expand": "inscricoes.cao,inscricoes.resultados"}).json()
+    assert len(prova["inscricoes"]) == 6
+    primeira = prova["inscricoes"][0]
+    assert primeira["cao"]["microchip"] == "m0"
+    assert primeira["resultados"][0]["posicao"] == 1
+    # Só o que foi pedido entra na resposta
+    assert "competidor" not in primeira and "avaliacoes" not in prova
+    assert "inscricoes" not in c.get(f"/provas/{cenario.prova}").json()
+
+
+def test_expand_da_inscricao(cenario):
+    c = cenario.c
+    c.post("/cronometros/", json={"id_inscricao": cenario.inscricoes[0], "tempo_inicial": "2026-05-01T10:00:00"})
+    inscricao = c.get(f"/inscricoes/{cenario.inscricoes[0]}", params={"expand": "competidor,cronometros"}).json()
+    assert inscricao["competidor"]["nome"] == "Bia"
+    assert len(inscricao["cronometros"]) == 1
+    assert "cao" not in inscricao
+
+
+def test_expand_sem_n_mais_1(cenario, consultas):
+    c = cenario.c
+    expand = {"expand": "inscricoes.cao,inscricoes.competidor,inscricoes.resultados,avaliacoes"}
+    consultas.clear()
+    c.get(f"/provas/{cenario.prova}", params=expand)
+    poucas = len(consultas)
+    for i in range(6, 30):
+        c.post("/cao/", json={"microchip": f"m{i}", "nome": "d", "raca": "r", "cernelha": "40", "categoria_salto": "S"})
+        cenario.percurso(cenario.inscrever(f"m{i}"), 30 + i)
+    consultas.clear()
+    assert len(c.get(f"/provas/{cenario.prova}", params=expand).json()["inscricoes"]) == 30
+    assert len(consultas) == poucas
+
+
+def test_expand_invalido(cenario):
+    c = cenario.c
+    assert c.get(f"/provas/{cenario.prova}", params={"expand": "juiz"}).status_code == 422
+    assert c.get(f"/inscricoes/{cenario.inscricoes[0]}", params={"expand": "prova"}).status_code == 422
+    assert c.get("/provas/999", params={"expand": "inscricoes"}).status_code == 404
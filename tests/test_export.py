@@ -0,0 +1,38 @@
+import csv
+import io
+import json
+from app import export
+
+
+def test_export_ndjson(cenario):
+    c = cenario.c
+    cenario.percurso(cenario.inscricoes[0], 39.0)
+    c.post("/cronometros/", json={"id_inscricao": cenario.inscricoes[0], "tempo_inicial": "2026-05-01T10:00:00"})
+    # Prova de outra competição fica de fora
+    cenario.nova_prova(cenario.nova_competicao())
+
+    resposta = c.get(f"/competicoes/{cenario.competicao}/export")
+    assert resposta.status_code == 200
+    assert resposta.headers["content-type"] == "application/x-ndjson"
+    linhas = [json.loads(linha) for linha in resposta.text.splitlines()]
+    tipos = [linha["tipo"] for linha in linhas]
+    assert tipos == ["competicao", "prova"] + ["inscricao"] * 6 + ["cronometragem", "resultado"]
+    assert linhas[0]["data"] == "2026-05-01T09:00:00"
+    assert linhas[1]["tsp"] == 40
+
+
+def test_export_csv_em_lotes(cenario, monkeypatch):
+    c = cenario.c
+    monkeypatch.setattr(export, "BATCH_SIZE", 2)
+    cenario.percurso(cenario.inscricoes[0], 39.0)
+    resposta = c.get(f"/competicoes/{cenario.competicao}/export", params={"formato": "csv"})
+    assert resposta.headers["content-disposition"] == f'attachment; filename="competicao_{cenario.competicao}.csv"'
+    linhas = list(csv.DictReader(io.StringIO(resposta.text)))
+    assert [int(linha["id_inscricao"]) for linha in linhas] == cenario.inscricoes
+    assert linhas[0]["tempo_prova"] == "39.0" and linhas[0]["posicao"] == "1"
+    assert linhas[1]["posicao"] == ""
+
+
+def test_export_de_competicao_inexistente(client):
+    assert client.get("/competicoes/999/export").status_code == 404
+    assert client.get("/competicoes/999/export", params={"formato": "xml"}).status_code == 422
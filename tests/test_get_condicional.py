@@ -0,0 +1,65 @@
+import pytest
+
+
+@pytest.mark.parametrize("rota", [
+    "/provas/{prova}", "/inscricoes/{inscricao}", "/competicoes/{competicao}", "/cao/m0", "/competidor/{competidor}",
+])
+def test_if_none_match_no_detalhe(cenario, rota):
+    c = cenario.c
+    url = rota.format(
+        prova=cenario.prova, inscricao=cenario.inscricoes[0],
+        competicao=cenario.competicao, competidor=cenario.competidor,
+    )
+    primeira = c.get(url)
+    etag = primeira.headers["ETag"]
+    repetida = c.get(url, headers={"If-None-Match": etag})
+    assert repetida.status_code == 304
+    assert repetida.content == b""
+    assert repetida.headers["ETag"] == etag
+    assert c.get(url, headers={"If-None-Match": f'W/{etag}, "99"'}).status_code == 304
+    assert c.get(url, headers={"If-None-Match": "*"}).status_code == 304
+
+    # Depois de uma gravação o ETag antigo não vale mais
+    chave = "colete_competidor" if "inscricoes" in url else "descricao" if "provas" in url else "nome"
+    c.put(url, json={chave: "outro"})
+    atualizada = c.get(url, headers={"If-None-Match": etag})
+    assert atualizada.status_code == 200
+    assert atualizada.headers["ETag"] != etag
+
+
+def test_if_modified_since(cenario):
+    c = cenario.c
+    url = f"/provas/{cenario.prova}"
+    modificado = c.get(url).headers["Last-Modified"]
+    assert c.get(url, headers={"If-Modified-Since": modificado}).status_code == 304
+    assert c.get(url, headers={"If-Modified-Since": "Thu, 01 Jan 2015 00:00:00 GMT"}).status_code == 200
+    assert c.get(url, headers={"If-Modified-Since": "ontem"}).status_code == 200
+    # If-None-Match tem precedência
+    assert c.get(url, headers={"If-None-Match": '"99"', "If-Modified-Since": modificado}).status_code == 200
+
+
+def test_if_none_match_nas_listas(cenario):
+    c = cenario.c
+    parametros = {"id_prova": cenario.prova, "limit": 3}
+    pagina = c.get("/inscricoes/", params=parametros)
+    etag = pagina.headers["ETag"]
+    assert etag.startswith('W/"')
+    assert c.get("/inscricoes/", params=parametros, headers={"If-None-Match": etag}).status_code == 304
+
+    # Gravação numa linha da página, inserção e remoção invalidam a marca
+    c.put(f"/inscricoes/{cenario.inscricoes[1]}", json={"colete_competidor": "x"})
+    nova = c.get("/inscricoes/", params=parametros, headers={"If-None-Match": etag})
+    assert nova.status_code == 200 and nova.headers["ETag"] != etag
+    etag = nova.headers["ETag"]
+    c.delete(f"/inscricoes/{cenario.inscricoes[0]}")
+    assert c.get("/inscricoes/", params=parametros, headers={"If-None-Match": etag}).status_code == 200
+
+    # Gravação fora da página não muda a marca dela
+    etag = c.get("/inscricoes/", params=parametros).headers["ETag"]
+    c.put(f"/inscricoes/{cenario.inscricoes[5]}", json={"colete_competidor": "y"})
+    assert c.get("/inscricoes/", params=parametros, headers={"If-None-Match": etag}).status_code == 304
+
+
+def test_registro_inexistente(client):
+    assert client.get("/inscricoes/999", headers={"If-None-Match": '"1"'}).status_code == 404
+    assert client.get("/provas/999", headers={"If-None-Match": '"1"'}).status_code == 404
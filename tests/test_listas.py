@@ -0,0 +1,98 @@
+import json
+import pytest
+
+
+class Int(int):
+    pass
+
+
+def tipado(corpo: str):
+    # 40 e 40.0 são iguais em Python: marca os inteiros do JSON para a comparação pegar a troca de tipo
+    return json.loads(corpo, parse_int=Int, object_hook=lambda objeto: {
+        chave: (type(valor).__name__, valor) for chave, valor in objeto.items()
+    })
+
+
+def test_lista_igual_ao_detalhe(cenario):
+    c = cenario.c
+    cenario.nova_prova(tsp=40.5, tmp=61.25, descricao="meia")
+    cenario.percurso(cenario.inscricoes[0], 38.25, faltas=1)
+    c.post("/cronometros/", json={"id_inscricao": cenario.inscricoes[0], "tempo_inicial": "2026-05-01T10:00:00"})
+    juiz = c.post("/juiz/", json={"nome": "Juiz", "email": "juiz@example.com"}).json()["id_juiz"]
+    c.post("/avaliacoes/", json={"id_prova": cenario.prova, "id_juiz": juiz, "diretor_prova": "Diretor"})
+
+    for lista, detalhe, chave in (
+        ("/provas/", "/provas/{}", "id_prova"),
+        ("/inscricoes/", "/inscricoes/{}", "id_inscricao"),
+        ("/resultados/", "/resultados/{}", "id_resultado"),
+        ("/cronometros/", "/cronometros/{}", "id_cronometro"),
+        ("/avaliacoes/", "/avaliacoes/{}", "id_avaliacao"),
+        ("/cao/", "/cao/{}", "microchip"),
+        ("/competidor/", "/competidor/{}", "id_competidor"),
+        ("/juiz/", "/juiz/{}", "id_juiz"),
+    ):
+        linhas = c.get(lista).json()
+        assert linhas, lista
+        for linha in linhas:
+            resposta = c.get(detalhe.format(linha[chave]))
+            assert tipado(json.dumps(linha)) == tipado(resposta.text), lista
+
+
+def test_tsp_e_tmp_continuam_float(cenario):
+    c = cenario.c
+    prova = cenario.nova_prova(tsp=40.5, tmp=60)
+    linha = next(linha for linha in c.get("/provas/").json() if linha["id_prova"] == prova)
+    assert linha["tsp"] == 40.5 and isinstance(linha["tmp"], float)
+    assert '"tsp":40.5' in c.get("/provas/", params={"after": prova - 1, "limit": 1}).text
+    atualizada = c.put(f"/provas/{prova}", json={"tsp": 41.75}).json()
+    assert atualizada["tsp"] == 41.75
+    assert c.get(f"/provas/{prova}").json()["tsp"] == 41.75
+
+
+def test_paginacao_por_cursor(cenario):
+    c = cenario.c
+    vistos, after, paginas = [], None, 0
+    while True:
+        parametros = {"limit": 4, "id_prova": cenario.prova}
+        if after is not None:
+            parametros["after"] = after
+        resposta = c.get("/inscricoes/", params=parametros)
+        vistos += [linha["id_inscricao"] for linha in resposta.json()]
+        paginas += 1
+        after = resposta.headers.get("X-Next-Cursor")
+        if after is None:
+            break
+    assert vistos == sorted(cenario.inscricoes) and paginas == 2
+
+    # Cursor de texto (microchip)
+    primeira = c.get("/cao/", params={"limit": 4})
+    assert primeira.headers["X-Next-Cursor"] == "m3"
+    assert [linha["microchip"] for linha in c.get("/cao/", params={"after": "m3"}).json()] == ["m4", "m5"]
+
+
+def test_filtros_das_listas(cenario):
+    c = cenario.c
+    outra = cenario.nova_prova()
+    cenario.inscrever("m0", id_prova=outra)
+    c.put(f"/inscricoes/{cenario.inscricoes[0]}", json={"status": "eliminado"})
+    assert len(c.get("/inscricoes/", params={"id_prova": outra}).json()) == 1
+    assert len(c.get("/inscricoes/", params={"id_competicao": cenario.competicao}).json()) == 7
+    assert len(c.get("/inscricoes/", params={"microchip_cao": "m0"}).json()) == 2
+    assert [linha["id_inscricao"] for linha in c.get("/inscricoes/", params={"status": "eliminado"}).json()] == [
+        cenario.inscricoes[0],
+    ]
+    assert len(c.get("/cao/", params={"categoria_salto": "S"}).json()) == 3
+    assert len(c.get("/provas/", params={"id_competicao": cenario.competicao}).json()) == 2
+
+
+@pytest.mark.parametrize("limit", [0, 1001])
+def test_limite_fora_do_intervalo(client, limit):
+    assert client.get("/inscricoes/", params={"limit": limit}).status_code == 422
+
+
+def test_datas_em_iso(cenario):
+    c = cenario.c
+    c.put(f"/inscricoes/{cenario.inscricoes[0]}", json={"hora_inicio": "2026-05-01T10:30:00"})
+    linha = c.get("/inscricoes/", params={"limit": 1}).json()[0]
+    assert linha["hora_inicio"].startswith("2026-05-01T10:30:00")
+    assert c.get(f"/competicoes/{cenario.competicao}").json()["data"] == "2026-05-01T09:00:00"
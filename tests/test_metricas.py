@@ -0,0 +1,48 @@
+import re
+import pytest
+from app import config, metrics
+
+pytestmark = pytest.mark.skipif(not config.METRICS_ENABLED, reason="METRICS_ENABLED desligado")
+
+
+def valor(texto: str, linha: str) -> float:
+    encontrada = re.search(rf"^{re.escape(linha)} (\S+)$", texto, re.MULTILINE)
+    return float(encontrada.group(1)) if encontrada else 0.0
+
+
+def test_metricas_por_modelo_de_rota(cenario):
+    c = cenario.c
+    rotulos = 'method="GET",route="/provas/{prova_id}"'
+    antes = c.get("/metrics").text
+    for _ in range(3):
+        c.get(f"/provas/{cenario.prova}")
+    c.get("/provas/999")
+    texto = c.get("/metrics").text
+
+    def delta(linha):
+        return valor(texto, linha) - valor(antes, linha)
+
+    assert delta(f'agility_http_requests_total{{{rotulos},status="200"}}') == 3
+    assert delta(f'agility_http_requests_total{{{rotulos},status="404"}}') == 1
+    assert delta(f'agility_http_request_duration_seconds_count{{{rotulos}}}') == 4
+    assert delta(f"agility_db_queries_total{{{rotulos}}}") >= 1
+    assert "# TYPE agility_db_slow_queries_total counter" in texto
+    # Caminho concreto nunca vira rótulo
+    assert f'route="/provas/{cenario.prova}"' not in texto
+
+
+def test_query_lenta(monkeypatch, cenario):
+    monkeypatch.setattr(config, "SLOW_QUERY_MS", 0.000001)
+    antes = metrics.registro.queries_lentas
+    cenario.c.get(f"/provas/{cenario.prova}")
+    assert metrics.registro.queries_lentas > antes
+
+
+def test_rotulos_escapados():
+    registro = metrics.Registro()
+    medicao = metrics.Medicao("/x")
+    medicao.rota = '/a"b'
+    registro.registrar("GET", 200, 0.003, medicao)
+    texto = registro.exportar()
+    assert 'agility_http_requests_total{method="GET",route="/a\\"b",status="200"} 1' in texto
+    assert 'agility_http_request_duration_seconds_bucket{method="GET",route="/a\\"b",le="0.005"} 1' in texto
@@ -0,0 +1,104 @@
+import pytest
+from app import scoring
+
+
+@pytest.mark.parametrize("total, esperado", [
+    (0, 0),
+    (0.3, 1),
+    (4.5, 5),
+    (5.0, 5),
+    (41.1 - 40, 2),      # 1.1000000000000014: o ruído do float não vira mais um ponto
+    (10 + 0.1 + 0.2, 11),
+    (0.000001, 1),
+])
+def test_pontos_arredonda_para_cima(total, esperado):
+    assert scoring.pontos(total) == esperado
+
+
+def test_pontuar():
+    assert scoring.pontuar(38.0, 0, 0, "pendente", 40, 60, 160) == (0.0, 0.0, False, 160 / 38.0, 0)
+    assert scoring.pontuar(40.4, 1, 1, "pendente", 40, 60, 160).pontuacao == 11
+    assert scoring.pontuar(61.0, 0, 0, "pendente", 40, 60, 160).eliminado
+    assert scoring.pontuar(35.0, 0, 3, "pendente", 40, 60, 160).eliminado
+    assert scoring.pontuar(35.0, 0, 0, "eliminado", 40, 60, 160).eliminado
+    assert scoring.pontuar(None, 0, 0, "pendente", 40, 60, 160) == (None, None, False, None, None)
+
+
+def test_percurso_pontuado_na_gravacao(cenario):
+    inscricao = cenario.percurso(cenario.inscricoes[0], 40.3, faltas=1)
+    assert inscricao["pontuacao"] == 6
+    assert inscricao["vel_media"] == pytest.approx(160 / 40.3)
+    inscricao = cenario.percurso(cenario.inscricoes[1], 60.5)
+    assert inscricao["status"] == "eliminado" and inscricao["pontuacao"] is None
+
+
+def test_mudanca_de_tsp_repontua_a_prova(cenario):
+    c = cenario.c
+    cenario.percurso(cenario.inscricoes[0], 42.0)
+    assert c.put(f"/provas/{cenario.prova}", json={"tsp": 45}).status_code == 200
+    assert c.get(f"/inscricoes/{cenario.inscricoes[0]}").json()["pontuacao"] == 0
+    c.put(f"/provas/{cenario.prova}", json={"tmp": 41})
+    assert c.get(f"/inscricoes/{cenario.inscricoes[0]}").json()["status"] == "eliminado"
+
+
+def test_mudar_de_prova_repontua_com_a_prova_nova(cenario):
+    c = cenario.c
+    curta = cenario.nova_prova(tsp=30, tmp=45)
+    cenario.percurso(cenario.inscricoes[0], 35.0)
+    movida = c.put(f"/inscricoes/{cenario.inscricoes[0]}", json={"id_prova": curta}).json()
+    assert movida["pontuacao"] == 5
+
+    cenario.percurso(cenario.inscricoes[1], 50.0)
+    movida = c.put(f"/inscricoes/{cenario.inscricoes[1]}", json={"id_prova": curta}).json()
+    assert movida["status"] == "eliminado" and movida["pontuacao"] is None
+
+
+def test_inscricao_sem_prova_nao_quebra_a_pontuacao(cenario):
+    c = cenario.c
+    cenario.percurso(cenario.inscricoes[0], 38.0)
+    assert c.delete(f"/provas/{cenario.prova}").status_code == 200
+    orfa = c.get(f"/inscricoes/{cenario.inscricoes[0]}").json()
+    assert orfa["id_prova"] is None
+
+    resposta = c.put(f"/inscricoes/{cenario.inscricoes[0]}", json={"tempo_prova": 41.0, "faltas_prova": 1})
+    assert resposta.status_code == 200
+    assert resposta.json()["tempo_prova"] == 41.0
+
+
+def test_rescore(cenario):
+    c = cenario.c
+    cenario.percurso(cenario.inscricoes[0], 41.5)
+    cenario.percurso(cenario.inscricoes[1], 38.0)
+    # Pontuação gravada à mão, fora da regra
+    c.put(f"/inscricoes/{cenario.inscricoes[1]}", json={"pontuacao": 9})
+    assert c.post(f"/provas/{cenario.prova}/rescore").json() == {"id_prova": cenario.prova, "reavaliadas": 1}
+    assert c.get(f"/inscricoes/{cenario.inscricoes[1]}").json()["pontuacao"] == 0
+    assert c.post("/provas/999/rescore").status_code == 404
+
+
+def test_correcao_desfaz_eliminacao_do_percurso(cenario):
+    c = cenario.c
+    assert cenario.percurso(cenario.inscricoes[0], 65.0)["status"] == "eliminado"
+    c.put(f"/provas/{cenario.prova}", json={"tmp": 70})
+    corrigida = c.get(f"/inscricoes/{cenario.inscricoes[0]}").json()
+    assert corrigida["status"] == "pendente" and corrigida["pontuacao"] == 25
+
+    c.put(f"/provas/{cenario.prova}", json={"tmp": 60})
+    assert c.get(f"/inscricoes/{cenario.inscricoes[0]}").json()["status"] == "eliminado"
+    corrigida = cenario.percurso(cenario.inscricoes[0], 50.0)
+    assert corrigida["status"] == "pendente" and corrigida["pontuacao"] == 10
+
+    assert cenario.percurso(cenario.inscricoes[1], 38.0, recusas=3)["status"] == "eliminado"
+    corrigida = cenario.percurso(cenario.inscricoes[1], 38.0, recusas=1)
+    assert corrigida["status"] == "pendente" and corrigida["pontuacao"] == 5
+
+
+def test_eliminacao_do_juiz_nao_e_desfeita(cenario):
+    c = cenario.c
+    cenario.percurso(cenario.inscricoes[0], 65.0)
+    c.put(f"/inscricoes/{cenario.inscricoes[0]}", json={"status": "eliminado"})
+    c.put(f"/provas/{cenario.prova}", json={"tmp": 70})
+    assert c.get(f"/inscricoes/{cenario.inscricoes[0]}").json()["status"] == "eliminado"
+    assert cenario.percurso(cenario.inscricoes[0], 50.0)["status"] == "eliminado"
+    # Novo status do juiz substitui o anterior
+    assert c.put(f"/inscricoes/{cenario.inscricoes[0]}", json={"status": "concluido"}).json()["status"] == "concluido"
@@ -0,0 +1,158 @@
+import bisect
+import random
+from app import ranking
+from app.models import Inscricao, Resultado
+
+
+def posicoes_gravadas(db, id_prova: int) -> dict:
+    db.expire_all()
+    return dict(
+        db.query(Resultado.id_inscricao, Resultado.posicao)
+        .join(Inscricao, Resultado.id_inscricao == Inscricao.id_inscricao)
+        .filter(Inscricao.id_prova == id_prova, Resultado.posicao.is_not(None))
+        .all()
+    )
+
+
+def conferir(c, db, id_prova: int) -> list:
+    classificacao = c.get(f"/provas/{id_prova}/classificacao").json()
+    assert [linha["posicao"] for linha in classificacao] == list(range(1, len(classificacao) + 1))
+    assert [(linha["penalidades"], linha["tempo_prova"]) for linha in classificacao] == sorted(
+        (linha["penalidades"], linha["tempo_prova"]) for linha in classificacao
+    )
+    assert posicoes_gravadas(db, id_prova) == {linha["id_inscricao"]: linha["posicao"] for linha in classificacao}
+    return classificacao
+
+
+def test_lista_ordenada_igual_a_lista_com_bisect():
+    aleatorio = random.Random(7)
+    lista, referencia = ranking.ListaOrdenada(), []
+    for _ in range(2000):
+        if referencia and aleatorio.random() < 0.4:
+            chave = aleatorio.choice(referencia)
+            assert lista.remover(chave) == bisect.bisect_left(referencia, chave)
+            referencia.remove(chave)
+        else:
+            chave = (aleatorio.randint(0, 50), aleatorio.random())
+            assert lista.inserir(chave) == bisect.bisect_left(referencia, chave)
+            bisect.insort(referencia, chave)
+        assert len(lista) == len(referencia)
+    assert list(lista) == referencia
+    for inicio, fim in ((0, 0), (0, 5), (10, 40), (len(referencia) - 3, len(referencia) + 3)):
+        assert lista.fatia(inicio, fim) == referencia[inicio:fim]
+
+
+def test_atualizar_devolve_so_as_posicoes_que_mudaram():
+    classificacao = ranking.ClassificacaoProva(1, 40.0, 60.0)
+    classificacao.carregar({i: (0.0, 30.0 + i, i) for i in range(1, 6)})
+    # 4 passa para a frente: só as posições 1..4 mudam, a 5 fica
+    assert classificacao.atualizar(4, (0.0, 29.0, 4)) == [(4, 1), (1, 2), (2, 3), (3, 4)]
+    assert classificacao.atualizar(4, (0.0, 29.0, 4)) == []
+    # Eliminado: sai e os de trás sobem
+    assert classificacao.atualizar(2, None) == [(2, None), (3, 3), (5, 4)]
+    assert classificacao.posicoes() == [(4, 1), (1, 2), (3, 3), (5, 4)]
+
+
+def test_classificacao_gravada_nos_resultados(cenario, db):
+    c = cenario.c
+    tempos = [44.0, 38.5, 39.0, 41.2, 35.0, 37.0]
+    for id_inscricao, tempo in zip(cenario.inscricoes, tempos):
+        cenario.percurso(id_inscricao, tempo, faltas=1 if tempo == 35.0 else 0)
+    classificacao = conferir(c, db, cenario.prova)
+    assert [linha["id_inscricao"] for linha in classificacao] == [
+        cenario.inscricoes[i] for i in (5, 1, 2, 3, 0, 4)
+    ]
+
+    # Eliminado sai da classificação e perde a posição
+    c.put(f"/inscricoes/{cenario.inscricoes[1]}", json={"status": "eliminado"})
+    classificacao = conferir(c, db, cenario.prova)
+    assert cenario.inscricoes[1] not in [linha["id_inscricao"] for linha in classificacao]
+
+    # Reconstruída do banco, a classificação é a mesma
+    ranking.descartar(cenario.prova)
+    assert c.get(f"/provas/{cenario.prova}/classificacao").json() == classificacao
+
+
+def test_posicoes_gravadas_a_mao_sao_corrigidas_na_carga(cenario, db):
+    c = cenario.c
+    for id_inscricao, tempo in zip(cenario.inscricoes, (40, 39, 38)):
+        cenario.percurso(id_inscricao, tempo)
+    resultado = c.get("/resultados/", params={"id_inscricao": cenario.inscricoes[0]}).json()[0]
+    c.put(f"/resultados/{resultado['id_resultado']}", json={"posicao": 1})
+    ranking.descartar(cenario.prova)
+    conferir(c, db, cenario.prova)
+
+
+def test_remover_inscricao_limpa_a_posicao(cenario, db):
+    c = cenario.c
+    for id_inscricao, tempo in zip(cenario.inscricoes, (36, 37, 38, 39)):
+        cenario.percurso(id_inscricao, tempo)
+    removida = cenario.inscricoes[1]
+    resultado = c.get("/resultados/", params={"id_inscricao": removida}).json()[0]
+
+    assert c.delete(f"/inscricoes/{removida}").status_code == 200
+    classificacao = conferir(c, db, cenario.prova)
+    assert [linha["id_inscricao"] for linha in classificacao] == [cenario.inscricoes[i] for i in (0, 2, 3)]
+    # O Resultado fica (desvinculado), mas sem a posição antiga
+    orfao = c.get(f"/resultados/{resultado['id_resultado']}").json()
+    assert orfao["id_inscricao"] is None and orfao["posicao"] is None
+
+
+def test_remover_inscricao_com_classificacao_fora_da_memoria(cenario, db):
+    c = cenario.c
+    for id_inscricao, tempo in zip(cenario.inscricoes, (36, 37, 38)):
+        cenario.percurso(id_inscricao, tempo)
+    ranking.descartar(cenario.prova)
+    c.delete(f"/inscricoes/{cenario.inscricoes[0]}")
+    db.expire_all()
+    assert db.query(Resultado).filter(Resultado.id_inscricao.is_(None), Resultado.posicao.is_not(None)).count() == 0
+    conferir(c, db, cenario.prova)
+
+
+def test_mudar_de_prova_leva_um_unico_resultado(cenario, db):
+    c = cenario.c
+    outra = cenario.nova_prova()
+    cenario.inscrever("m0", id_prova=outra)
+    cenario.percurso(c.get("/inscricoes/", params={"id_prova": outra}).json()[0]["id_inscricao"], 30.0)
+    for id_inscricao, tempo in zip(cenario.inscricoes, (36, 37, 38)):
+        cenario.percurso(id_inscricao, tempo)
+
+    movida = cenario.inscricoes[0]
+    assert c.put(f"/inscricoes/{movida}", json={"id_prova": outra}).status_code == 200
+
+    resultados = c.get("/resultados/", params={"id_inscricao": movida}).json()
+    assert len(resultados) == 1
+    antiga = conferir(c, db, cenario.prova)
+    nova = conferir(c, db, outra)
+    assert movida not in [linha["id_inscricao"] for linha in antiga]
+    assert [linha["id_inscricao"] for linha in nova][1] == movida
+    assert resultados[0]["posicao"] == 2
+
+    # E de volta: continua um só
+    c.put(f"/inscricoes/{movida}", json={"id_prova": cenario.prova})
+    assert len(c.get("/resultados/", params={"id_inscricao": movida}).json()) == 1
+    conferir(c, db, cenario.prova)
+    conferir(c, db, outra)
+
+
+def test_percursos_gravados_por_outro_worker(cenario, db):
+    c = cenario.c
+    for id_inscricao, tempo in zip(cenario.inscricoes, (36, 37, 38)):
+        cenario.percurso(id_inscricao, tempo)
+    # Cópia em memória deste worker; o outro worker começa sem nenhuma
+    deste_worker = dict(ranking._classificacoes)
+    ranking._classificacoes.clear()
+    cenario.percurso(cenario.inscricoes[3], 35.0)
+    c.delete(f"/inscricoes/{cenario.inscricoes[0]}")
+    ranking._classificacoes.update(deste_worker)
+
+    classificacao = conferir(c, db, cenario.prova)
+    assert [linha["id_inscricao"] for linha in classificacao] == [cenario.inscricoes[i] for i in (3, 1, 2)]
+    ranking._classificacoes.update(deste_worker)
+    cenario.percurso(cenario.inscricoes[4], 36.5)
+    classificacao = conferir(c, db, cenario.prova)
+    assert [linha["id_inscricao"] for linha in classificacao] == [cenario.inscricoes[i] for i in (3, 4, 1, 2)]
+
+
+def test_classificacao_de_prova_inexistente(client):
+    assert client.get("/provas/999/classificacao").status_code == 404
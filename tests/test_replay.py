@@ -0,0 +1,12 @@
+import json
+from benchmarks import replay
+
+
+def test_replay_pequeno(client, tmp_path, capsys):
+    relatorio = tmp_path / "replay.json"
+    argumentos = ["--operacoes", "60", "--competicoes", "2", "--provas", "2", "--caes", "60",
+                  "--competidores", "20", "--por-prova", "15", "--json", str(relatorio)]
+    assert replay.main(argumentos) == 0
+    assert "p99" in capsys.readouterr().out
+    rotas = json.loads(relatorio.read_text())["rotas"]
+    assert rotas and all(rota["p99_ms"] >= rota["p50_ms"] for rota in rotas)
@@ -0,0 +1,98 @@
+def sincronizar(c, operacoes, dispositivo="pista-1") -> dict:
+    resposta = c.post("/sync/batch", json={"dispositivo": dispositivo, "operacoes": operacoes})
+    assert resposta.status_code == 200, resposta.text
+    return {resultado["id_operacao"]: resultado for resultado in resposta.json()["resultados"]}
+
+
+def test_lote_aplica_em_ordem_e_isola_erros(cenario):
+    c = cenario.c
+    ids = cenario.inscricoes
+    resultados = sincronizar(c, [
+        {"id_operacao": "a1", "entidade": "cronometro", "acao": "create", "dados": {
+            "id_inscricao": ids[0], "tempo_inicial": "2026-05-01T09:00:00", "status": "finalizado", "tempo_oficial": 41.2,
+        }},
+        {"id_operacao": "a2", "entidade": "inscricao", "acao": "update", "id": ids[0],
+         "dados": {"tempo_prova": 41.2, "faltas_prova": 1}, "carimbo": "2026-05-01T09:00:45"},
+        {"id_operacao": "a3", "entidade": "inscricao", "acao": "update", "id": ids[1], "dados": {"tempo_prova": 38.0}},
+        {"id_operacao": "a4", "entidade": "inscricao", "acao": "update", "id": 9999, "dados": {"tempo_prova": 38.0}},
+        {"id_operacao": "a5", "entidade": "resultado", "acao": "create", "dados": {"total_pontos_t": "x"}},
+        {"id_operacao": "a6", "entidade": "inscricao", "acao": "delete", "id": ids[5]},
+        {"id_operacao": "a7", "entidade": "resultado", "acao": "update", "dados": {"total_pontos_t": 1}},
+    ])
+    assert {chave: resultado["status"] for chave, resultado in resultados.items()} == {
+        "a1": "aplicada", "a2": "aplicada", "a3": "aplicada", "a4": "erro", "a5": "erro", "a6": "aplicada", "a7": "erro",
+    }
+    assert resultados["a2"]["dados"]["pontuacao"] == 7
+    assert resultados["a6"]["dados"] is None
+    assert "9999" in resultados["a4"]["erro"]
+    assert resultados["a7"]["erro"] == "id obrigatório em update/delete"
+
+    # O que falhou foi desfeito sozinho; o resto está gravado e classificado
+    assert c.get(f"/inscricoes/{ids[5]}").status_code == 404
+    assert len(c.get("/cronometros/").json()) == 1
+    assert [linha["id_inscricao"] for linha in c.get(f"/provas/{cenario.prova}/classificacao").json()] == [ids[1], ids[0]]
+
+
+def test_reenvio_nao_reaplica(cenario):
+    c = cenario.c
+    operacoes = [
+        {"id_operacao": "r1", "entidade": "resultado", "acao": "create",
+         "dados": {"id_inscricao": cenario.inscricoes[0], "total_pontos_t": 10, "total_pontos_tp": 3}},
+        {"id_operacao": "r2", "entidade": "inscricao", "acao": "update", "id": cenario.inscricoes[1], "dados": {"tempo_prova": 39.0}},
+    ]
+    primeira = sincronizar(c, operacoes)
+    # Depois do primeiro envio outra gravação mudou a inscrição
+    cenario.percurso(cenario.inscricoes[1], 45.0)
+    reenvio = sincronizar(c, operacoes + [
+        {"id_operacao": "r3", "entidade": "inscricao", "acao": "update", "id": cenario.inscricoes[2], "dados": {"tempo_prova": 39.5}},
+    ])
+    assert [reenvio[chave]["status"] for chave in ("r1", "r2", "r3")] == ["duplicada", "duplicada", "aplicada"]
+    assert reenvio["r1"]["id"] == primeira["r1"]["id"]
+    # A duplicada devolve o estado atual, não reaplica o tempo antigo
+    assert reenvio["r2"]["dados"]["tempo_prova"] == 45.0
+    assert len(c.get("/resultados/", params={"id_inscricao": cenario.inscricoes[0]}).json()) == 1
+
+    # O mesmo id vindo de outro dispositivo é outra operação
+    outro = sincronizar(c, operacoes[:1], dispositivo="pista-2")
+    assert outro["r1"]["status"] == "aplicada"
+
+
+def test_repeticao_dentro_do_lote(cenario):
+    operacao = {"id_operacao": "d1", "entidade": "resultado", "acao": "create",
+                "dados": {"id_inscricao": cenario.inscricoes[0], "total_pontos_t": 1, "total_pontos_tp": 1}}
+    resultados = cenario.c.post("/sync/batch", json={"dispositivo": "p", "operacoes": [operacao, operacao]}).json()["resultados"]
+    assert [resultado["status"] for resultado in resultados] == ["aplicada", "duplicada"]
+    assert resultados[0]["id"] == resultados[1]["id"]
+
+
+def test_conflito_de_versao(cenario):
+    c = cenario.c
+    alvo = cenario.inscricoes[0]
+    resultados = sincronizar(c, [
+        {"id_operacao": "v1", "entidade": "inscricao", "acao": "update", "id": alvo, "versao": 1, "dados": {"tempo_prova": 39.0}},
+        # Lida na versão 1, mas v1 acabou de gravar a 2
+        {"id_operacao": "v2", "entidade": "inscricao", "acao": "update", "id": alvo, "versao": 1, "dados": {"faltas_prova": 2}},
+        {"id_operacao": "v3", "entidade": "inscricao", "acao": "update", "id": alvo, "versao": 2, "dados": {"recusas_prova": 1}},
+    ])
+    assert [resultados[chave]["status"] for chave in ("v1", "v2", "v3")] == ["aplicada", "erro", "aplicada"]
+    inscricao = c.get(f"/inscricoes/{alvo}").json()
+    assert (inscricao["tempo_prova"], inscricao["faltas_prova"], inscricao["recusas_prova"]) == (39.0, None, 1)
+    assert inscricao["versao"] == 3
+    # A operação que falhou pode ser reenviada corrigida com o mesmo id
+    corrigida = sincronizar(c, [
+        {"id_operacao": "v2", "entidade": "inscricao", "acao": "update", "id": alvo, "versao": 3, "dados": {"faltas_prova": 2}},
+    ])
+    assert corrigida["v2"]["status"] == "aplicada"
+
+
+def test_sync_com_inscricao_orfa(cenario):
+    c = cenario.c
+    c.delete(f"/competidor/{cenario.competidor}")
+    c.delete(f"/provas/{cenario.prova}")
+    resultados = sincronizar(c, [
+        {"id_operacao": "o1", "entidade": "inscricao", "acao": "update", "id": cenario.inscricoes[0],
+         "dados": {"colete_competidor": "q", "tempo_prova": 40.0}},
+    ])
+    assert resultados["o1"]["status"] == "aplicada"
+    assert resultados["o1"]["dados"]["id_competidor"] is None
+    assert resultados["o1"]["dados"]["id_prova"] is None